@@ -0,0 +1,220 @@
+import itertools
+import json
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+DEFAULT_QUEUE_SIZE = 100  # Pending alerts per sink before the overflow policy kicks in
+OVERFLOW_POLICIES = ('drop_oldest', 'drop_newest')
+
+
+class Alert(NamedTuple):
+    symbol: str
+    kind: str  # e.g. 'bullish', 'overbought', 'buy'
+    message: str
+    price: Optional[float] = None
+    sound: Optional[str] = None  # .wav file for the audio sink
+    source: str = ''  # Script or strategy raising the alert
+    sinks: Optional[Tuple[str, ...]] = None  # Sink names to deliver to; None for all
+    created: float = 0.0
+    count: int = 1  # Identical alerts merged into this one while queued
+
+    @property
+    def key(self) -> Tuple[str, str, str]:
+        """Alerts with the same key are merged while waiting in a queue"""
+        return self.source, self.symbol, self.kind
+
+
+class Sink:
+    """Destination for alerts; handle() runs on the sink's own worker thread"""
+
+    name = 'sink'
+    merge = True  # Merge an alert into an identical one still queued
+
+    def wants(self, alert: Alert) -> bool:
+        return alert.sinks is None or self.name in alert.sinks
+
+    def handle(self, alert: Alert):
+        raise NotImplementedError
+
+
+class ConsoleSink(Sink):
+    name = 'console'
+
+    def handle(self, alert: Alert):
+        timestamp = datetime.fromtimestamp(alert.created).strftime("%Y-%m-%d %H:%M:%S")
+        repeat = f" (x{alert.count})" if alert.count > 1 else ""
+        print(f"\n[{timestamp}] {alert.symbol} | {alert.message}{repeat}", flush=True)
+
+
+class FileSink(Sink):
+    """Appends 'timestamp | symbol | kind | price' lines, the divergence_log.txt format"""
+
+    name = 'file'
+    merge = False  # Every divergence is a log line of its own
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def handle(self, alert: Alert):
+        timestamp = datetime.fromtimestamp(alert.created).strftime("%Y-%m-%d %H:%M:%S")
+        price = f"{alert.price:.4f}" if alert.price is not None else "N/A"
+        with open(self.path, "a") as f:
+            f.write(f"{timestamp} | {alert.symbol} | {alert.kind} | {price}\n")
+
+
+class AudioSink(Sink):
+    """Plays alerts through `player`; one worker means clips never overlap or stall a scan"""
+
+    name = 'audio'
+
+    def __init__(self, player: Callable[[Alert], None]):
+        self.player = player
+
+    def handle(self, alert: Alert):
+        self.player(alert)
+
+
+class WebhookSink(Sink):
+    """
+    Posts alerts as JSON to `url`. Without a url it only records the payloads
+    in `sent`, standing in for a real endpoint.
+    """
+
+    name = 'webhook'
+
+    def __init__(self, url: Optional[str] = None, timeout: float = 5.0):
+        self.url = url
+        self.timeout = timeout
+        self.sent: List[Dict] = []
+
+    def handle(self, alert: Alert):
+        payload = {
+            'symbol': alert.symbol, 'kind': alert.kind, 'message': alert.message,
+            'price': alert.price, 'source': alert.source, 'created': alert.created, 'count': alert.count,
+        }
+        if self.url is None:
+            self.sent.append(payload)
+            return
+        from urllib.request import Request, urlopen
+
+        request = Request(self.url, data=json.dumps(payload).encode(), headers={'Content-Type': 'application/json'})
+        with urlopen(request, timeout=self.timeout):
+            pass
+
+
+class _Channel:
+    """Bounded, key-deduplicated queue feeding one sink's worker thread"""
+
+    def __init__(self, sink: Sink, maxsize: int, overflow: str):
+        self.sink = sink
+        self.maxsize = maxsize
+        self.overflow = overflow
+        self.pending: "OrderedDict[Tuple, Alert]" = OrderedDict()
+        self.condition = threading.Condition()
+        self.busy = False
+        self.merged = 0
+        self.dropped = 0
+        self.thread: Optional[threading.Thread] = None
+        self._sequence = itertools.count()
+
+    def put(self, alert: Alert):
+        key = alert.key if self.sink.merge else (*alert.key, next(self._sequence))
+        with self.condition:
+            queued = self.pending.get(key)
+            if queued is not None:
+                # Same alert still waiting: keep its place, carry the latest details
+                self.pending[key] = alert._replace(count=queued.count + alert.count)
+                self.merged += 1
+                return
+            if len(self.pending) >= self.maxsize:
+                self.dropped += 1
+                if self.overflow == 'drop_newest':
+                    return
+                self.pending.popitem(last=False)
+            self.pending[key] = alert
+            self.condition.notify()
+
+    def run(self, stopping: threading.Event):
+        while True:
+            with self.condition:
+                while not self.pending and not stopping.is_set():
+                    self.condition.wait()
+                if not self.pending:
+                    return
+                _, alert = self.pending.popitem(last=False)
+                self.busy = True
+            try:
+                self.sink.handle(alert)
+            except Exception as e:
+                print(f"Alert sink '{self.sink.name}' error: {e}")
+            with self.condition:
+                self.busy = False
+                self.condition.notify_all()
+
+
+class AlertDispatcher:
+    """
+    Fans alerts out to sinks without blocking the caller.
+
+    Every sink gets its own bounded queue and one long-lived worker thread,
+    so a slow sound or webhook never holds up the console or the scan loop.
+    An alert whose key is already queued for a sink is merged into the
+    queued one (its count goes up), unless the sink opts out like FileSink
+    does. When a queue is full, `overflow` decides
+    whether the oldest queued alert or the incoming one is dropped.
+    """
+
+    def __init__(self, sinks: List[Sink], maxsize: int = DEFAULT_QUEUE_SIZE, overflow: str = 'drop_oldest'):
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy: {overflow}")
+        self.channels = [_Channel(sink, maxsize, overflow) for sink in sinks]
+        self._stopping = threading.Event()
+
+    def start(self) -> "AlertDispatcher":
+        """Start one daemon worker per sink"""
+        self._stopping.clear()
+        for channel in self.channels:
+            if channel.thread is None or not channel.thread.is_alive():
+                channel.thread = threading.Thread(target=channel.run, args=(self._stopping,), daemon=True)
+                channel.thread.start()
+        return self
+
+    def dispatch(self, alert: Alert):
+        """Queue `alert` for every sink that wants it; never blocks on sink I/O"""
+        if not alert.created:
+            alert = alert._replace(created=time.time())
+        for channel in self.channels:
+            if channel.sink.wants(alert):
+                channel.put(alert)
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait until every queue is drained; returns False on timeout"""
+        deadline = None if timeout is None else time.time() + timeout
+        for channel in self.channels:
+            with channel.condition:
+                while channel.pending or channel.busy:
+                    remaining = None if deadline is None else deadline - time.time()
+                    if remaining is not None and remaining <= 0:
+                        return False
+                    channel.condition.wait(remaining)
+        return True
+
+    def stop(self, timeout: Optional[float] = None):
+        """Deliver what is queued, then end the workers"""
+        self._stopping.set()
+        for channel in self.channels:
+            with channel.condition:
+                channel.condition.notify_all()
+        for channel in self.channels:
+            if channel.thread is not None:
+                channel.thread.join(timeout)
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """Queued, merged and dropped counts per sink"""
+        return {
+            channel.sink.name: {'queued': len(channel.pending), 'merged': channel.merged, 'dropped': channel.dropped}
+            for channel in self.channels
+        }
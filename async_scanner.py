@@ -0,0 +1,113 @@
+import asyncio
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+from divergence import detect_divergences
+from exchange_client import create_async_client
+from indicators import calculate_rsi_batch
+from scheduler import seconds_until_next_bar
+
+# Configuration
+EXCHANGE_ID = 'mexc'
+USE_FAKE_EXCHANGE = False  # Scan the offline FakeExchange instead of MEXC
+symbols = ['XRP/USDT']  # Add your coins here
+timeframe = '1m'
+rsi_period = 14
+max_concurrency = 20  # Requests in flight at once
+
+# Divergence detection parameters (from PineScript)
+lbL = 5
+lbR = 5
+rangeUpper = 60
+rangeLower = 5
+enabled_divergences = ("regular_bullish", "regular_bearish")
+
+
+def create_async_exchange(exchange_id: str = EXCHANGE_ID, config: Optional[Dict] = None):
+    """ccxt.async_support client behind the shared rate limiter, with retries and circuit breakers"""
+    return create_async_client(exchange_id, config=config)
+
+
+async def fetch_symbol(exchange, semaphore: asyncio.Semaphore, symbol: str, timeframe: str, limit: int):
+    """Fetch one symbol's candles once a concurrency slot is free"""
+    async with semaphore:
+        try:
+            return symbol, await exchange.fetch_ohlcv(symbol, timeframe, limit=limit)
+        except Exception as e:
+            print(f"Fetch error for {symbol}: {e}")
+            return symbol, None
+
+
+async def fetch_all(exchange, symbols: List[str], timeframe: str, limit: int,
+                    concurrency: int = max_concurrency) -> Dict[str, list]:
+    """Fetch every symbol concurrently, at most `concurrency` requests in flight"""
+    semaphore = asyncio.Semaphore(concurrency)
+    results = await asyncio.gather(*(
+        fetch_symbol(exchange, semaphore, symbol, timeframe, limit) for symbol in symbols
+    ))
+    return {symbol: ohlcv for symbol, ohlcv in results if ohlcv}
+
+
+def scan_divergences(candles_by_symbol: Dict[str, list], window: int) -> Dict[str, Dict[str, bool]]:
+    """Run batch RSI and divergence detection over every symbol with a full window"""
+    batch = [(symbol, ohlcv[-window:]) for symbol, ohlcv in candles_by_symbol.items() if len(ohlcv) >= window]
+    if not batch:
+        return {}
+
+    candles = np.array([ohlcv for _, ohlcv in batch], dtype=np.float64)
+    rsi = calculate_rsi_batch(candles[:, :, 4], rsi_period)
+    return {
+        symbol: detect_divergences(
+            rsi[row], candles[row, :, 3], candles[row, :, 2],
+            lbL, lbR, rangeLower, rangeUpper, enabled_divergences,
+        )
+        for row, (symbol, _) in enumerate(batch)
+    }
+
+
+async def scan_once(exchange, symbols: List[str], handler: Callable[[Dict[str, list]], None],
+                    concurrency: int = max_concurrency) -> Dict[str, list]:
+    """Fetch one cycle's candles for all symbols and hand them to `handler`"""
+    window = max(rangeUpper + lbL + lbR, 100)
+    started = time.perf_counter()
+    candles_by_symbol = await fetch_all(exchange, symbols, timeframe, window, concurrency)
+    elapsed = time.perf_counter() - started
+    print(f"Fetched {len(candles_by_symbol)}/{len(symbols)} symbols in {elapsed:.2f}s")
+    handler(candles_by_symbol)
+    return candles_by_symbol
+
+
+def print_divergences(candles_by_symbol: Dict[str, list]):
+    """Default handler: print every symbol with an active divergence"""
+    window = max(rangeUpper + lbL + lbR, 100)
+    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    for symbol, divergences in scan_divergences(candles_by_symbol, window).items():
+        for div_type, detected in divergences.items():
+            if detected:
+                print(f"{timestamp} | {symbol} | {div_type}")
+
+
+async def main():
+    if USE_FAKE_EXCHANGE:
+        from fake_exchange import AsyncFakeExchange
+        exchange = AsyncFakeExchange(symbols)
+    else:
+        exchange = create_async_exchange()
+
+    print(f"Starting async scanner for {len(symbols)} symbols ({timeframe}, concurrency {max_concurrency})")
+    try:
+        while True:
+            await scan_once(exchange, symbols, print_divergences)
+            await asyncio.sleep(seconds_until_next_bar(timeframe))
+    finally:
+        await exchange.close()
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        print("\nExiting...")
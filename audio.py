@@ -0,0 +1,299 @@
+import atexit
+import io
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import wave
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+SAMPLE_RATE = 48000  # Every clip is converted to one format so clips can be mixed and piped
+CHANNELS = 2
+FALLBACK_TONE = ((1000, 500),)  # Played in place of a missing .wav, like the scripts' Beep(1000, 500)
+
+
+class Clip(NamedTuple):
+    name: str
+    samples: np.ndarray  # int16, shape (frames, CHANNELS)
+    wav: bytes  # Same audio as an in-memory .wav file, for winsound SND_MEMORY
+
+    @property
+    def seconds(self) -> float:
+        return len(self.samples) / SAMPLE_RATE
+
+
+def _encode_wav(samples: np.ndarray) -> bytes:
+    buffer = io.BytesIO()
+    with wave.open(buffer, 'wb') as w:
+        w.setnchannels(CHANNELS)
+        w.setsampwidth(2)
+        w.setframerate(SAMPLE_RATE)
+        w.writeframes(samples.astype('<i2').tobytes())
+    return buffer.getvalue()
+
+
+def _make_clip(name: str, samples: np.ndarray) -> Clip:
+    samples = np.ascontiguousarray(samples, dtype=np.int16)
+    return Clip(name, samples, _encode_wav(samples))
+
+
+def decode_wav(path: str) -> np.ndarray:
+    """Read a PCM .wav into int16 (frames, CHANNELS) samples at SAMPLE_RATE"""
+    with wave.open(path, 'rb') as w:
+        channels, width, rate = w.getnchannels(), w.getsampwidth(), w.getframerate()
+        raw = w.readframes(w.getnframes())
+
+    if width == 1:
+        data = (np.frombuffer(raw, dtype=np.uint8).astype(np.float64) - 128) * 256
+    elif width == 2:
+        data = np.frombuffer(raw, dtype='<i2').astype(np.float64)
+    elif width == 4:
+        data = np.frombuffer(raw, dtype='<i4').astype(np.float64) / 65536
+    else:
+        raise ValueError(f"Unsupported sample width {width} in {path}")
+    data = data.reshape(-1, channels)
+
+    # Mono is duplicated; extra channels beyond stereo are dropped
+    data = np.repeat(data, CHANNELS, axis=1) if channels == 1 else data[:, :CHANNELS]
+    if rate != SAMPLE_RATE and len(data):
+        positions = np.arange(int(len(data) * SAMPLE_RATE / rate)) * (rate / SAMPLE_RATE)
+        data = np.column_stack([np.interp(positions, np.arange(len(data)), data[:, c]) for c in range(CHANNELS)])
+    return np.clip(np.round(data), -32768, 32767).astype(np.int16)
+
+
+def tone_samples(tones: Sequence[Tuple[float, int]], volume: float = 0.3) -> np.ndarray:
+    """(frequency Hz, duration ms) beeps back to back, like a series of winsound.Beep calls"""
+    parts = []
+    for frequency, duration_ms in tones:
+        t = np.arange(int(SAMPLE_RATE * duration_ms / 1000)) / SAMPLE_RATE
+        wave_ = np.sin(2 * np.pi * frequency * t)
+        fade = np.minimum(1.0, np.minimum(t, t[::-1]) * 200)  # 5 ms ramps avoid clicks
+        parts.append(wave_ * fade)
+    mono = np.concatenate(parts) if parts else np.empty(0)
+    return np.repeat((mono * volume * 32767).astype(np.int16)[:, None], CHANNELS, axis=1)
+
+
+class SoundBank:
+    """
+    Alert sounds decoded once into memory. Clips are looked up by name (the
+    .wav file name for loaded files), so playing one never touches the disk.
+    """
+
+    def __init__(self):
+        self.clips: Dict[str, Clip] = {}
+
+    @classmethod
+    def from_files(cls, paths: Iterable[str]) -> "SoundBank":
+        bank = cls()
+        for path in paths:
+            bank.load(path)
+        return bank
+
+    def load(self, path: str, name: Optional[str] = None) -> Clip:
+        """Decode `path`; a missing or unreadable file is replaced by a beep"""
+        name = name or path
+        try:
+            samples = decode_wav(path)
+        except (OSError, EOFError, wave.Error, ValueError) as e:
+            print(f"Warning: could not load sound '{path}' ({e}). Falling back to a beep.")
+            samples = tone_samples(FALLBACK_TONE)
+        clip = self.clips[name] = _make_clip(name, samples)
+        return clip
+
+    def add_tone(self, name: str, tones: Sequence[Tuple[float, int]], volume: float = 0.3) -> Clip:
+        clip = self.clips[name] = _make_clip(name, tone_samples(tones, volume))
+        return clip
+
+    def get(self, name: str) -> Optional[Clip]:
+        return self.clips.get(name)
+
+    def mix(self, names: Sequence[str]) -> Optional[Clip]:
+        """One clip playing `names` at the same time, scaled down so it never clips"""
+        clips = [self.clips[name] for name in names if name in self.clips]
+        if not clips:
+            return None
+        if len(clips) == 1:
+            return clips[0]
+        mixed = np.zeros((max(len(c.samples) for c in clips), CHANNELS))
+        for clip in clips:
+            mixed[:len(clip.samples)] += clip.samples
+        peak = np.abs(mixed).max()
+        if peak > 32767:
+            mixed *= 32767 / peak
+        return _make_clip("+".join(c.name for c in clips), mixed.astype(np.int16))
+
+
+class NullBackend:
+    """Plays nothing"""
+
+    def play(self, clip: Clip):
+        pass
+
+
+class RecordingBackend:
+    """Remembers what would have been played; for dry runs and checks"""
+
+    def __init__(self):
+        self.played: List[str] = []
+
+    def play(self, clip: Clip):
+        self.played.append(clip.name)
+
+
+class BellBackend:
+    """Terminal bell, the scripts' old fallback on systems without audio"""
+
+    def play(self, clip: Clip):
+        print("\a", end='', flush=True)
+
+
+class WinsoundBackend:
+    """Plays from memory with winsound SND_MEMORY; no file is opened per alert"""
+
+    def __init__(self):
+        import winsound
+
+        self.winsound = winsound
+
+    def play(self, clip: Clip):
+        self.winsound.PlaySound(clip.wav, self.winsound.SND_MEMORY)
+
+
+class PipeBackend:
+    """
+    Streams raw PCM into one long-lived player process (aplay or paplay),
+    started on first use and restarted if it exits, instead of spawning a
+    process per alert. Writes queue up behind the clip already playing.
+    """
+
+    COMMANDS = {
+        'aplay': ['aplay', '-q', '-t', 'raw', '-f', 'S16_LE', '-c', str(CHANNELS), '-r', str(SAMPLE_RATE)],
+        'paplay': ['paplay', '--raw', '--format=s16le', f'--channels={CHANNELS}', f'--rate={SAMPLE_RATE}'],
+    }
+
+    def __init__(self, command: Sequence[str]):
+        self.command = list(command)
+        self._process: Optional[subprocess.Popen] = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def find(cls) -> Optional["PipeBackend"]:
+        for program, command in cls.COMMANDS.items():
+            if shutil.which(program):
+                return cls(command)
+        return None
+
+    def play(self, clip: Clip):
+        with self._lock:
+            if self._process is None or self._process.poll() is not None:
+                self._process = subprocess.Popen(self.command, stdin=subprocess.PIPE, stderr=subprocess.DEVNULL)
+            self._process.stdin.write(clip.samples.tobytes())
+            self._process.stdin.flush()
+
+    def close(self):
+        with self._lock:
+            if self._process is not None:
+                self._process.stdin.close()
+                self._process.wait()
+                self._process = None
+
+
+class AfplayBackend:
+    """
+    macOS afplay, which only plays files: every clip is written once to a
+    temporary .wav (the whole bank up front via prepare()) and replayed from
+    there, so nothing is decoded or written per alert.
+    """
+
+    def __init__(self):
+        self.directory = tempfile.mkdtemp(prefix='rsi-alerts-')
+        self._paths: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        atexit.register(self.close)  # Don't leave a temp directory behind per run
+
+    @classmethod
+    def find(cls) -> Optional["AfplayBackend"]:
+        if sys.platform == 'darwin' and shutil.which('afplay'):
+            return cls()
+        return None
+
+    def _path(self, clip: Clip) -> str:
+        with self._lock:
+            path = self._paths.get(clip.name)
+            if path is None:
+                path = os.path.join(self.directory, f"{len(self._paths)}.wav")
+                with open(path, 'wb') as f:
+                    f.write(clip.wav)
+                self._paths[clip.name] = path
+            return path
+
+    def prepare(self, bank: "SoundBank"):
+        for clip in bank.clips.values():
+            self._path(clip)
+
+    def play(self, clip: Clip):
+        subprocess.run(['afplay', self._path(clip)], stderr=subprocess.DEVNULL)
+
+    def close(self):
+        with self._lock:
+            shutil.rmtree(self.directory, ignore_errors=True)
+            self._paths.clear()
+
+
+class SounddeviceBackend:
+    """PortAudio output through the optional sounddevice package"""
+
+    def __init__(self):
+        import sounddevice
+
+        self.sounddevice = sounddevice
+
+    def play(self, clip: Clip):
+        self.sounddevice.play(clip.samples, SAMPLE_RATE, blocking=True)
+
+
+def default_backend():
+    """
+    winsound on Windows, afplay on macOS, else an aplay/paplay pipe, else
+    sounddevice, else the terminal bell
+    """
+    if os.name == 'nt':
+        return WinsoundBackend()
+    backend = AfplayBackend.find() or PipeBackend.find()
+    if backend is not None:
+        return backend
+    try:
+        return SounddeviceBackend()
+    except (ImportError, OSError):
+        return BellBackend()
+
+
+class SoundPlayer:
+    """Plays clips from a SoundBank through a backend; use play_alert as an AudioSink player"""
+
+    def __init__(self, bank: SoundBank, backend=None):
+        self.bank = bank
+        self.backend = backend if backend is not None else default_backend()
+        if hasattr(self.backend, 'prepare'):
+            self.backend.prepare(bank)
+
+    @classmethod
+    def from_files(cls, paths: Iterable[str], backend=None) -> "SoundPlayer":
+        return cls(SoundBank.from_files(paths), backend)
+
+    def play(self, *names: str, repeat: int = 1):
+        """Play `names` mixed together, `repeat` times; unknown names are skipped"""
+        clip = self.bank.mix(names)
+        if clip is None:
+            return
+        for _ in range(repeat):
+            self.backend.play(clip)
+
+    def play_alert(self, alert):
+        """AudioSink player: the clip named by the alert's sound, if any"""
+        if alert.sound:
+            self.play(alert.sound)
@@ -0,0 +1,254 @@
+import time
+from typing import Dict, Mapping, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from indicators import atr, calculate_rsi, moving_average
+from pivots import find_pivot_highs, find_pivot_lows
+
+# --- Strategy defaults (mirroring the live scripts) ---
+RSI_PERIOD = 14
+OVERBOUGHT_LEVEL = 70  # rsi_alert.py
+OVERSOLD_LEVEL = 30
+MA_LENGTH = 14  # rsi_ma.py
+MA_TYPE = 'SMA'
+ATR_LENGTH = 14
+TP_MULTIPLIER = 2.0
+SL_MULTIPLIER = 1.0
+lbL = 5  # new_logic.py
+lbR = 5
+rangeUpper = 60
+rangeLower = 5
+MAX_HOLDING_BARS = 1440  # Trades still open after this many bars are closed at market
+
+STRATEGIES = ('rsi_threshold', 'rsi_ma', 'divergence')
+
+_WALK_CELLS = 1 << 22  # Trade x bar cells examined per vectorized exit-walk step
+
+
+class Trades(NamedTuple):
+    entry_index: np.ndarray
+    direction: np.ndarray  # +1 long, -1 short
+    entry_price: np.ndarray
+    exit_index: np.ndarray
+    exit_price: np.ndarray
+    outcome: np.ndarray  # +1 take profit, -1 stop loss, 0 timed out / end of data
+
+
+def rsi_threshold_signals(close, rsi_period=RSI_PERIOD, overbought=OVERBOUGHT_LEVEL,
+                          oversold=OVERSOLD_LEVEL, rsi=None) -> Tuple[np.ndarray, np.ndarray]:
+    """rsi_alert.py rule: a bar entering oversold is a long, entering overbought a short"""
+    if rsi is None:
+        rsi = calculate_rsi(close, rsi_period)
+    prev = np.concatenate(([np.nan], rsi[:-1]))
+    longs = (rsi < oversold) & ~(prev < oversold)
+    shorts = (rsi > overbought) & ~(prev > overbought)
+    longs[:rsi_period] = shorts[:rsi_period] = False
+    return longs, shorts
+
+
+def rsi_ma_signals(close, rsi_period=RSI_PERIOD, ma_length=MA_LENGTH, ma_type=MA_TYPE,
+                   rsi=None) -> Tuple[np.ndarray, np.ndarray]:
+    """rsi_ma.py rule: RSI crossing above its moving average is a buy, below a sell"""
+    if rsi is None:
+        rsi = calculate_rsi(close, rsi_period)
+    ma = moving_average(rsi, ma_length, ma_type)
+    rsi_prev = np.concatenate(([np.nan], rsi[:-1]))
+    ma_prev = np.concatenate(([np.nan], ma[:-1]))
+    buys = (rsi_prev <= ma_prev) & (rsi > ma)
+    sells = (rsi_prev >= ma_prev) & (rsi < ma)
+    buys[:rsi_period] = sells[:rsi_period] = False
+    return buys, sells
+
+
+def _divergence_events(osc, price, osc_pivots, price_pivots, n, rule,
+                       lbR=lbR, rangeLower=rangeLower, rangeUpper=rangeUpper) -> np.ndarray:
+    """
+    Bars on which a newly confirmed pivot (osc or price) makes `rule` true for
+    the last two confirmed pivots of each series, like DivergenceDetector.
+    """
+    events = np.zeros(n, dtype=bool)
+    if len(osc_pivots) < 2 or len(price_pivots) < 2:
+        return events
+
+    osc_confirm = osc_pivots + lbR
+    price_confirm = price_pivots + lbR
+    bars = np.union1d(osc_confirm, price_confirm)
+    osc_count = np.searchsorted(osc_confirm, bars, side='right')
+    price_count = np.searchsorted(price_confirm, bars, side='right')
+    ok = (osc_count >= 2) & (price_count >= 2)
+    bars, osc_count, price_count = bars[ok], osc_count[ok], price_count[ok]
+
+    cur_osc, prev_osc = osc_pivots[osc_count - 1], osc_pivots[osc_count - 2]
+    cur_price, prev_price = price_pivots[price_count - 1], price_pivots[price_count - 2]
+    gap = cur_osc - prev_osc
+    hit = (gap >= rangeLower) & (gap <= rangeUpper)
+    hit &= rule(osc[cur_osc], osc[prev_osc], price[cur_price], price[prev_price])
+    events[bars[hit]] = True
+    return events
+
+
+def divergence_signals(high, low, close, rsi_period=RSI_PERIOD, rsi=None, lbL=lbL, lbR=lbR,
+                       rangeLower=rangeLower, rangeUpper=rangeUpper) -> Tuple[np.ndarray, np.ndarray]:
+    """new_logic.py rule: regular bullish divergence is a long, regular bearish a short"""
+    if rsi is None:
+        rsi = calculate_rsi(close, rsi_period)
+    n = len(close)
+    longs = _divergence_events(
+        rsi, low, find_pivot_lows(rsi, lbL, lbR), find_pivot_lows(low, lbL, lbR), n,
+        lambda osc_cur, osc_prev, px_cur, px_prev: (osc_cur > osc_prev) & (px_cur < px_prev),
+        lbR, rangeLower, rangeUpper,
+    )
+    shorts = _divergence_events(
+        rsi, high, find_pivot_highs(rsi, lbL, lbR), find_pivot_highs(high, lbL, lbR), n,
+        lambda osc_cur, osc_prev, px_cur, px_prev: (osc_cur < osc_prev) & (px_cur > px_prev),
+        lbR, rangeLower, rangeUpper,
+    )
+    return longs, shorts
+
+
+def resolve_exits(high, low, close, longs, shorts, atr_values,
+                  tp_multiplier=TP_MULTIPLIER, sl_multiplier=SL_MULTIPLIER,
+                  max_holding_bars=MAX_HOLDING_BARS) -> Trades:
+    """
+    Walk every entry forward to its ATR take-profit or stop-loss (calculate_tp_sl).
+
+    Entries are at the signal bar's close. All open trades are checked
+    together against a window of following bars; trades still open move on to
+    the next window, which doubles in size, so most trades resolve in the first
+    small pass. A bar touching both levels counts as a stop loss.
+    """
+    high = np.asarray(high, dtype=np.float64)
+    low = np.asarray(low, dtype=np.float64)
+    close = np.asarray(close, dtype=np.float64)
+    n = len(close)
+
+    entry_index = np.flatnonzero((longs | shorts) & ~np.isnan(atr_values))
+    direction = np.where(longs[entry_index], 1, -1).astype(np.int8)
+    entry_price = close[entry_index]
+    tp = entry_price + direction * atr_values[entry_index] * tp_multiplier
+    sl = entry_price - direction * atr_values[entry_index] * sl_multiplier
+
+    # Defaults for trades that never hit a level: close at market on the last bar
+    last_bar = np.minimum(n - 1, entry_index + max_holding_bars)
+    exit_index = last_bar.copy()
+    exit_price = close[last_bar]
+    outcome = np.zeros(len(entry_index), dtype=np.int8)
+
+    start = entry_index + 1
+    pending = np.flatnonzero(start <= last_bar)
+    size = 16
+    while pending.size:
+        still_open = []
+        for chunk in np.array_split(pending, -(-pending.size * size // _WALK_CELLS)):
+            bars = start[chunk, None] + np.arange(size)
+            in_window = bars <= last_bar[chunk, None]
+            bars = np.minimum(bars, n - 1)
+            is_long = direction[chunk, None] > 0
+            seg_high, seg_low = high[bars], low[bars]
+            sl_hit = np.where(is_long, seg_low <= sl[chunk, None], seg_high >= sl[chunk, None]) & in_window
+            tp_hit = np.where(is_long, seg_high >= tp[chunk, None], seg_low <= tp[chunk, None]) & in_window
+
+            hit = sl_hit | tp_hit
+            found = hit.any(axis=1)
+            first = hit.argmax(axis=1)[found]
+            rows = chunk[found]
+            stopped = sl_hit[found, first]
+            exit_index[rows] = start[rows] + first
+            exit_price[rows] = np.where(stopped, sl[rows], tp[rows])
+            outcome[rows] = np.where(stopped, -1, 1)
+
+            left = chunk[~found]
+            still_open.append(left[start[left] + size <= last_bar[left]])
+        pending = np.concatenate(still_open)
+        start[pending] += size
+        size *= 2
+
+    return Trades(entry_index, direction, entry_price, exit_index, exit_price, outcome)
+
+
+def summarize(trades: Trades) -> Dict[str, float]:
+    """Hit rate and PnL (fractional returns, no fees) for a set of trades"""
+    returns = trades.direction * (trades.exit_price - trades.entry_price) / trades.entry_price
+    wins = returns[returns > 0].sum()
+    losses = -returns[returns < 0].sum()
+    count = len(returns)
+    return {
+        'trades': count,
+        'take_profits': int((trades.outcome == 1).sum()),
+        'stop_losses': int((trades.outcome == -1).sum()),
+        'timed_out': int((trades.outcome == 0).sum()),
+        'hit_rate': float((trades.outcome == 1).sum() / count) if count else 0.0,
+        'total_return': float(returns.sum()),
+        'avg_return': float(returns.mean()) if count else 0.0,
+        'profit_factor': float(wins / losses) if losses else float('inf'),
+    }
+
+
+def run_backtest(candles, strategy: str, rsi: Optional[np.ndarray] = None, **params) -> Dict[str, float]:
+    """
+    Backtest one strategy over an (n x 6) ccxt-style OHLCV array, or over
+    named columns such as CandleStore.read()'s memory maps, which are used in
+    place. `rsi` can be passed in to reuse an already computed series.
+    """
+    if isinstance(candles, Mapping):
+        high, low, close = (np.asarray(candles[name], dtype=np.float64) for name in ('high', 'low', 'close'))
+    else:
+        candles = np.asarray(candles, dtype=np.float64)
+        high, low, close = candles[:, 2], candles[:, 3], candles[:, 4]
+    rsi_period = params.get('rsi_period', RSI_PERIOD)
+
+    if strategy == 'rsi_threshold':
+        longs, shorts = rsi_threshold_signals(
+            close, rsi_period, params.get('overbought', OVERBOUGHT_LEVEL),
+            params.get('oversold', OVERSOLD_LEVEL), rsi,
+        )
+    elif strategy == 'rsi_ma':
+        longs, shorts = rsi_ma_signals(
+            close, rsi_period, params.get('ma_length', MA_LENGTH), params.get('ma_type', MA_TYPE), rsi,
+        )
+    elif strategy == 'divergence':
+        longs, shorts = divergence_signals(
+            high, low, close, rsi_period, rsi, params.get('lbL', lbL), params.get('lbR', lbR),
+            params.get('rangeLower', rangeLower), params.get('rangeUpper', rangeUpper),
+        )
+    else:
+        raise ValueError(f"Unknown strategy: {strategy}")
+
+    atr_values = params.get('atr_values')
+    if atr_values is None:
+        atr_values = atr(high, low, close, params.get('atr_length', ATR_LENGTH))
+    trades = resolve_exits(
+        high, low, close, longs, shorts, atr_values,
+        params.get('tp_multiplier', TP_MULTIPLIER), params.get('sl_multiplier', SL_MULTIPLIER),
+        params.get('max_holding_bars', MAX_HOLDING_BARS),
+    )
+    return summarize(trades)
+
+
+def main():
+    from candle_store import CandleStore
+
+    store = CandleStore()
+    candles = store.read('XRP/USDT', '1m')  # Memory-mapped, not loaded
+    bars = len(candles['close'])
+    source = 'stored'
+    if bars == 0:
+        # Nothing backfilled yet (see candle_store.py); fall back to synthetic bars
+        from fake_exchange import FakeExchange
+
+        candles = FakeExchange().ohlcv_array('XRP/USDT', '1m', limit=1_000_000)
+        bars = len(candles)
+        source = 'synthetic'
+    print(f"--- Backtesting {bars} {source} 1m bars ---")
+    for strategy in STRATEGIES:
+        started = time.perf_counter()
+        result = run_backtest(candles, strategy)
+        elapsed = time.perf_counter() - started
+        print(f"{strategy:<14} {bars / elapsed / 1e6:6.2f}M bars/s | "
+              f"trades: {result['trades']}, hit rate: {result['hit_rate']:.1%}, "
+              f"PnL: {result['total_return']:+.2%}, PF: {result['profit_factor']:.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,359 @@
+import argparse
+import importlib.util
+import json
+import os
+import platform
+import statistics
+import subprocess
+import time
+import tracemalloc
+from datetime import datetime
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from backtest import divergence_signals
+from divergence import DivergenceDetector, detect_divergences
+from fake_exchange import FakeExchange
+from indicators import RSIState, atr, calculate_rsi, calculate_rsi_batch, ema, sma, wma
+from ohlcv import COLUMNS, OHLCV, CandleBuffer
+from pivots import find_pivot_highs, find_pivot_lows
+
+DEFAULT_OUTPUT = 'data/bench/latest.json'
+TIMEFRAME = '1m'
+SAMPLE_SECONDS = 0.05  # Each timing sample loops the benchmark for at least this long
+REPEATS = 5
+THRESHOLD = 0.10  # Relative change reported as a regression / improvement
+STREAM_MAX_CELLS = 1_000_000  # Bar-by-bar Python benchmarks skip larger datasets
+
+# (bars, symbols) datasets; --full adds the large ones
+QUICK_CASES = [(200, 1), (10_000, 1), (1_000_000, 1), (200, 100), (10_000, 100)]
+FULL_CASES = QUICK_CASES + [(10_000_000, 1), (200, 1000), (10_000, 1000)]
+QUICK_SCAN_SYMBOLS = [1, 100]
+FULL_SCAN_SYMBOLS = QUICK_SCAN_SYMBOLS + [1000]
+
+# Indicator settings of the live scripts
+RSI_PERIOD = 14
+MA_LENGTH = 14
+ATR_LENGTH = 14
+lbL, lbR, rangeLower, rangeUpper = 5, 5, 5, 60
+
+
+class Dataset(NamedTuple):
+    source: str  # 'synthetic' or 'recorded'
+    columns: np.ndarray  # (6, symbols, bars): timestamp, open, high, low, close, volume
+
+    @property
+    def symbols(self) -> int:
+        return self.columns.shape[1]
+
+    @property
+    def bars(self) -> int:
+        return self.columns.shape[2]
+
+    @property
+    def label(self) -> str:
+        return f"{self.source},bars={self.bars},symbols={self.symbols}"
+
+
+def synthetic_dataset(bars: int, symbols: int, chunk: int = 1_000_000) -> Dataset:
+    """FakeExchange candles for `symbols` symbols, generated in chunks to bound memory"""
+    exchange = FakeExchange()
+    step = exchange.parse_timeframe(TIMEFRAME) * 1000
+    start = exchange.milliseconds() // step * step - bars * step
+    columns = np.empty((6, symbols, bars))
+    for s in range(symbols):
+        for offset in range(0, bars, chunk):
+            size = min(chunk, bars - offset)
+            candles = exchange.ohlcv_array(f"SYM{s}/USDT", TIMEFRAME, since=start + offset * step, limit=size)
+            columns[:, s, offset:offset + size] = candles.T
+    return Dataset('synthetic', columns)
+
+
+def recorded_dataset(bars: int, symbols: int, exchange_id: str = 'mexc') -> Optional[Dataset]:
+    """The last `bars` stored 1m candles of the first `symbols` symbols in the candle store, if there are enough"""
+    from candle_store import CandleStore
+
+    store = CandleStore(exchange_id=exchange_id)
+    names = [symbol for symbol, timeframe in store.keys() if timeframe == TIMEFRAME][:symbols]
+    if len(names) < symbols or any(store.count(name, TIMEFRAME) < bars for name in names):
+        return None
+    columns = np.empty((6, symbols, bars))
+    for s, name in enumerate(names):
+        stored = store.read(name, TIMEFRAME)  # Memory-mapped; only the tail is copied
+        for position, column in enumerate(stored.values()):
+            columns[position, s] = column[-bars:]
+    return Dataset('recorded', columns)
+
+
+def _per_symbol(func: Callable[[int], object], symbols: int) -> Callable[[], None]:
+    def run():
+        for s in range(symbols):
+            func(s)
+    return run
+
+
+def _rsi_stream(close: np.ndarray) -> Callable[[], None]:
+    def run():
+        for row in close:
+            state = RSIState(RSI_PERIOD)
+            for value in row:
+                state.update(value)
+    return run
+
+
+def _divergence_stream(rsi: np.ndarray, low: np.ndarray, high: np.ndarray) -> Callable[[], None]:
+    def run():
+        for s in range(len(rsi)):
+            detector = DivergenceDetector(lbL, lbR, rangeLower, rangeUpper)
+            for osc, lo, hi in zip(rsi[s], low[s], high[s]):
+                detector.update(osc, lo, hi)
+    return run
+
+
+def indicator_benchmarks(data: Dataset) -> Dict[str, Callable[[], object]]:
+    """Benchmark name -> zero-argument callable over `data`"""
+    _, _, high, low, close, _ = data.columns
+    rsi = calculate_rsi_batch(close, RSI_PERIOD)
+    benchmarks = {
+        'rsi_batch': lambda: calculate_rsi_batch(close, RSI_PERIOD),
+        'sma': _per_symbol(lambda s: sma(rsi[s], MA_LENGTH), data.symbols),
+        'ema': _per_symbol(lambda s: ema(rsi[s], MA_LENGTH), data.symbols),
+        'wma': _per_symbol(lambda s: wma(rsi[s], MA_LENGTH), data.symbols),
+        'atr': _per_symbol(lambda s: atr(high[s], low[s], close[s], ATR_LENGTH), data.symbols),
+        'atr_wilder': _per_symbol(lambda s: atr(high[s], low[s], close[s], ATR_LENGTH, 'wilder'), data.symbols),
+        'pivots': _per_symbol(lambda s: (find_pivot_highs(high[s], lbL, lbR), find_pivot_lows(low[s], lbL, lbR)),
+                              data.symbols),
+        'detect_divergences': _per_symbol(
+            lambda s: detect_divergences(rsi[s], low[s], high[s], lbL, lbR, rangeLower, rangeUpper), data.symbols),
+        'divergence_signals': _per_symbol(
+            lambda s: divergence_signals(high[s], low[s], close[s], rsi=rsi[s]), data.symbols),
+    }
+    if data.bars * data.symbols <= STREAM_MAX_CELLS:
+        benchmarks['rsi_stream'] = _rsi_stream(close)
+        benchmarks['divergence_stream'] = _divergence_stream(rsi, low, high)
+    return benchmarks
+
+
+def scan_cycle_benchmark(symbols: int, resample: bool = True) -> Callable[[], object]:
+    """
+    The unified scanner over `symbols` FakeExchange symbols. Every call steps
+    the exchange clock minute by minute through one bar of the longest
+    timeframe and runs the jobs due, so each call does the same work.
+    """
+    import scanner
+    from scheduler import BarScheduler
+    from timeframes import timeframe_ms
+
+    names = [f"SYM{s}/USDT" for s in range(symbols)]
+    exchange = FakeExchange(names, now_ms=int(time.time()) // 60 * 60_000 + 2000)
+    strategies = [scanner.create_strategy(name, **params) for name, params in scanner.STRATEGIES]
+    scan = scanner.Scanner(exchange, strategies, names, on_signal=lambda signal: None, resample=resample)
+    scheduler = BarScheduler()
+    timeframes = [scan.feed.base] if scan.feed is not None else scan.timeframes
+    for timeframe in timeframes:
+        scheduler.add(timeframe, names, scan.scan)
+    scan.scan({timeframe: names for timeframe in timeframes})  # Warm-up fetch, not timed
+
+    minutes = timeframe_ms(scan.timeframes[-1]) // 60_000
+
+    def cycle():
+        for _ in range(minutes):
+            exchange.now_ms += 60_000
+            scheduler.run_due((exchange.now_ms - 2000) / 1000)
+    return cycle
+
+
+def _rsi_ma_pandas(rows, rsi_period, ma_length, atr_length):
+    """The old rsi_ma.py cycle: DataFrame per tick, pandas RSI/SMA and a temporary TR frame"""
+    import pandas as pd
+
+    df = pd.DataFrame(rows, columns=list(COLUMNS))
+    deltas = np.diff(df['close'])
+    seed = deltas[:rsi_period + 1]
+    up = seed[seed >= 0].sum() / rsi_period
+    down = -seed[seed < 0].sum() / rsi_period
+    rsi = np.zeros(len(df))
+    rsi[:rsi_period] = 100. - 100. / (1. + up / down)
+    for i in range(rsi_period, len(df)):
+        delta = deltas[i - 1]
+        up = (up * (rsi_period - 1) + max(delta, 0.)) / rsi_period
+        down = (down * (rsi_period - 1) + max(-delta, 0.)) / rsi_period
+        rsi[i] = 100. - 100. / (1. + up / down)
+    rsi = pd.Series(rsi, index=df.index)
+    ma = rsi.rolling(window=ma_length).mean()
+    tr = pd.DataFrame()
+    tr['h-l'] = df['high'] - df['low']
+    tr['h-pc'] = abs(df['high'] - df['close'].shift(1))
+    tr['l-pc'] = abs(df['low'] - df['close'].shift(1))
+    atr_series = tr[['h-l', 'h-pc', 'l-pc']].max(axis=1).rolling(window=atr_length).mean()
+    return rsi.iloc[-1], ma.iloc[-1], atr_series.iloc[-1]
+
+
+def _rsi_ma_arrays(candles: OHLCV, rsi_period, ma_length, atr_length):
+    rsi = calculate_rsi(candles.close, rsi_period)
+    ma = sma(rsi, ma_length)
+    atr_series = atr(candles.high, candles.low, candles.close, atr_length)
+    return rsi[-1], ma[-1], atr_series[-1]
+
+
+def rsi_ma_cycle_benchmarks() -> Dict[str, Callable[[], object]]:
+    """The rsi_ma.py indicator step per poll: pandas DataFrame (old) vs column arrays"""
+    limit = max(RSI_PERIOD, MA_LENGTH, ATR_LENGTH) * 2 + 10
+    rows = FakeExchange().fetch_ohlcv('XRP/USDT', '5m', limit=limit)
+    buffer = CandleBuffer(1000)
+    buffer.merge(rows)
+
+    benchmarks = {}
+    if importlib.util.find_spec('pandas'):
+        benchmarks['dataframe'] = lambda: _rsi_ma_pandas(rows, RSI_PERIOD, MA_LENGTH, ATR_LENGTH)
+    else:
+        print("(pandas not installed; skipping the DataFrame baseline of rsi_ma_cycle)")
+    benchmarks['rows_to_arrays'] = lambda: _rsi_ma_arrays(OHLCV.from_rows(rows), RSI_PERIOD, MA_LENGTH, ATR_LENGTH)
+    benchmarks['candle_buffer'] = lambda: (buffer.merge(rows[-2:]),
+                                           _rsi_ma_arrays(buffer.view(limit), RSI_PERIOD, MA_LENGTH, ATR_LENGTH))
+    return benchmarks
+
+
+def peak_allocation(func: Callable[[], object]) -> int:
+    """Peak bytes allocated by one (already warmed-up) call"""
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def measure(func: Callable[[], object], repeats: int = REPEATS) -> Dict[str, float]:
+    """Seconds per call: each sample loops func for at least SAMPLE_SECONDS"""
+    started = time.perf_counter()
+    func()  # Warm-up, also sizes the inner loop
+    first = time.perf_counter() - started
+    number = max(1, int(SAMPLE_SECONDS / max(first, 1e-9)))
+    repeats = repeats if first < 1.0 else max(1, repeats // 2)
+    samples = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        for _ in range(number):
+            func()
+        samples.append((time.perf_counter() - started) / number)
+    return {'min': min(samples), 'median': statistics.median(samples), 'number': number, 'repeats': repeats}
+
+
+def _environment() -> Dict[str, str]:
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True).stdout.strip()
+    except OSError:
+        commit = ''
+    return {
+        'created': datetime.now().isoformat(timespec='seconds'), 'commit': commit,
+        'python': platform.python_version(), 'numpy': np.__version__,
+        'machine': platform.machine(), 'processor': platform.processor() or platform.machine(),
+    }
+
+
+def run_suite(cases: List[Tuple[int, int]], scan_symbols: List[int], recorded: Optional[str] = None,
+              only: Optional[List[str]] = None) -> Dict[str, Dict[str, float]]:
+    """
+    Time every benchmark on every case; results keyed 'name[dataset]'.
+    `recorded` names the exchange whose stored candles are benchmarked as well.
+    """
+    results = {}
+
+    def record(key: str, func: Callable[[], object], items: int):
+        """items: bars x symbols for indicator benchmarks, symbols for the scan, 1 per rsi_ma cycle"""
+        result = measure(func)
+        result['items_per_second'] = items / result['min']
+        results[key] = result
+        print(f"{key:<62} {_format_seconds(result['min']):>10} {result['items_per_second']:>14,.0f}/s", flush=True)
+
+    for bars, symbols in cases:
+        datasets = [synthetic_dataset(bars, symbols)]
+        if recorded:
+            stored = recorded_dataset(bars, symbols, recorded)
+            if stored is None:
+                print(f"(no recorded dataset with {symbols} x {bars} bars; run candle_store.py backfill)")
+            else:
+                datasets.append(stored)
+        for data in datasets:
+            for name, func in indicator_benchmarks(data).items():
+                if only is None or name in only:
+                    record(f"{name}[{data.label}]", func, data.bars * data.symbols)
+
+    if only is None or 'rsi_ma_cycle' in only:
+        for mode, func in rsi_ma_cycle_benchmarks().items():
+            key = f"rsi_ma_cycle[{mode}]"
+            record(key, func, 1)
+            results[key]['peak_bytes'] = peak_allocation(func)
+            print(f"{'':<62} peak {results[key]['peak_bytes'] / 1024:.1f} KiB allocated per cycle")
+
+    if only is None or 'scan_cycle' in only:
+        for symbols in scan_symbols:
+            for resample in (True, False):
+                mode = 'resampled' if resample else 'polled'
+                record(f"scan_cycle[{mode},symbols={symbols}]", scan_cycle_benchmark(symbols, resample), symbols)
+    return results
+
+
+def _format_seconds(seconds: float) -> str:
+    for unit, scale in (('s', 1), ('ms', 1e-3), ('us', 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:.2f} {unit}"
+    return f"{seconds / 1e-9:.0f} ns"
+
+
+def save_results(path: str, results: Dict[str, Dict[str, float]]):
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump({'environment': _environment(), 'results': results}, f, indent=1, sort_keys=True)
+
+
+def compare(results: Dict[str, Dict[str, float]], baseline_path: str, threshold: float = THRESHOLD) -> int:
+    """Print current vs baseline timings; returns how many benchmarks regressed"""
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    print(f"\n--- Compared with {baseline_path} (commit {baseline['environment'].get('commit') or '?'}) ---")
+    regressions = 0
+    for key, result in sorted(results.items()):
+        before = baseline['results'].get(key)
+        if before is None:
+            print(f"{key:<62} {'(new)':>10}")
+            continue
+        ratio = result['min'] / before['min']
+        flag = ''
+        if ratio > 1 + threshold:
+            flag, regressions = 'SLOWER', regressions + 1
+        elif ratio < 1 - threshold:
+            flag = 'faster'
+        print(f"{key:<62} {_format_seconds(before['min']):>10} -> {_format_seconds(result['min']):>10} "
+              f"x{ratio:5.2f} {flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks for the indicator, pivot, divergence, rsi_ma and scan hot paths")
+    parser.add_argument('--full', action='store_true', help="Add the 10M-bar and 1000-symbol cases")
+    parser.add_argument('--recorded', nargs='?', const='mexc', metavar='EXCHANGE',
+                        help="Also run on candles from the local candle store (default exchange: mexc)")
+    parser.add_argument('--only', help="Comma-separated benchmark names, e.g. rsi_batch,pivots,rsi_ma_cycle,scan_cycle")
+    parser.add_argument('--save', default=DEFAULT_OUTPUT, help="Where to write the results (JSON)")
+    parser.add_argument('--compare', help="Earlier results file to compare against")
+    parser.add_argument('--threshold', type=float, default=THRESHOLD, help="Relative change that counts")
+    args = parser.parse_args()
+
+    cases = FULL_CASES if args.full else QUICK_CASES
+    scan_symbols = FULL_SCAN_SYMBOLS if args.full else QUICK_SCAN_SYMBOLS
+    only = args.only.split(',') if args.only else None
+    print(f"{'benchmark[dataset]':<62} {'best':>10} {'bars or symbols/s':>16}")
+    results = run_suite(cases, scan_symbols, args.recorded, only)
+    save_results(args.save, results)
+    print(f"\nResults saved to {args.save}")
+    if args.compare:
+        regressions = compare(results, args.compare, args.threshold)
+        if regressions:
+            raise SystemExit(f"{regressions} benchmark(s) slower than the baseline")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+import threading
+from typing import Dict, List, Set, Tuple
+
+from ohlcv import OHLCV, CandleBuffer
+from timeframes import bar_open_ms, timeframe_ms
+
+DEFAULT_MAX_CANDLES = 1000
+
+
+class CandleCache:
+    """
+    Shared OHLCV cache keeping one CandleBuffer per (symbol, timeframe).
+
+    After the first full fetch, each get() only asks the exchange for candles
+    since the last stored timestamp; that response starts with the stored,
+    possibly still-open candle, which is replaced, followed by any newer ones.
+    If the response does not line up with the buffer the key is refilled.
+    A response that stops short of the current bar (the exchange caps each
+    page, so a long outage takes several) is followed by further since-fetches
+    until the buffer reaches it; a gap longer than the buffer is refilled.
+
+    A refill that comes back shorter than asked (short listing history, the
+    exchange's page cap, or `limit` above max_candles) marks the key as
+    holding all the exchange will give, so later calls update it
+    incrementally instead of refilling again for the same shortfall.
+    """
+
+    def __init__(self, exchange, max_candles: int = DEFAULT_MAX_CANDLES):
+        self.exchange = exchange
+        self.max_candles = max_candles
+        self._candles: Dict[Tuple[str, str], CandleBuffer] = {}
+        self._exhausted: Set[Tuple[str, str]] = set()  # Keys whose last refill got everything available
+        self._lock = threading.Lock()
+
+    def get(self, symbol: str, timeframe: str, limit: int) -> List[list]:
+        """Latest `limit` candles for the key, oldest first, last one still forming"""
+        return self.get_ohlcv(symbol, timeframe, limit).to_rows()
+
+    def get_ohlcv(self, symbol: str, timeframe: str, limit: int) -> OHLCV:
+        """Like get(), as column arrays that the indicator kernels take directly"""
+        key = (symbol, timeframe)
+        with self._lock:
+            buffer = self._candles.get(key)
+            exhausted = key in self._exhausted
+
+        if buffer is None or (len(buffer) < limit and not exhausted):
+            buffer = self._refill(key, limit)
+        else:
+            buffer = self._update(key, buffer)
+        return buffer.view(limit)
+
+    def _refill(self, key: Tuple[str, str], limit: int) -> CandleBuffer:
+        """Replace the buffer with a full fetch of the newest candles"""
+        symbol, timeframe = key
+        ohlcv = self.exchange.fetch_ohlcv(symbol, timeframe, limit=min(limit, self.max_candles))
+        buffer = CandleBuffer(max(limit, self.max_candles))
+        buffer.merge(ohlcv)
+        with self._lock:
+            self._candles[key] = buffer
+            if len(ohlcv) < limit:
+                self._exhausted.add(key)
+            else:
+                self._exhausted.discard(key)
+        return buffer
+
+    def _update(self, key: Tuple[str, str], buffer: CandleBuffer) -> CandleBuffer:
+        """Fetch only the candles since the last stored one and merge them in"""
+        symbol, timeframe = key
+        since = buffer.last_timestamp
+        current_open = bar_open_ms(self.exchange.milliseconds(), timeframe)
+        if (current_open - since) // timeframe_ms(timeframe) >= len(buffer):
+            return self._refill_gap(key, buffer)  # Nothing in the buffer would survive the catch-up
+
+        while True:
+            ohlcv = self.exchange.fetch_ohlcv(symbol, timeframe, since=since)
+            if not ohlcv:
+                return buffer
+            if ohlcv[0][0] != since:
+                return self._refill_gap(key, buffer)
+            buffer.merge(ohlcv)
+            if len(ohlcv) == 1 or ohlcv[-1][0] >= current_open:
+                return buffer  # Caught up, or the exchange has nothing newer yet
+            since = ohlcv[-1][0]  # Page cap hit: the page ended on a candle that closed long ago
+
+    def _refill_gap(self, key: Tuple[str, str], buffer: CandleBuffer) -> CandleBuffer:
+        """Gap or reshuffled history: start over from a full window of the same size"""
+        with self._lock:
+            exhausted = key in self._exhausted
+        buffer = self._refill(key, len(buffer))
+        if exhausted:
+            with self._lock:
+                self._exhausted.add(key)  # Refilled to the old size, which was already all there is
+        return buffer
+
+    def invalidate(self, symbol: str, timeframe: str):
+        """Drop the cached candles so the next get() refills them"""
+        with self._lock:
+            self._candles.pop((symbol, timeframe), None)
+            self._exhausted.discard((symbol, timeframe))
@@ -0,0 +1,205 @@
+import argparse
+import os
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from exchange_client import create_client
+from indicators import RSIState
+from timeframes import timeframe_ms
+
+DEFAULT_ROOT = os.path.join('data', 'candles')
+PAGE_LIMIT = 1000  # Candles per fetch_ohlcv page during backfill
+
+# One fixed-width little-endian file per column
+COLUMNS = (
+    ('timestamp', '<i8'),
+    ('open', '<f8'),
+    ('high', '<f8'),
+    ('low', '<f8'),
+    ('close', '<f8'),
+    ('volume', '<f8'),
+)
+
+
+class CandleStore:
+    """
+    On-disk OHLCV history, one directory per exchange/symbol/timeframe.
+
+    Each column is a raw fixed-width file that only ever grows, so appending
+    closed candles is a plain file append and reading is a memory map: a
+    backtest can walk months of 1m bars without loading them into RAM.
+    """
+
+    def __init__(self, root: str = DEFAULT_ROOT, exchange_id: str = 'mexc'):
+        self.root = root
+        self.exchange_id = exchange_id
+
+    def path(self, symbol: str, timeframe: str) -> str:
+        safe_symbol = symbol.replace('/', '-').replace(':', '_')
+        return os.path.join(self.root, self.exchange_id, safe_symbol, timeframe)
+
+    def keys(self):
+        """(safe symbol, timeframe) pairs present on disk"""
+        base = os.path.join(self.root, self.exchange_id)
+        if not os.path.isdir(base):
+            return
+        for symbol in sorted(os.listdir(base)):
+            for timeframe in sorted(os.listdir(os.path.join(base, symbol))):
+                yield symbol, timeframe
+
+    def count(self, symbol: str, timeframe: str) -> int:
+        """Number of complete rows; a torn append is cut to the shortest column"""
+        directory = self.path(symbol, timeframe)
+        sizes = []
+        for name, dtype in COLUMNS:
+            file_path = os.path.join(directory, f"{name}.bin")
+            if not os.path.exists(file_path):
+                return 0
+            sizes.append(os.path.getsize(file_path) // np.dtype(dtype).itemsize)
+        return min(sizes)
+
+    def read(self, symbol: str, timeframe: str, start: Optional[int] = None,
+             end: Optional[int] = None) -> Dict[str, np.ndarray]:
+        """
+        Memory-mapped columns, optionally limited to start <= timestamp < end (ms).
+        Each is its own np.memmap whose filename, offset and shape describe
+        exactly the rows returned, so another process can map the same range.
+        """
+        rows = self.count(symbol, timeframe)
+        if rows == 0:
+            return {name: np.empty(0, dtype=dtype) for name, dtype in COLUMNS}
+
+        directory = self.path(symbol, timeframe)
+        timestamps = np.memmap(os.path.join(directory, 'timestamp.bin'), dtype='<i8', mode='r', shape=(rows,))
+        lo = 0 if start is None else int(np.searchsorted(timestamps, start, side='left'))
+        hi = rows if end is None else int(np.searchsorted(timestamps, end, side='left'))
+        if hi <= lo:
+            return {name: np.empty(0, dtype=dtype) for name, dtype in COLUMNS}
+        return {
+            name: np.memmap(os.path.join(directory, f"{name}.bin"), dtype=dtype, mode='r',
+                            offset=lo * np.dtype(dtype).itemsize, shape=(hi - lo,))
+            for name, dtype in COLUMNS
+        }
+
+    def read_array(self, symbol: str, timeframe: str, start: Optional[int] = None,
+                   end: Optional[int] = None) -> np.ndarray:
+        """ccxt-style (n x 6) float array; this one is loaded into memory"""
+        columns = self.read(symbol, timeframe, start, end)
+        return np.column_stack([np.asarray(columns[name], dtype=np.float64) for name, _ in COLUMNS])
+
+    def last_timestamp(self, symbol: str, timeframe: str) -> Optional[int]:
+        rows = self.count(symbol, timeframe)
+        if rows == 0:
+            return None
+        return int(self.read(symbol, timeframe)['timestamp'][-1])
+
+    def append(self, symbol: str, timeframe: str, ohlcv: List[list]) -> int:
+        """Append closed candles newer than the stored ones; returns rows written"""
+        last = self.last_timestamp(symbol, timeframe)
+        rows = [candle for candle in ohlcv if last is None or candle[0] > last]
+        if not rows:
+            return 0
+
+        directory = self.path(symbol, timeframe)
+        os.makedirs(directory, exist_ok=True)
+        rows_written = self.count(symbol, timeframe)
+        data = np.asarray(rows, dtype=np.float64)
+        for position, (name, dtype) in enumerate(COLUMNS):
+            file_path = os.path.join(directory, f"{name}.bin")
+            if os.path.exists(file_path):
+                # Drop the tail of a column left longer by an interrupted append
+                itemsize = np.dtype(dtype).itemsize
+                if os.path.getsize(file_path) != rows_written * itemsize:
+                    with open(file_path, 'r+b') as f:
+                        f.truncate(rows_written * itemsize)
+            with open(file_path, 'ab') as f:
+                data[:, position].astype(dtype).tofile(f)
+        return len(rows)
+
+    def warm_rsi_state(self, symbol: str, timeframe: str, period: int = 14, bars: int = 1000) -> RSIState:
+        """RSIState replayed over the last `bars` stored closes"""
+        columns = self.read(symbol, timeframe)
+        closes = columns['close'][-bars:]
+        timestamps = columns['timestamp'][-bars:]
+        return RSIState.from_closes(closes, period, [int(ts) for ts in timestamps])
+
+
+def backfill(exchange, store: CandleStore, symbol: str, timeframe: str, since: int,
+             page_limit: int = PAGE_LIMIT) -> int:
+    """
+    Page fetch_ohlcv forward from `since` (or the last stored candle) until
+    the present, storing only closed candles. Returns candles written.
+
+    A page starting more than a page past the cursor means the exchange did
+    not honour `since`; it is not stored, since the series would get a hole.
+    """
+    step = timeframe_ms(timeframe)
+    last = store.last_timestamp(symbol, timeframe)
+    cursor = last + step if last is not None else since
+    stored = last is not None  # Before anything is stored, a late first page is just the listing date
+    written = 0
+
+    while True:
+        page = exchange.fetch_ohlcv(symbol, timeframe, since=cursor, limit=page_limit)
+        now = exchange.milliseconds()
+        closed = [candle for candle in page if candle[0] + step <= now]
+        if not closed or closed[-1][0] < cursor:
+            break  # Nothing at or after the cursor
+        if stored and closed[0][0] > cursor + page_limit * step:
+            print(f"\n{symbol} {timeframe}: exchange returned candles from "
+                  f"{datetime.fromtimestamp(closed[0][0] / 1000, tz=timezone.utc):%Y-%m-%d %H:%M} for a request from "
+                  f"{datetime.fromtimestamp(cursor / 1000, tz=timezone.utc):%Y-%m-%d %H:%M}; "
+                  f"stopping instead of storing a gap")
+            break
+        written += store.append(symbol, timeframe, closed)
+        stored = stored or written > 0
+        cursor = closed[-1][0] + step
+        print(f"{symbol} {timeframe}: stored up to "
+              f"{datetime.fromtimestamp(closed[-1][0] / 1000, tz=timezone.utc):%Y-%m-%d %H:%M} ({written} new)",
+              end='\r', flush=True)
+        if len(closed) < len(page):
+            break  # Reached the forming candle; a short page alone proves nothing, MEXC caps page sizes
+    print()
+    return written
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local columnar candle store")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    fill = subparsers.add_parser('backfill', help="Page history from the exchange into the store")
+    fill.add_argument('symbols', nargs='+')
+    fill.add_argument('--timeframe', default='1m')
+    fill.add_argument('--since', default='2024-01-01', help="UTC start date, YYYY-MM-DD")
+    fill.add_argument('--root', default=DEFAULT_ROOT)
+    fill.add_argument('--fake', action='store_true', help="Use the offline FakeExchange")
+
+    info = subparsers.add_parser('info', help="List stored series")
+    info.add_argument('--root', default=DEFAULT_ROOT)
+    info.add_argument('--exchange', default='mexc')
+
+    args = parser.parse_args()
+
+    if args.command == 'backfill':
+        if args.fake:
+            from fake_exchange import FakeExchange
+            exchange = FakeExchange(args.symbols)
+        else:
+            exchange = create_client('mexc', market_type='swap')
+        store = CandleStore(args.root, exchange.id)
+        since = int(datetime.strptime(args.since, '%Y-%m-%d').replace(tzinfo=timezone.utc).timestamp() * 1000)
+        for symbol in args.symbols:
+            started = time.time()
+            written = backfill(exchange, store, symbol, args.timeframe, since)
+            print(f"{symbol}: {written} candles in {time.time() - started:.1f}s")
+    else:
+        store = CandleStore(args.root, args.exchange)
+        for safe_symbol, timeframe in store.keys():
+            print(f"{safe_symbol:<20} {timeframe:<4} {store.count(safe_symbol, timeframe)} candles")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+from collections import deque
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+from pivots import find_pivot_highs, find_pivot_lows
+
+DIVERGENCE_TYPES = ("regular_bullish", "hidden_bullish", "regular_bearish", "hidden_bearish")
+BULLISH_TYPES = ("regular_bullish", "hidden_bullish")
+BEARISH_TYPES = ("regular_bearish", "hidden_bearish")
+
+# A pivot is stored as (bar index, value)
+Pivot = Tuple[int, float]
+
+
+def in_range(cond, current_index, rangeLower, rangeUpper):
+    """Check if condition is within bar range"""
+    bars = current_index - cond
+    return rangeLower <= bars <= rangeUpper
+
+
+def classify_divergences(rsi_pl: Sequence[Pivot], price_pl: Sequence[Pivot],
+                         rsi_ph: Sequence[Pivot], price_ph: Sequence[Pivot],
+                         rangeLower: int, rangeUpper: int,
+                         enabled: Iterable[str] = DIVERGENCE_TYPES) -> Dict[str, bool]:
+    """
+    Apply the PineScript divergence rules to the last two pivots of each series.
+    Only the types listed in `enabled` can come out True.
+    """
+    enabled = set(enabled)
+    results = {div_type: False for div_type in DIVERGENCE_TYPES}
+
+    if len(rsi_pl) >= 2 and len(price_pl) >= 2:
+        (prev_bar, prev_osc), (cur_bar, cur_osc) = rsi_pl[-2], rsi_pl[-1]
+        if in_range(prev_bar, cur_bar, rangeLower, rangeUpper):
+            prev_low, cur_low = price_pl[-2][1], price_pl[-1][1]
+            # Regular Bullish: Price Lower Low, RSI Higher Low
+            results["regular_bullish"] = cur_osc > prev_osc and cur_low < prev_low
+            # Hidden Bullish: Price Higher Low, RSI Lower Low
+            results["hidden_bullish"] = cur_osc < prev_osc and cur_low > prev_low
+
+    if len(rsi_ph) >= 2 and len(price_ph) >= 2:
+        (prev_bar, prev_osc), (cur_bar, cur_osc) = rsi_ph[-2], rsi_ph[-1]
+        if in_range(prev_bar, cur_bar, rangeLower, rangeUpper):
+            prev_high, cur_high = price_ph[-2][1], price_ph[-1][1]
+            # Regular Bearish: Price Higher High, RSI Lower High
+            results["regular_bearish"] = cur_osc < prev_osc and cur_high > prev_high
+            # Hidden Bearish: Price Lower High, RSI Higher High
+            results["hidden_bearish"] = cur_osc > prev_osc and cur_high < prev_high
+
+    for div_type in DIVERGENCE_TYPES:
+        results[div_type] = bool(results[div_type]) and div_type in enabled
+    return results
+
+
+def detect_divergences(osc, lows, highs, lbL, lbR, rangeLower, rangeUpper,
+                       enabled: Iterable[str] = DIVERGENCE_TYPES) -> Dict[str, bool]:
+    """Detect all types of divergences over a whole window based on PineScript logic"""
+    def last_two(indices, values):
+        return [(int(i), values[i]) for i in indices[-2:]]
+
+    return classify_divergences(
+        last_two(find_pivot_lows(osc, lbL, lbR), osc),
+        last_two(find_pivot_lows(lows, lbL, lbR), lows),
+        last_two(find_pivot_highs(osc, lbL, lbR), osc),
+        last_two(find_pivot_highs(highs, lbL, lbR), highs),
+        rangeLower, rangeUpper, enabled,
+    )
+
+
+class DivergenceDetector:
+    """
+    Streaming version of detect_divergences, fed one closed bar at a time.
+
+    Only the last lbL + lbR + 1 values of each series and the last two
+    confirmed pivots are kept. A pivot is confirmed lbR bars after it forms,
+    which is the only moment the divergence result can change, so the rules
+    are re-evaluated just then and every update costs constant time.
+    """
+
+    def __init__(self, lbL: int = 5, lbR: int = 5, rangeLower: int = 5, rangeUpper: int = 60,
+                 enabled: Iterable[str] = DIVERGENCE_TYPES):
+        self.lbL = lbL
+        self.lbR = lbR
+        self.rangeLower = rangeLower
+        self.rangeUpper = rangeUpper
+        self.enabled = tuple(enabled)
+
+        window = lbL + lbR + 1
+        self.osc = deque(maxlen=window)
+        self.lows = deque(maxlen=window)
+        self.highs = deque(maxlen=window)
+        self.bar_index = -1
+
+        self.rsi_pl: deque = deque(maxlen=2)
+        self.rsi_ph: deque = deque(maxlen=2)
+        self.price_pl: deque = deque(maxlen=2)
+        self.price_ph: deque = deque(maxlen=2)
+        self.state = {div_type: False for div_type in DIVERGENCE_TYPES}
+
+    def _confirm(self, values: deque, pivots: deque, extreme) -> bool:
+        """Record the centre bar as a pivot if it is the window's extreme"""
+        centre = values[self.lbL]
+        if centre == extreme(values):
+            pivots.append((self.bar_index - self.lbR, centre))
+            return True
+        return False
+
+    def update(self, osc: float, low: float, high: float) -> List[str]:
+        """Consume one closed bar and return the divergence types it confirmed"""
+        self.bar_index += 1
+        self.osc.append(osc)
+        self.lows.append(low)
+        self.highs.append(high)
+        if len(self.osc) < self.osc.maxlen:
+            return []
+
+        new_lows = self._confirm(self.osc, self.rsi_pl, min)
+        new_lows = self._confirm(self.lows, self.price_pl, min) or new_lows
+        new_highs = self._confirm(self.osc, self.rsi_ph, max)
+        new_highs = self._confirm(self.highs, self.price_ph, max) or new_highs
+        if not (new_lows or new_highs):
+            return []
+
+        self.state = classify_divergences(
+            self.rsi_pl, self.price_pl, self.rsi_ph, self.price_ph,
+            self.rangeLower, self.rangeUpper, self.enabled,
+        )
+        events = []
+        if new_lows:
+            events += [t for t in BULLISH_TYPES if self.state[t]]
+        if new_highs:
+            events += [t for t in BEARISH_TYPES if self.state[t]]
+        return events
@@ -0,0 +1,207 @@
+import argparse
+import math
+import re
+import threading
+import time
+from collections import defaultdict, deque
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+from rate_limit import rate_limited
+from resilience import AsyncResilientExchange, ResilientExchange
+
+DEFAULT_POOL_SIZE = 4  # Main loop, price refresh and divergence threads, plus one spare
+DEFAULT_TIMEOUT_MS = 10000
+POOLED_HOSTS = 4  # Per-host pools kept open (MEXC spot and contract APIs are separate hosts)
+LATENCY_WINDOW = 500  # Samples kept per endpoint for the percentiles
+
+# MEXC contract paths carry the market id ("/kline/XRP_USDT"); group those under one endpoint
+_MARKET_SEGMENT = re.compile(r'/[A-Z0-9]+_[A-Z0-9]+(?=/|$)')
+
+
+def endpoint_name(url: str) -> str:
+    """Host and path of a request URL, with the market id replaced so each API endpoint is one key"""
+    parts = urlsplit(url)
+    return parts.netloc + _MARKET_SEGMENT.sub('/{symbol}', parts.path)
+
+
+def _percentile(samples, q: float) -> float:
+    """Nearest-rank percentile: the smallest sample with at least q of all samples at or below it"""
+    ordered = sorted(samples)
+    rank = math.ceil(round(q * len(ordered), 9))  # Rounded so 0.95 * 100 is rank 95, not 96
+    return ordered[max(0, rank - 1)]
+
+
+class LatencyStats:
+    """
+    Wall-clock time of every HTTP request, from sending it to having read the
+    (decompressed) body, over the last LATENCY_WINDOW requests per endpoint.
+    Thread safe; one instance per client session.
+    """
+
+    def __init__(self, window: int = LATENCY_WINDOW):
+        self.window = window
+        self.requests = 0
+        self.errors = 0
+        self._samples: Dict[str, deque] = defaultdict(lambda: deque(maxlen=self.window))
+        self._lock = threading.Lock()
+        self.adapter = None  # Set by create_session, to count the connections it opened
+
+    def record(self, endpoint: str, seconds: float, ok: bool = True):
+        with self._lock:
+            self.requests += 1
+            self.errors += not ok
+            self._samples[endpoint].append(seconds)
+
+    def reset(self):
+        """Forget the samples and counts so far (connections opened are kept)"""
+        with self._lock:
+            self.requests = 0
+            self.errors = 0
+            self._samples.clear()
+
+    def connections(self) -> int:
+        """Connections opened so far; far below `requests` when keep-alive works"""
+        if self.adapter is None:
+            return 0
+        pools = self.adapter.poolmanager.pools
+        return sum(pools[key].num_connections for key in pools.keys())
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """count / p50 / p95 / p99 / max (seconds) per endpoint"""
+        with self._lock:
+            samples = {endpoint: list(values) for endpoint, values in self._samples.items() if values}
+        return {
+            endpoint: {
+                'count': len(values),
+                'p50': _percentile(values, 0.50),
+                'p95': _percentile(values, 0.95),
+                'p99': _percentile(values, 0.99),
+                'max': max(values),
+            }
+            for endpoint, values in samples.items()
+        }
+
+    def report(self) -> str:
+        """One line for the dashboards: overall p50/p95, requests and connections opened"""
+        with self._lock:
+            values = [seconds for samples in self._samples.values() for seconds in samples]
+        if not values:
+            return "API: no requests yet"
+        return (f"API p50 {_percentile(values, 0.50) * 1000:.0f}ms p95 {_percentile(values, 0.95) * 1000:.0f}ms | "
+                f"{self.requests} requests on {self.connections()} connections"
+                f"{f' | {self.errors} errors' if self.errors else ''}")
+
+
+def create_session(pool_size: int = DEFAULT_POOL_SIZE, stats: Optional[LatencyStats] = None):
+    """
+    requests.Session for a ccxt client: one keep-alive connection pool per
+    host with room for `pool_size` concurrent requests, gzip responses and
+    per-request timing into `stats`.
+
+    Reusing pooled connections skips the DNS lookup, TCP connect and TLS
+    handshake that a cold request pays. Retries are left to the caller so a
+    failing call is never repeated behind the rate limiter's back.
+    """
+    import requests
+    from requests.adapters import HTTPAdapter
+
+    class TimedSession(requests.Session):
+        def send(self, request, **kwargs):
+            started = time.perf_counter()
+            ok = False
+            try:
+                response = super().send(request, **kwargs)  # Reads the body unless streaming
+                ok = response.status_code < 400
+                return response
+            finally:
+                if stats is not None:
+                    stats.record(endpoint_name(request.url), time.perf_counter() - started, ok)
+
+    session = TimedSession()
+    adapter = HTTPAdapter(pool_connections=POOLED_HOSTS, pool_maxsize=pool_size, max_retries=0)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    session.headers.update({'Accept-Encoding': 'gzip, deflate', 'Connection': 'keep-alive'})
+    if stats is not None:
+        stats.adapter = adapter
+    return session
+
+
+def create_client(exchange_id: str = 'mexc', market_type: Optional[str] = None, pool_size: int = DEFAULT_POOL_SIZE,
+                  rate_limit: bool = True, resilient: bool = True, config: Optional[Dict] = None):
+    """
+    ccxt client on a pooled keep-alive session, behind the shared rate limiter
+    unless `rate_limit` is False, with retries, circuit breakers and hedged bar-close
+    candle fetches (resilience.py) unless `resilient` is False. Latency
+    metrics are on `client.http_stats`.
+
+    `pool_size` should cover the threads that call the client at the same
+    time; extra concurrent requests still work but open throwaway connections.
+    """
+    import ccxt
+    stats = LatencyStats()
+    # ccxt's own throttle stays off under the shared bucket, or every call would wait on both
+    settings = {'enableRateLimit': not rate_limit, 'timeout': DEFAULT_TIMEOUT_MS, **(config or {})}
+    settings['session'] = create_session(pool_size, stats)
+    if market_type is not None:
+        settings['options'] = {**settings.get('options', {}), 'defaultType': market_type}
+    exchange = getattr(ccxt, exchange_id)(settings)
+    exchange.http_stats = stats
+    if rate_limit:
+        exchange = rate_limited(exchange)
+    return ResilientExchange(exchange) if resilient else exchange
+
+
+def create_async_client(exchange_id: str = 'mexc', market_type: Optional[str] = None, rate_limit: bool = True,
+                        resilient: bool = True, config: Optional[Dict] = None):
+    """
+    ccxt.async_support client drawing from the same shared rate limiter and
+    with the same retry and circuit breaker rules as create_client(), so an
+    async scan and the synchronous monitors beside it share one request budget.
+    aiohttp keeps its own keep-alive connection pool.
+    """
+    import ccxt.async_support as ccxt_async
+    settings = {'enableRateLimit': not rate_limit, 'timeout': DEFAULT_TIMEOUT_MS, **(config or {})}
+    if market_type is not None:
+        settings['options'] = {**settings.get('options', {}), 'defaultType': market_type}
+    exchange = getattr(ccxt_async, exchange_id)(settings)
+    if rate_limit:
+        exchange = rate_limited(exchange)
+    return AsyncResilientExchange(exchange) if resilient else exchange
+
+
+def latency_report(exchange) -> str:
+    """LatencyStats.report() of a client from create_client(), empty for anything else"""
+    stats = getattr(exchange, 'http_stats', None)
+    if stats is None:
+        return ""
+    if isinstance(exchange, ResilientExchange):
+        return f"{stats.report()} | {exchange.resilience_report()}"
+    return stats.report()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare pooled keep-alive requests against a fresh connection each")
+    parser.add_argument('--exchange', default='mexc')
+    parser.add_argument('--type', default='swap', choices=('swap', 'spot'))
+    parser.add_argument('--symbol', default='XRP/USDT:USDT')
+    parser.add_argument('--requests', type=int, default=30)
+    args = parser.parse_args()
+
+    for label, pooled in (("fresh connection per request", False), ("pooled keep-alive session", True)):
+        client = create_client(args.exchange, args.type, rate_limit=False, resilient=False)
+        client.load_markets()
+        client.http_stats.reset()  # Only time the polls below
+        if not pooled:
+            client.session.headers['Connection'] = 'close'  # Server hangs up, so every poll reconnects
+        for _ in range(args.requests):
+            client.fetch_ticker(args.symbol)
+        print(f"{label}: {client.http_stats.report()}")
+        for endpoint, row in client.http_stats.summary().items():
+            print(f"  {endpoint}: " + ", ".join(
+                f"{key} {value * 1000:.0f}ms" if key != 'count' else f"{value:.0f} requests" for key, value in row.items()))
+
+
+if __name__ == "__main__":
+    main()
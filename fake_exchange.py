@@ -0,0 +1,161 @@
+import asyncio
+import time
+import zlib
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from timeframes import timeframe_seconds
+
+
+_MASK64 = (1 << 64) - 1
+_GOLDEN = 0x9E3779B97F4A7C15
+
+
+def _splitmix64(keys: np.ndarray) -> np.ndarray:
+    """splitmix64 finaliser applied element-wise (uint64 arrays wrap silently)"""
+    z = keys ^ (keys >> np.uint64(30))
+    z = z * np.uint64(0xBF58476D1CE4E5B9)
+    z = z ^ (z >> np.uint64(27))
+    z = z * np.uint64(0x94D049BB133111EB)
+    return z ^ (z >> np.uint64(31))
+
+
+def _bar_noise(bar_numbers: np.ndarray, salt: int, columns: int = 4) -> np.ndarray:
+    """Standard normal draws per bar from a hash of the bar number, without a Python loop"""
+    keys = bar_numbers.astype(np.uint64)[:, None] * np.uint64(columns) + np.arange(columns, dtype=np.uint64)
+    uniforms = []
+    for offset in (1, 2):
+        mixed = _splitmix64(keys + np.uint64((salt * offset * _GOLDEN) & _MASK64))
+        uniforms.append(((mixed >> np.uint64(11)).astype(np.float64) + 0.5) / float(1 << 53))
+    # Box-Muller
+    return np.sqrt(-2.0 * np.log(uniforms[0])) * np.cos(2.0 * np.pi * uniforms[1])
+
+
+class FakeExchange:
+    """
+    Offline stand-in for a ccxt exchange.
+
+    Every bar is derived from a hash of (symbol, timeframe, open time), so
+    repeated runs, incremental fetches and separate processes all see the same
+    candles. Only the calls the scanners use are implemented.
+    """
+
+    id = 'fake'
+
+    def __init__(self, symbols: Optional[List[str]] = None, latency: float = 0.0,
+                 start_price: float = 1.0, now_ms: Optional[int] = None):
+        self.symbols = list(symbols or ['XRP/USDT'])
+        self.latency = latency
+        self.start_price = start_price
+        self.now_ms = now_ms
+        self.calls = 0
+
+    def milliseconds(self) -> int:
+        return self.now_ms if self.now_ms is not None else int(time.time() * 1000)
+
+    @staticmethod
+    def parse_timeframe(timeframe: str) -> int:
+        """Timeframe length in seconds, like ccxt's Exchange.parse_timeframe"""
+        return timeframe_seconds(timeframe)
+
+    def ohlcv_array(self, symbol: str, timeframe: str = '1m', since: Optional[int] = None,
+                    limit: Optional[int] = None) -> np.ndarray:
+        """The candles fetch_ohlcv would return, as an (n x 6) array; not counted as a call"""
+        step = self.parse_timeframe(timeframe) * 1000
+        last_open = self.milliseconds() // step * step
+        limit = limit or 500
+        if since is None:
+            first_open = last_open - (limit - 1) * step
+        else:
+            first_open = -(-since // step) * step
+        opens = np.arange(first_open, min(last_open, first_open + (limit - 1) * step) + step, step, dtype=np.int64)
+        if len(opens) == 0:
+            return np.empty((0, 6))
+
+        moves = _bar_noise(opens // step, zlib.crc32(f"{symbol}|{timeframe}".encode()))
+        # Two slow cycles give RSI room to swing; the per-bar noise keeps pivots irregular
+        bar = opens / step
+        closes = self.start_price * np.exp(
+            0.02 * np.sin(bar / 50.0) + 0.01 * np.sin(bar / 377.0) + 0.0003 * moves[:, 0]
+        )
+        opens_px = closes * np.exp(0.0003 * moves[:, 1])
+        highs = np.maximum(opens_px, closes) * (1 + 0.0005 * np.abs(moves[:, 2]))
+        lows = np.minimum(opens_px, closes) * (1 - 0.0005 * np.abs(moves[:, 3]))
+        volumes = 1000 + 100 * np.abs(moves[:, 0])
+        return np.column_stack((opens, opens_px, highs, lows, closes, volumes))
+
+    def _candles(self, symbol: str, timeframe: str, since: Optional[int], limit: Optional[int]) -> List[list]:
+        rows = self.ohlcv_array(symbol, timeframe, since, limit).tolist()
+        for row in rows:
+            row[0] = int(row[0])
+        return rows
+
+    def _ticker(self, symbol: str) -> Dict:
+        candle = self._candles(symbol, '1m', None, 1)[-1]
+        # A fixed 24h volume per symbol, spread over four orders of magnitude
+        quote_volume = 10 ** (4 + 4 * (zlib.crc32(symbol.encode()) / 2 ** 32))
+        return {'symbol': symbol, 'timestamp': candle[0], 'last': candle[4], 'close': candle[4],
+                'quoteVolume': quote_volume, 'baseVolume': quote_volume / candle[4]}
+
+    @staticmethod
+    def _market(symbol: str) -> Dict:
+        """ccxt-style market: 'BASE/QUOTE:SETTLE' is a linear swap, 'BASE/QUOTE' spot"""
+        pair, _, settle = symbol.partition(':')
+        base, _, quote = pair.partition('/')
+        swap = bool(settle)
+        return {
+            'id': symbol.replace('/', '_').replace(':', '_'), 'symbol': symbol, 'base': base, 'quote': quote,
+            'settle': settle or None, 'type': 'swap' if swap else 'spot', 'spot': not swap, 'swap': swap,
+            'contract': swap, 'linear': swap or None, 'active': True,
+        }
+
+    def load_markets(self, reload=False) -> Dict:
+        self.calls += 1
+        return {symbol: self._market(symbol) for symbol in self.symbols}
+
+    def fetch_ohlcv(self, symbol, timeframe='1m', since=None, limit=None, params=None):
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        return self._candles(symbol, timeframe, since, limit)
+
+    def fetch_ticker(self, symbol, params=None):
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        return self._ticker(symbol)
+
+    def fetch_tickers(self, symbols=None, params=None):
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        return {symbol: self._ticker(symbol) for symbol in (symbols or self.symbols)}
+
+
+class AsyncFakeExchange(FakeExchange):
+    """FakeExchange with the coroutine interface of ccxt.async_support"""
+
+    async def fetch_ohlcv(self, symbol, timeframe='1m', since=None, limit=None, params=None):
+        self.calls += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return self._candles(symbol, timeframe, since, limit)
+
+    async def fetch_ticker(self, symbol, params=None):
+        self.calls += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return self._ticker(symbol)
+
+    async def fetch_tickers(self, symbols=None, params=None):
+        self.calls += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return {symbol: self._ticker(symbol) for symbol in (symbols or self.symbols)}
+
+    async def load_markets(self, reload=False):
+        return FakeExchange.load_markets(self, reload)
+
+    async def close(self):
+        pass
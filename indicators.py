@@ -0,0 +1,444 @@
+import numpy as np
+from typing import Optional, Sequence
+
+
+def rsi_from_averages(avg_gain: float, avg_loss: float) -> float:
+    """
+    Turn Wilder average gain/loss into an RSI value, with PineScript ta.rsi's
+    edge cases: no losses gives 100, including a flat window with no gains
+    either (pandas_ta gave NaN there), and no gains gives 0.
+    """
+    if avg_loss == 0:
+        return 100.0
+    if avg_gain == 0:
+        return 0.0
+    return 100.0 - 100.0 / (1.0 + avg_gain / avg_loss)
+
+
+class RSIState:
+    """
+    Wilder RSI kept as running averages so every closed candle is an O(1) update.
+
+    Feed closed candles with update() and use peek() to get the RSI of the
+    still-forming candle without touching the stored averages. The averages
+    are seeded with the simple mean of the first `period` changes, so there
+    is no value until `period` + 1 closes have been seen.
+    """
+
+    def __init__(self, period: int = 14):
+        self.period = period
+        self.avg_gain: Optional[float] = None
+        self.avg_loss: Optional[float] = None
+        self.last_close: Optional[float] = None
+        self.last_timestamp: Optional[int] = None
+        self._seed_gain = 0.0
+        self._seed_loss = 0.0
+        self._seed_count = 0
+
+    @classmethod
+    def from_closes(cls, closes: Sequence[float], period: int = 14,
+                    timestamps: Optional[Sequence[int]] = None) -> "RSIState":
+        """Build a state from a history of closed candles"""
+        state = cls(period)
+        for i, close in enumerate(closes):
+            state.update(close, timestamps[i] if timestamps is not None else None)
+        return state
+
+    @classmethod
+    def from_candles(cls, ohlcv: Sequence[Sequence[float]], period: int = 14) -> "RSIState":
+        """Build a state from closed ccxt OHLCV rows"""
+        state = cls(period)
+        for candle in ohlcv:
+            state.update(candle[4], candle[0])
+        return state
+
+    @property
+    def ready(self) -> bool:
+        """True once `period` price changes have been seen"""
+        return self.avg_gain is not None
+
+    @property
+    def value(self) -> Optional[float]:
+        """RSI of the last closed candle"""
+        if not self.ready:
+            return None
+        return rsi_from_averages(self.avg_gain, self.avg_loss)
+
+    def update(self, close: float, timestamp: Optional[int] = None) -> Optional[float]:
+        """Apply one closed candle and return the new RSI (None while warming up)"""
+        close = float(close)
+        previous = self.last_close
+        self.last_close = close
+        if timestamp is not None:
+            self.last_timestamp = timestamp
+        if previous is None:
+            return None
+
+        delta = close - previous
+        gain = delta if delta > 0 else 0.0
+        loss = -delta if delta < 0 else 0.0
+
+        if self.avg_gain is None:
+            # Seed with a simple average of the first `period` changes
+            self._seed_gain += gain
+            self._seed_loss += loss
+            self._seed_count += 1
+            if self._seed_count < self.period:
+                return None
+            self.avg_gain = self._seed_gain / self.period
+            self.avg_loss = self._seed_loss / self.period
+        else:
+            self.avg_gain = (self.avg_gain * (self.period - 1) + gain) / self.period
+            self.avg_loss = (self.avg_loss * (self.period - 1) + loss) / self.period
+
+        return rsi_from_averages(self.avg_gain, self.avg_loss)
+
+    def peek(self, close: float) -> Optional[float]:
+        """RSI if the forming candle closed at `close`; the state is not changed"""
+        if not self.ready:
+            return None
+        delta = float(close) - self.last_close
+        gain = delta if delta > 0 else 0.0
+        loss = -delta if delta < 0 else 0.0
+        avg_gain = (self.avg_gain * (self.period - 1) + gain) / self.period
+        avg_loss = (self.avg_loss * (self.period - 1) + loss) / self.period
+        return rsi_from_averages(avg_gain, avg_loss)
+
+
+# Largest factor w^-k allowed inside one closed-form smoothing block
+_MAX_BLOCK_GROWTH = 1e10
+
+
+def smooth(values, weight: float, initial) -> np.ndarray:
+    """
+    Exponential smoothing y[t] = weight * y[t-1] + (1 - weight) * values[t]
+    along the last axis, starting from y[-1] = initial.
+
+    Instead of stepping bar by bar, each block of bars is solved in closed
+    form with a cumulative sum, so long series cost a handful of vectorized
+    NumPy calls. Blocks are sized so the weight powers stay well inside
+    float64 range.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    flat = values.ndim == 1
+    values = np.atleast_2d(values)
+    rows, n = values.shape
+    previous = np.broadcast_to(np.asarray(initial, dtype=np.float64), (rows,)).copy()
+    out = np.empty_like(values)
+    if n == 0:
+        return out[0] if flat else out
+    if weight <= 0:
+        out[:] = values
+        return out[0] if flat else out
+
+    block = max(1, min(n, int(np.log(_MAX_BLOCK_GROWTH) / -np.log(weight))))
+    decay = weight ** np.arange(block)  # w^t
+    growth = 1.0 / decay  # w^-t
+    for start in range(0, n, block):
+        chunk = values[:, start:start + block]
+        size = chunk.shape[1]
+        acc = np.cumsum(chunk * growth[:size], axis=1)
+        y = decay[:size] * (weight * previous[:, None] + (1.0 - weight) * acc)
+        out[:, start:start + size] = y
+        previous = y[:, -1]
+    return out[0] if flat else out
+
+
+def _wilder_rsi_rows(closes: np.ndarray, period: int) -> np.ndarray:
+    """calculate_rsi_batch for a 2-D matrix with more than `period` bars and no padding"""
+    deltas = np.diff(closes, axis=1)
+    gains = np.where(deltas > 0, deltas, 0.0)
+    losses = np.where(deltas < 0, -deltas, 0.0)
+
+    # Bar `period` holds the simple-average seed, later bars the Wilder recursion
+    weight = (period - 1) / period
+    seed_gain = gains[:, :period].sum(axis=1) / period
+    seed_loss = losses[:, :period].sum(axis=1) / period
+    avg_gain = np.column_stack([seed_gain, smooth(gains[:, period:], weight, seed_gain)])
+    avg_loss = np.column_stack([seed_loss, smooth(losses[:, period:], weight, seed_loss)])
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        values = 100.0 - 100.0 / (1.0 + avg_gain / avg_loss)
+    values = np.where(avg_gain == 0, 0.0, values)
+    values = np.where(avg_loss == 0, 100.0, values)
+
+    rsi = np.empty_like(closes)
+    rsi[:, period:] = values
+    rsi[:, :period] = values[:, :1]
+    return rsi
+
+
+def calculate_rsi_batch(closes, period: int = 14) -> np.ndarray:
+    """
+    Wilder RSI for a (symbols x bars) close matrix.
+
+    All symbols are smoothed together with the closed-form kernel in smooth(),
+    so there is no per-bar or per-symbol Python loop. Warm-up bars before the
+    first full period repeat the first valid value. A row may start with NaN
+    padding (a symbol with a shorter history); it is computed from its first
+    close as if it were on its own, and the padding stays NaN. A 1-D input
+    gives a 1-D result.
+    """
+    closes = np.asarray(closes, dtype=np.float64)
+    flat = closes.ndim == 1
+    closes = np.atleast_2d(closes)
+    n_bars = closes.shape[1]
+    if n_bars <= period:
+        rsi = np.zeros_like(closes)
+        return rsi[0] if flat else rsi
+
+    missing = np.isnan(closes)
+    starts = np.where(missing.all(axis=1), n_bars, missing.argmin(axis=1))
+    if not starts.any():
+        rsi = _wilder_rsi_rows(closes, period)
+    else:
+        # Left-align every row so each seeds from its own first close, then shift the result back
+        shifted = np.arange(n_bars) + starts[:, None]
+        aligned = np.take_along_axis(closes, np.minimum(shifted, n_bars - 1), axis=1)
+        aligned[shifted >= n_bars] = np.nan  # Trailing padding counts as no change and is dropped below
+        values = _wilder_rsi_rows(aligned, period)
+        values[n_bars - starts <= period] = 0.0  # Too short for a value, like a short series
+        back = np.arange(n_bars) - starts[:, None]
+        rsi = np.where(back >= 0, np.take_along_axis(values, np.maximum(back, 0), axis=1), np.nan)
+    return rsi[0] if flat else rsi
+
+
+def calculate_rsi(prices: Sequence[float], period: int = 14) -> np.ndarray:
+    """
+    Wilder RSI for a whole series.
+
+    The result has the same length as `prices`; the warm-up bars before the
+    first full period repeat the first valid value, like the scanners expect.
+    """
+    return calculate_rsi_batch(np.asarray(prices, dtype=np.float64).ravel(), period)
+
+
+def sma(values, period: int) -> np.ndarray:
+    """Simple moving average; NaN until `period` values are available"""
+    values = np.asarray(values, dtype=np.float64)
+    out = np.full_like(values, np.nan)
+    if len(values) >= period:
+        sums = np.cumsum(np.concatenate(([0.0], values)))
+        out[period - 1:] = (sums[period:] - sums[:-period]) / period
+    return out
+
+
+def ema(values, period: int) -> np.ndarray:
+    """Exponential moving average seeded with the first value (pandas ewm adjust=False)"""
+    values = np.asarray(values, dtype=np.float64)
+    if len(values) == 0:
+        return values.copy()
+    alpha = 2.0 / (period + 1)
+    return smooth(values, 1.0 - alpha, values[0])
+
+
+def wma(values, period: int) -> np.ndarray:
+    """Linearly weighted moving average (weights 1..period, newest heaviest); NaN until `period` values"""
+    values = np.asarray(values, dtype=np.float64)
+    out = np.full_like(values, np.nan)
+    if len(values) >= period:
+        weights = np.arange(period, 0, -1, dtype=np.float64)  # Reversed by np.convolve
+        out[period - 1:] = np.convolve(values, weights, mode='valid') / weights.sum()
+    return out
+
+
+MA_TYPES = {'SMA': sma, 'EMA': ema, 'WMA': wma}
+
+
+def moving_average(values, period: int, ma_type: str = 'SMA') -> np.ndarray:
+    """The MA_TYPES average named by `ma_type`"""
+    if ma_type not in MA_TYPES:
+        raise ValueError(f"Unknown MA type: {ma_type}")
+    return MA_TYPES[ma_type](values, period)
+
+
+def true_range(high, low, close) -> np.ndarray:
+    """Per-bar true range; the first bar has no previous close and uses high - low"""
+    high = np.asarray(high, dtype=np.float64)
+    low = np.asarray(low, dtype=np.float64)
+    close = np.asarray(close, dtype=np.float64)
+    tr = high - low
+    if len(tr) > 1:
+        prev_close = close[:-1]
+        tr[1:] = np.maximum(tr[1:], np.maximum(np.abs(high[1:] - prev_close), np.abs(low[1:] - prev_close)))
+    return tr
+
+
+def atr(high, low, close, period: int = 14, smoothing: str = 'sma') -> np.ndarray:
+    """
+    Average true range. 'sma' matches rsi_ma.py's rolling mean of TR;
+    'wilder' seeds with that mean and continues with Wilder smoothing.
+    """
+    tr = true_range(high, low, close)
+    if smoothing == 'sma':
+        return sma(tr, period)
+    if smoothing != 'wilder':
+        raise ValueError(f"Unknown ATR smoothing: {smoothing}")
+    out = np.full_like(tr, np.nan)
+    if len(tr) >= period:
+        seed = tr[:period].mean()
+        out[period - 1] = seed
+        out[period:] = smooth(tr[period:], (period - 1) / period, seed)
+    return out
+
+
+class SMAState:
+    """
+    Streaming SMA: a ring buffer and a running sum, O(1) per value.
+    The sum is rebuilt from the buffer once per lap so rounding cannot drift.
+    """
+
+    def __init__(self, period: int):
+        self.period = period
+        self._window = np.zeros(period)
+        self._count = 0
+        self._sum = 0.0
+
+    @property
+    def ready(self) -> bool:
+        return self._count >= self.period
+
+    @property
+    def value(self) -> Optional[float]:
+        return self._sum / self.period if self.ready else None
+
+    def update(self, value: float) -> Optional[float]:
+        """Add one value and return the new average (None while warming up)"""
+        index = self._count % self.period
+        self._sum += float(value) - self._window[index]
+        self._window[index] = value
+        self._count += 1
+        if index == self.period - 1:
+            self._sum = float(self._window.sum())
+        return self.value
+
+    def peek(self, value: float) -> Optional[float]:
+        """Average if `value` were added next; the state is not changed"""
+        if self._count + 1 < self.period:
+            return None
+        oldest = self._window[self._count % self.period] if self.ready else 0.0
+        return (self._sum + float(value) - oldest) / self.period
+
+
+class EMAState:
+    """Streaming EMA seeded with the first value, matching ema()"""
+
+    def __init__(self, period: int):
+        self.period = period
+        self.alpha = 2.0 / (period + 1)
+        self.value: Optional[float] = None
+
+    @property
+    def ready(self) -> bool:
+        return self.value is not None
+
+    def update(self, value: float) -> float:
+        self.value = self.peek(value)
+        return self.value
+
+    def peek(self, value: float) -> float:
+        if self.value is None:
+            return float(value)
+        return self.value + self.alpha * (float(value) - self.value)
+
+
+class WMAState:
+    """
+    Streaming WMA matching wma(). Keeps the window sum and weighted sum:
+    sliding by one lowers every weight by one, i.e. subtracts the window sum.
+    """
+
+    def __init__(self, period: int):
+        self.period = period
+        self.divisor = period * (period + 1) / 2
+        self._window = np.zeros(period)
+        self._count = 0
+        self._sum = 0.0
+        self._weighted = 0.0
+
+    @property
+    def ready(self) -> bool:
+        return self._count >= self.period
+
+    @property
+    def value(self) -> Optional[float]:
+        return self._weighted / self.divisor if self.ready else None
+
+    def _next(self, value: float):
+        """(sum, weighted sum, oldest index) after adding `value`"""
+        index = self._count % self.period
+        if self.ready:
+            return (self._sum + value - self._window[index],
+                    self._weighted + self.period * value - self._sum, index)
+        return self._sum + value, self._weighted + (self._count + 1) * value, index
+
+    def update(self, value: float) -> Optional[float]:
+        value = float(value)
+        self._sum, self._weighted, index = self._next(value)
+        self._window[index] = value
+        self._count += 1
+        if index == self.period - 1:
+            # The buffer is in time order at the end of a lap; rebuild so rounding cannot drift
+            self._sum = float(self._window.sum())
+            self._weighted = float(self._window @ np.arange(1, self.period + 1))
+        return self.value
+
+    def peek(self, value: float) -> Optional[float]:
+        if self._count + 1 < self.period:
+            return None
+        return self._next(float(value))[1] / self.divisor
+
+
+MA_STATES = {'SMA': SMAState, 'EMA': EMAState, 'WMA': WMAState}
+
+
+def moving_average_state(ma_type: str, period: int):
+    """Streaming counterpart of moving_average()"""
+    if ma_type not in MA_STATES:
+        raise ValueError(f"Unknown MA type: {ma_type}")
+    return MA_STATES[ma_type](period)
+
+
+class ATRState:
+    """
+    Streaming ATR matching atr(): 'sma' averages the last `period` true
+    ranges, 'wilder' seeds with that average and then smooths. O(1) per bar.
+    """
+
+    def __init__(self, period: int = 14, smoothing: str = 'sma'):
+        if smoothing not in ('sma', 'wilder'):
+            raise ValueError(f"Unknown ATR smoothing: {smoothing}")
+        self.period = period
+        self.smoothing = smoothing
+        self.last_close: Optional[float] = None
+        self._average = SMAState(period)
+        self.value: Optional[float] = None
+
+    @property
+    def ready(self) -> bool:
+        return self.value is not None
+
+    def true_range(self, high: float, low: float, close: float) -> float:
+        """True range of a bar following the last one seen"""
+        tr = float(high) - float(low)
+        if self.last_close is not None:
+            tr = max(tr, abs(high - self.last_close), abs(low - self.last_close))
+        return tr
+
+    def _next(self, tr: float) -> Optional[float]:
+        if self.smoothing == 'wilder' and self.value is not None:
+            return (self.value * (self.period - 1) + tr) / self.period
+        return self._average.peek(tr)
+
+    def update(self, high: float, low: float, close: float) -> Optional[float]:
+        """Apply one closed bar and return the new ATR (None while warming up)"""
+        tr = self.true_range(high, low, close)
+        self.value = self._next(tr)
+        if self.smoothing == 'sma' or not self._average.ready:
+            self._average.update(tr)
+        self.last_close = float(close)
+        return self.value
+
+    def peek(self, high: float, low: float, close: float) -> Optional[float]:
+        """ATR if the forming bar closed as given; the state is not changed"""
+        return self._next(self.true_range(high, low, close))
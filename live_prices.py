@@ -0,0 +1,76 @@
+import threading
+import time
+from typing import Dict, Iterable, Optional
+
+DEFAULT_REFRESH_SECONDS = 5
+
+
+class LivePriceService:
+    """
+    Live last-price snapshot for a watchlist, refreshed with one bulk
+    fetch_tickers call per interval instead of one fetch_ticker per symbol.
+
+    The snapshot dict is swapped in whole after each refresh, so readers in
+    other threads always see a consistent set of prices.
+    """
+
+    def __init__(self, exchange, symbols: Iterable[str], refresh_seconds: float = DEFAULT_REFRESH_SECONDS):
+        self.exchange = exchange
+        self.symbols = list(symbols)
+        self.refresh_seconds = refresh_seconds
+        self.updated_at: Optional[float] = None
+        self._prices: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def watch(self, symbols: Iterable[str]):
+        """Add symbols to the next refresh"""
+        with self._lock:
+            self.symbols += [s for s in symbols if s not in self.symbols]
+
+    def refresh(self) -> Dict[str, float]:
+        """Pull every watched symbol in one request and publish the new snapshot"""
+        with self._lock:
+            symbols = list(self.symbols)
+        tickers = self.exchange.fetch_tickers(symbols)
+
+        prices = dict(self._prices)
+        for symbol in symbols:
+            ticker = tickers.get(symbol)
+            if ticker and ticker.get('last') is not None:
+                prices[symbol] = float(ticker['last'])
+        self._prices = prices
+        self.updated_at = time.time()
+        return prices
+
+    def get(self, symbol: str, default=None):
+        """Latest price for `symbol`, or `default` before the first refresh"""
+        return self._prices.get(symbol, default)
+
+    def snapshot(self) -> Dict[str, float]:
+        """All latest prices; the dict is replaced, never mutated, so treat it as read-only"""
+        return self._prices
+
+    def run(self):
+        """Refresh loop; runs until stop() is called"""
+        while not self._stop.is_set():
+            wait = self.refresh_seconds
+            try:
+                self.refresh()
+            except Exception as e:
+                # Prices stay at the last snapshot; an open circuit says when it is worth asking again
+                print(f"Price update error: {e}")
+                wait = max(wait, getattr(e, 'retry_in', 0.0))
+            self._stop.wait(wait)
+
+    def start(self) -> "LivePriceService":
+        """Run the refresh loop in a daemon thread"""
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self.run, daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
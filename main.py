@@ -1,16 +1,18 @@
-import ccxt
 import time
 import numpy as np
 from datetime import datetime
-import platform
-import os
-import winsound  # For Windows
-import threading
+
+from alerts import Alert, AlertDispatcher, AudioSink
+from audio import SoundBank, SoundPlayer
+from candle_cache import CandleCache
+from exchange_client import create_client
+from indicators import calculate_rsi_batch
+from pivots import find_peaks, find_troughs
+from scheduler import sleep_until_next_bar
 
 # Initialize MEXC exchange
-exchange = ccxt.mexc({
-    'enableRateLimit': True,
-})
+exchange = create_client('mexc')  # Pooled keep-alive session, so polls skip the TLS handshake
+candle_cache = CandleCache(exchange)
 
 # Configuration
 symbols = ['XRP/USDT']  # Add your coins here
@@ -19,79 +21,19 @@ rsi_period = 14
 price_lookback = 30  # Candles to analyze for divergence
 min_peak_distance = 5  # Minimum candles between peaks
 play_sounds = True  # Set to False to disable alert sounds
+error_retry_seconds = 5  # Pause after a failed scan; exchange calls already retry with backoff
 
-def play_bullish_alert():
-    """Play sound for bullish divergence detection"""
-    if not play_sounds:
-        return
-        
-    system = platform.system()
-    try:
-        if system == 'Windows':
-            winsound.Beep(880, 500)  # Higher pitch
-            winsound.Beep(660, 500)
-        elif system == 'Darwin':  # macOS
-            os.system('afplay /System/Library/Sounds/Ping.aiff')
-            time.sleep(0.5)
-            os.system('afplay /System/Library/Sounds/Ping.aiff')
-        elif system == 'Linux':
-            os.system('spd-say "bullish divergence"')
-        else:
-            print('\a')  # System beep as fallback
-            time.sleep(0.3)
-            print('\a')
-    except:
-        print("Couldn't play sound")
-
-def play_bearish_alert():
-    """Play sound for bearish divergence detection"""
-    if not play_sounds:
-        return
-        
-    system = platform.system()
-    try:
-        if system == 'Windows':
-            winsound.Beep(440, 500)  # Lower pitch
-            winsound.Beep(330, 500)
-        elif system == 'Darwin':  # macOS
-            os.system('afplay /System/Library/Sounds/Basso.aiff')
-        elif system == 'Linux':
-            os.system('spd-say "bearish divergence"')
-        else:
-            print('\a')  # System beep
-    except:
-        print("Couldn't play sound")
+# Alert tones rendered once into memory and played on every platform
+sounds = SoundPlayer(SoundBank())
+sounds.bank.add_tone('bullish', [(880, 500), (660, 500)])  # Higher pitch
+sounds.bank.add_tone('bearish', [(440, 500), (330, 500)])  # Lower pitch
 
-def calculate_rsi(prices, period=14):
-    deltas = np.diff(prices)
-    gains = np.where(deltas > 0, deltas, 0)
-    losses = np.where(deltas < 0, -deltas, 0)
-    
-    avg_gain = np.mean(gains[:period])
-    avg_loss = np.mean(losses[:period])
-    
-    rsi = np.zeros_like(prices)
-    rsi[:period] = 100.0 - 100.0 / (1 + avg_gain / (avg_loss + 1e-10))
-    
-    for i in range(period, len(prices)):
-        avg_gain = ((avg_gain * (period - 1)) + gains[i-1]) / period
-        avg_loss = ((avg_loss * (period - 1)) + losses[i-1]) / period
-        
-        if avg_loss < 1e-10:
-            rs = 100  # Prevent division by zero
-        else:
-            rs = avg_gain / avg_loss
-            
-        rsi[i] = 100.0 - 100.0 / (1 + rs)
-    
-    return rsi
+def play_divergence_alert(alert):
+    """Audio sink player: bullish or bearish tones for a divergence alert"""
+    if play_sounds:
+        sounds.play(alert.kind)
 
-def find_peaks(data, min_distance=5):
-    peaks = []
-    for i in range(min_distance, len(data)-min_distance):
-        if data[i] == max(data[i-min_distance:i+min_distance+1]):
-            peaks.append(i)
-    return peaks
+alerts = AlertDispatcher([AudioSink(play_divergence_alert)])
 
 def detect_divergence(prices, rsi_values):
     # Find price peaks
@@ -113,9 +55,9 @@ def detect_divergence(prices, rsi_values):
             rsi_values[last_rsi_peak] < rsi_values[prev_rsi_peak]):
             bearish_divergences.append((prev_price_peak, last_price_peak))
     
-    # Find troughs (reverse of peaks)
-    price_troughs = find_peaks([-x for x in prices], min_peak_distance)
-    rsi_troughs = find_peaks([-x for x in rsi_values], min_peak_distance)
+    # Find troughs
+    price_troughs = find_troughs(prices, min_peak_distance)
+    rsi_troughs = find_troughs(rsi_values, min_peak_distance)
     
     # Check last two troughs for bullish divergence
     if len(price_troughs) >= 2 and len(rsi_troughs) >= 2:
@@ -134,22 +76,31 @@ def detect_divergence(prices, rsi_values):
 def monitor_divergences():
     print(f"Starting RSI Divergence Monitor ({timeframe})")
     print("=" * 50)
+    alerts.start()
     
     while True:
         try:
+            # Fetch OHLCV data for every symbol first
+            window = price_lookback + rsi_period
+            batch = []
             for symbol in symbols:
-                # Fetch OHLCV data
-                ohlcv = exchange.fetch_ohlcv(symbol, timeframe, limit=price_lookback + rsi_period)
-                if len(ohlcv) < price_lookback + rsi_period:
+                try:
+                    ohlcv = candle_cache.get(symbol, timeframe, window)
+                except Exception as e:  # Retries are spent; the other symbols still get this bar
+                    print(f"Fetch error for {symbol}: {e}")
                     continue
-                
-                # Extract closing prices
-                closes = np.array([x[4] for x in ohlcv])
-                
-                # Calculate RSI
-                rsi = calculate_rsi(closes, rsi_period)
-                valid_rsi = rsi[-price_lookback:]
-                valid_prices = closes[-price_lookback:]
+                if len(ohlcv) < window:
+                    continue
+                batch.append((symbol, ohlcv[-window:]))
+            
+            # Calculate RSI for the whole batch in one pass
+            if batch:
+                closes = np.array([[x[4] for x in ohlcv] for _, ohlcv in batch])
+                rsi = calculate_rsi_batch(closes, rsi_period)
+            
+            for row, (symbol, _) in enumerate(batch):
+                valid_rsi = rsi[row, -price_lookback:]
+                valid_prices = closes[row, -price_lookback:]
                 
                 # Detect divergences
                 bullish, bearish = detect_divergence(valid_prices, valid_rsi)
@@ -161,31 +112,21 @@ def monitor_divergences():
                     print(f"Time: {timestamp} | TF: {timeframe}")
                     print(f"Price: {valid_prices[bullish[0][0]]:.4f} -> {valid_prices[bullish[0][1]]:.4f}")
                     print(f"RSI:   {valid_rsi[bullish[0][0]]:.2f} -> {valid_rsi[bullish[0][1]]:.2f}")
-                    threading.Thread(target=play_bullish_alert).start()
+                    alerts.dispatch(Alert(symbol, 'bullish', "Bullish divergence", valid_prices[-1], source='main'))
                 
                 if bearish:
                     print(f"\n⚠️ BEARISH DIVERGENCE DETECTED ({symbol})")
                     print(f"Time: {timestamp} | TF: {timeframe}")
                     print(f"Price: {valid_prices[bearish[0][0]]:.4f} -> {valid_prices[bearish[0][1]]:.4f}")
                     print(f"RSI:   {valid_rsi[bearish[0][0]]:.2f} -> {valid_rsi[bearish[0][1]]:.2f}")
-                    threading.Thread(target=play_bearish_alert).start()
-            
-            # Wait before next check (based on timeframe)
-            sleep_time = {
-                '1m': 60,
-                '5m': 300,
-                '15m': 900,
-                '30m': 1800,
-                '1h': 3600,
-                '4h': 14400,
-                '1d': 86400
-            }.get(timeframe, 300)
+                    alerts.dispatch(Alert(symbol, 'bearish', "Bearish divergence", valid_prices[-1], source='main'))
             
-            time.sleep(sleep_time)
+            # Wait for the current bar to close
+            sleep_until_next_bar(timeframe)
             
         except Exception as e:
             print(f"Error: {e}")
-            time.sleep(60)
+            time.sleep(error_retry_seconds)
 
 if __name__ == "__main__":
     monitor_divergences()
\ No newline at end of file
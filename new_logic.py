@@ -1,25 +1,31 @@
-import ccxt
 import time
-import numpy as np
 from datetime import datetime
 import platform
 import os
-import winsound
 import threading
 import sys
 import json
 from collections import defaultdict
 
+from alerts import Alert, AlertDispatcher, AudioSink, FileSink
+from audio import SoundPlayer
+from candle_cache import CandleCache
+from divergence import BEARISH_TYPES, BULLISH_TYPES, DivergenceDetector
+from exchange_client import create_client, latency_report
+from indicators import RSIState
+from live_prices import LivePriceService
+from scheduler import sleep_until_next_bar
+
 # Initialize MEXC exchange
-exchange = ccxt.mexc({
-    'enableRateLimit': True,
-})
+exchange = create_client('mexc')  # Pooled keep-alive session shared by the polling threads
+candle_cache = CandleCache(exchange)
 
 # Configuration
 symbols = ['XRP/USDT']  # Add your coins here
 timeframe = '5m'  # Timeframe: 1m, 5m, 15m, 30m, 1h, 4h, 1d
 rsi_period = 14
 price_refresh_seconds = 5  # Live price refresh interval
+error_retry_seconds = 5  # Pause after a failed check; exchange calls already retry with backoff
 play_sounds = True  # Set to False to disable alert sounds
 log_file = "divergence_log.txt"  # File to save divergence history
 max_occurrences = 3  # Maximum times to show the same alert
@@ -33,15 +39,23 @@ plotBull = True      # Detect Regular Bullish
 plotHiddenBull = False  # Detect Hidden Bullish
 plotBear = True      # Detect Regular Bearish
 plotHiddenBear = False  # Detect Hidden Bearish
+enabled_divergences = [div_type for div_type, plot in (
+    ("regular_bullish", plotBull),
+    ("hidden_bullish", plotHiddenBull),
+    ("regular_bearish", plotBear),
+    ("hidden_bearish", plotHiddenBear),
+) if plot]
 
 # Global variables for tracking state
-live_prices = {symbol: "Loading..." for symbol in symbols}
+live_prices = LivePriceService(exchange, symbols, price_refresh_seconds)
 current_alerts = {symbol: {
     "regular_bullish": False,
     "hidden_bullish": False,
     "regular_bearish": False,
     "hidden_bearish": False
 } for symbol in symbols}
+rsi_states = {}  # symbol -> RSIState over closed candles
+divergence_detectors = {}  # symbol -> DivergenceDetector
 
 # Divergence history storage
 divergence_history = []
@@ -61,23 +75,11 @@ def print_header():
     print(f"Advanced RSI Divergence Monitor ({timeframe}) | {timestamp}")
     print("=" * 50)
 
-def update_live_prices():
-    """Fetch and update live prices for all symbols"""
-    while True:
-        try:
-            for symbol in symbols:
-                ticker = exchange.fetch_ticker(symbol)
-                live_prices[symbol] = float(ticker['last'])
-            time.sleep(price_refresh_seconds)
-        except Exception as e:
-            print(f"Price update error: {e}")
-            time.sleep(5)
-
 def print_live_prices():
     """Print live prices in a fixed position"""
     print("LIVE PRICES:")
     for symbol in symbols:
-        price = live_prices[symbol]
+        price = live_prices.get(symbol, "Loading...")
         alert_status = ""
         if current_alerts[symbol]["regular_bullish"] or current_alerts[symbol]["hidden_bullish"]:
             alert_status = " | 🟢 BULLISH"
@@ -86,187 +88,17 @@ def print_live_prices():
         print(f"  {symbol}: {price:.4f}{alert_status}")
     print("-" * 50)
 
-def play_bullish_alert():
-    """Play sound for bullish divergence detection"""
-    if not play_sounds:
-        return
-        
-    system = platform.system()
-    try:
-        if system == 'Windows':
-            if timeframe == '1m':
-                winsound.PlaySound("XRP-1m-bullish.wav", winsound.SND_FILENAME)  # Higher pitch                
-                winsound.PlaySound("XRP-1m-bullish.wav", winsound.SND_FILENAME)  # Higher pitch                
-            else:
-                winsound.PlaySound("XRP-5m-Bullish.wav", winsound.SND_FILENAME)  # Higher pitch
-                winsound.PlaySound("XRP-5m-Bullish.wav", winsound.SND_FILENAME)  # Higher pitch
-                
-        elif system == 'Darwin':  # macOS
-            os.system('afplay /System/Library/Sounds/Ping.aiff')
-            time.sleep(0.5)
-            os.system('afplay /System/Library/Sounds/Ping.aiff')
-        elif system == 'Linux':
-            os.system('spd-say "bullish divergence"')
-        else:
-            print('\a')  # System beep as fallback
-            time.sleep(0.3)
-            print('\a')
-    except:
-        print("Couldn't play sound")
-
-def play_bearish_alert():
-    """Play sound for bearish divergence detection"""
-    if not play_sounds:
-        return
-        
-    system = platform.system()
-    try:
-        if system == 'Windows':
-           if timeframe == '1m':
-                winsound.PlaySound("XRP-1m-bearish.wav", winsound.SND_FILENAME)  # Higher pitch                
-                winsound.PlaySound("XRP-1m-bearish.wav", winsound.SND_FILENAME)  # Higher pitch                
-           else:
-                winsound.PlaySound("XRP-5m-Bearish.wav", winsound.SND_FILENAME)  # Higher pitch
-                winsound.PlaySound("XRP-5m-Bearish.wav", winsound.SND_FILENAME)  # Higher pitch
-
-        elif system == 'Darwin':  # macOS
-            os.system('afplay /System/Library/Sounds/Basso.aiff')
-        elif system == 'Linux':
-            os.system('spd-say "bearish divergence"')
-        else:
-            print('\a')  # System beep
-    except:
-        print("Couldn't play sound")
+bullish_sound = "XRP-1m-bullish.wav" if timeframe == '1m' else "XRP-5m-Bullish.wav"
+bearish_sound = "XRP-1m-bearish.wav" if timeframe == '1m' else "XRP-5m-Bearish.wav"
+sounds = SoundPlayer.from_files([bullish_sound, bearish_sound])
 
-def calculate_rsi(prices, period=14):
-    deltas = np.diff(prices)
-    gains = np.where(deltas > 0, deltas, 0)
-    losses = np.where(deltas < 0, -deltas, 0)
-    
-    avg_gain = np.mean(gains[:period])
-    avg_loss = np.mean(losses[:period])
-    
-    rsi = np.zeros_like(prices)
-    rsi[:period] = 100.0 - 100.0 / (1 + avg_gain / (avg_loss + 1e-10))
-    
-    for i in range(period, len(prices)):
-        avg_gain = ((avg_gain * (period - 1)) + gains[i-1]) / period
-        avg_loss = ((avg_loss * (period - 1)) + losses[i-1]) / period
-        
-        if avg_loss < 1e-10:
-            rs = 100  # Prevent division by zero
-        else:
-            rs = avg_gain / avg_loss
-            
-        rsi[i] = 100.0 - 100.0 / (1 + rs)
-    
-    return rsi
-
-def find_pivot_lows(data, lbL, lbR):
-    """Find pivot lows in data series"""
-    pivot_lows = []
-    n = len(data)
-    for i in range(lbL, n - lbR):
-        window = data[i-lbL : i+lbR+1]
-        if data[i] == min(window):
-            pivot_lows.append(i)
-    return pivot_lows
+def play_divergence_alert(alert):
+    """Audio sink player: the timeframe's bullish or bearish sound, twice"""
+    if play_sounds:
+        sounds.play(bullish_sound if alert.kind == 'bullish' else bearish_sound, repeat=2)
 
-def find_pivot_highs(data, lbL, lbR):
-    """Find pivot highs in data series"""
-    pivot_highs = []
-    n = len(data)
-    for i in range(lbL, n - lbR):
-        window = data[i-lbL : i+lbR+1]
-        if data[i] == max(window):
-            pivot_highs.append(i)
-    return pivot_highs
-
-def in_range(cond, current_index, rangeLower, rangeUpper):
-    """Check if condition is within bar range"""
-    bars = current_index - cond
-    return rangeLower <= bars <= rangeUpper
-
-def detect_divergences(osc, lows, highs, lbL, lbR, rangeLower, rangeUpper):
-    """Detect all types of divergences based on PineScript logic"""
-    # Find pivots in RSI
-    rsi_pl = find_pivot_lows(osc, lbL, lbR)
-    rsi_ph = find_pivot_highs(osc, lbL, lbR)
-    
-    # Find pivots in price
-    price_pl = find_pivot_lows(lows, lbL, lbR)
-    price_ph = find_pivot_highs(highs, lbL, lbR)
-    
-    results = {
-        "regular_bullish": False,
-        "hidden_bullish": False,
-        "regular_bearish": False,
-        "hidden_bearish": False
-    }
-    
-    # Regular Bullish: Price Lower Low, RSI Higher Low
-    if len(rsi_pl) >= 2 and len(price_pl) >= 2:
-        current_rsi_pl = rsi_pl[-1]
-        prev_rsi_pl = rsi_pl[-2]
-        
-        if in_range(prev_rsi_pl, current_rsi_pl, rangeLower, rangeUpper):
-            # Get corresponding price pivot indices
-            current_price_pl = price_pl[-1]
-            prev_price_pl = price_pl[-2]
-            
-            # Conditions
-            osc_hl = osc[current_rsi_pl] > osc[prev_rsi_pl]  # RSI Higher Low
-            price_ll = lows[current_price_pl] < lows[prev_price_pl]  # Price Lower Low
-            
-            if plotBull and osc_hl and price_ll:
-                results["regular_bullish"] = True
-    
-    # Hidden Bullish: Price Higher Low, RSI Lower Low
-    if len(rsi_pl) >= 2 and len(price_pl) >= 2:
-        current_rsi_pl = rsi_pl[-1]
-        prev_rsi_pl = rsi_pl[-2]
-        
-        if in_range(prev_rsi_pl, current_rsi_pl, rangeLower, rangeUpper):
-            current_price_pl = price_pl[-1]
-            prev_price_pl = price_pl[-2]
-            
-            osc_ll = osc[current_rsi_pl] < osc[prev_rsi_pl]  # RSI Lower Low
-            price_hl = lows[current_price_pl] > lows[prev_price_pl]  # Price Higher Low
-            
-            if plotHiddenBull and osc_ll and price_hl:
-                results["hidden_bullish"] = True
-    
-    # Regular Bearish: Price Higher High, RSI Lower High
-    if len(rsi_ph) >= 2 and len(price_ph) >= 2:
-        current_rsi_ph = rsi_ph[-1]
-        prev_rsi_ph = rsi_ph[-2]
-        
-        if in_range(prev_rsi_ph, current_rsi_ph, rangeLower, rangeUpper):
-            current_price_ph = price_ph[-1]
-            prev_price_ph = price_ph[-2]
-            
-            osc_lh = osc[current_rsi_ph] < osc[prev_rsi_ph]  # RSI Lower High
-            price_hh = highs[current_price_ph] > highs[prev_price_ph]  # Price Higher High
-            
-            if plotBear and osc_lh and price_hh:
-                results["regular_bearish"] = True
-    
-    # Hidden Bearish: Price Lower High, RSI Higher High
-    if len(rsi_ph) >= 2 and len(price_ph) >= 2:
-        current_rsi_ph = rsi_ph[-1]
-        prev_rsi_ph = rsi_ph[-2]
-        
-        if in_range(prev_rsi_ph, current_rsi_ph, rangeLower, rangeUpper):
-            current_price_ph = price_ph[-1]
-            prev_price_ph = price_ph[-2]
-            
-            osc_hh = osc[current_rsi_ph] > osc[prev_rsi_ph]  # RSI Higher High
-            price_lh = highs[current_price_ph] < highs[prev_price_ph]  # Price Lower High
-            
-            if plotHiddenBear and osc_hh and price_lh:
-                results["hidden_bearish"] = True
-    
-    return results
+# Sounds and log writes run on the dispatcher's workers, never in the check loop
+alerts = AlertDispatcher([AudioSink(play_divergence_alert), FileSink(log_file)])
 
 def log_divergence(symbol, divergence_type, price, timestamp):
     """Log divergence to file and history if not exceeded max occurrences"""
@@ -288,15 +120,33 @@ def log_divergence(symbol, divergence_type, price, timestamp):
     divergence_history.append(entry)
     
     # Write to log file
-    try:
-        with open(log_file, "a") as f:
-            f.write(f"{timestamp} | {symbol} | {divergence_type} | {price:.4f}\n")
-    except Exception as e:
-        print(f"Error writing to log file: {e}")
+    alerts.dispatch(Alert(symbol, divergence_type, divergence_type, price, source='new_logic', sinks=('file',)))
     
     # Update count
     divergence_counts[symbol][divergence_type] += 1
 
+def feed_closed_candles(symbol, ohlcv):
+    """Push candles closed since the last check through the symbol's RSI and divergence state"""
+    if symbol not in rsi_states:
+        rsi_states[symbol] = RSIState(rsi_period)
+        divergence_detectors[symbol] = DivergenceDetector(
+            lbL, lbR, rangeLower, rangeUpper, enabled_divergences
+        )
+    rsi_state = rsi_states[symbol]
+    detector = divergence_detectors[symbol]
+    warm = rsi_state.last_timestamp is not None
+    
+    events = []
+    for candle in ohlcv[:-1]:  # Last candle is still forming
+        if warm and candle[0] <= rsi_state.last_timestamp:
+            continue
+        rsi = rsi_state.update(candle[4], candle[0])
+        if rsi is not None:
+            events += detector.update(rsi, candle[3], candle[2])
+    
+    # Divergences confirmed while replaying history are not new
+    return events if warm else []
+
 def check_divergences():
     """Check for divergences in all symbols"""
     min_bars = max(rangeUpper + lbL + lbR, 100)  # Ensure enough bars for analysis
@@ -304,70 +154,44 @@ def check_divergences():
     while True:
         try:
             for symbol in symbols:
-                # Reset current alerts
-                for key in current_alerts[symbol]:
-                    current_alerts[symbol][key] = False
-                
                 # Fetch OHLCV data
-                ohlcv = exchange.fetch_ohlcv(symbol, timeframe, limit=min_bars)
+                try:
+                    ohlcv = candle_cache.get(symbol, timeframe, min_bars)
+                except Exception as e:  # Retries are spent; the other symbols still get this bar
+                    print(f"Fetch error for {symbol}: {e}")
+                    continue
                 if len(ohlcv) < min_bars:
                     continue
                 
-                # Extract data
-                closes = np.array([x[4] for x in ohlcv])
-                lows = np.array([x[3] for x in ohlcv])
-                highs = np.array([x[2] for x in ohlcv])
-                
-                # Calculate RSI
-                rsi = calculate_rsi(closes, rsi_period)
-                
-                # Detect divergences
-                divergences = detect_divergences(
-                    rsi, lows, highs, 
-                    lbL, lbR, rangeLower, rangeUpper
-                )
+                # Only pivots confirmed by newly closed candles are evaluated
+                events = feed_closed_candles(symbol, ohlcv)
                 
                 # Update current alerts
-                current_alerts[symbol] = divergences
+                current_alerts[symbol] = dict(divergence_detectors[symbol].state)
                 
                 # Log new divergences
                 timestamp_str = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                for div_type, detected in divergences.items():
-                    if detected:
-                        # Reset count if divergence is not currently active
-                        if not detected:
-                            divergence_counts[symbol][div_type] = 0
-                            
-                        # Use current price for logging
-                        log_divergence(symbol, div_type, live_prices[symbol], timestamp_str)
+                for div_type in events:
+                    # Use current price for logging, last close until the first ticker arrives
+                    log_divergence(symbol, div_type, live_prices.get(symbol, ohlcv[-1][4]), timestamp_str)
                 
                 # Play alerts
-                if (divergences["regular_bullish"] or divergences["hidden_bullish"]) and \
+                if any(div_type in BULLISH_TYPES for div_type in events) and \
                    divergence_counts[symbol].get("regular_bullish", 0) < max_occurrences and \
                    divergence_counts[symbol].get("hidden_bullish", 0) < max_occurrences:
-                    threading.Thread(target=play_bullish_alert).start()
+                    alerts.dispatch(Alert(symbol, 'bullish', "Bullish divergence", source='new_logic', sinks=('audio',)))
                     
-                if (divergences["regular_bearish"] or divergences["hidden_bearish"]) and \
+                if any(div_type in BEARISH_TYPES for div_type in events) and \
                    divergence_counts[symbol].get("regular_bearish", 0) < max_occurrences and \
                    divergence_counts[symbol].get("hidden_bearish", 0) < max_occurrences:
-                    threading.Thread(target=play_bearish_alert).start()
-            
-            # Wait before next check
-            sleep_time = {
-                '1m': 60,
-                '5m': 300,
-                '15m': 900,
-                '30m': 1800,
-                '1h': 3600,
-                '4h': 14400,
-                '1d': 86400
-            }.get(timeframe, 300)
+                    alerts.dispatch(Alert(symbol, 'bearish', "Bearish divergence", source='new_logic', sinks=('audio',)))
             
-            time.sleep(sleep_time)
+            # Wait for the current bar to close
+            sleep_until_next_bar(timeframe)
             
         except Exception as e:
             print(f"Divergence check error: {e}")
-            time.sleep(60)
+            time.sleep(error_retry_seconds)
 
 def display_loop():
     """Main display loop that updates the console"""
@@ -435,7 +259,7 @@ def display_loop():
             
             # Print footer
             print("=" * 50)
-            print(f"Monitoring... Press Ctrl+C to exit | Log: {log_file}")
+            print(f"Monitoring... Press Ctrl+C to exit | Log: {log_file} | {latency_report(exchange)}")
             
             # Update line count
             screen_lines = len(symbols) + 15 + len(divergence_history[-10:]) * 3
@@ -459,9 +283,9 @@ if __name__ == "__main__":
         except:
             pass
     
-    # Start live price updater thread
-    price_thread = threading.Thread(target=update_live_prices, daemon=True)
-    price_thread.start()
+    # Start live price updater thread (one bulk ticker request per refresh)
+    live_prices.start()
+    alerts.start()
     
     # Start divergence checker thread
     divergence_thread = threading.Thread(target=check_divergences, daemon=True)
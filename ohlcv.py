@@ -0,0 +1,112 @@
+import threading
+from typing import List, Optional, Sequence
+
+import numpy as np
+
+COLUMNS = ('timestamp', 'open', 'high', 'low', 'close', 'volume')
+
+
+class OHLCV:
+    """
+    A candle series as six contiguous float64 column arrays.
+
+    Built from one (6 x n) block, so each column is a plain contiguous view
+    the indicator kernels can use directly, with no per-column copies.
+    """
+
+    __slots__ = ('data',)
+
+    def __init__(self, data: np.ndarray):
+        self.data = data  # Shape (6, n), one row per column
+
+    @classmethod
+    def from_rows(cls, rows: Sequence[Sequence[float]]) -> "OHLCV":
+        """From ccxt-style [timestamp, open, high, low, close, volume] rows"""
+        rows = np.asarray(rows, dtype=np.float64).reshape(-1, 6)
+        return cls(np.ascontiguousarray(rows.T))
+
+    @classmethod
+    def empty(cls) -> "OHLCV":
+        return cls(np.empty((6, 0)))
+
+    def __len__(self) -> int:
+        return self.data.shape[1]
+
+    def __getitem__(self, index: slice) -> "OHLCV":
+        if not isinstance(index, slice):
+            raise TypeError("OHLCV only supports slicing; use to_rows() for single candles")
+        return OHLCV(self.data[:, index])
+
+    timestamp = property(lambda self: self.data[0])
+    open = property(lambda self: self.data[1])
+    high = property(lambda self: self.data[2])
+    low = property(lambda self: self.data[3])
+    close = property(lambda self: self.data[4])
+    volume = property(lambda self: self.data[5])
+
+    def to_rows(self) -> List[list]:
+        rows = self.data.T.tolist()
+        for row in rows:
+            row[0] = int(row[0])
+        return rows
+
+
+class CandleBuffer:
+    """
+    Fixed-capacity candle window kept in place as column arrays.
+
+    Candles are written into a block twice the capacity wide; when the
+    write position reaches the end, the live window is moved back to the
+    front once, so appends stay amortised O(1) and the window is always one
+    contiguous slice. merge() follows ccxt semantics: a row with the same
+    timestamp as the last one replaces it (the forming candle), newer rows
+    are appended.
+    """
+
+    def __init__(self, capacity: int = 1000):
+        self.capacity = capacity
+        self._block = np.empty((6, capacity * 2))
+        self._start = 0
+        self._end = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return self._end - self._start
+
+    @property
+    def last_timestamp(self) -> Optional[int]:
+        return int(self._block[0, self._end - 1]) if self._end > self._start else None
+
+    def clear(self):
+        with self._lock:
+            self._start = self._end = 0
+
+    def merge(self, rows: Sequence[Sequence[float]]) -> int:
+        """Apply ccxt rows (oldest first); returns how many new candles were added"""
+        if not len(rows):
+            return 0
+        incoming = np.asarray(rows, dtype=np.float64).reshape(-1, 6)
+        with self._lock:
+            if self._end > self._start:
+                last = self._block[0, self._end - 1]
+                incoming = incoming[incoming[:, 0] >= last]
+                if len(incoming) and incoming[0, 0] == last:
+                    self._block[:, self._end - 1] = incoming[0]
+                    incoming = incoming[1:]
+            if len(incoming) > self.capacity:
+                incoming = incoming[-self.capacity:]
+            added = len(incoming)
+            if self._end + added > self._block.shape[1]:
+                keep = min(self._end - self._start, self.capacity - added)
+                self._block[:, :keep] = self._block[:, self._end - keep:self._end]
+                self._start, self._end = 0, keep
+            self._block[:, self._end:self._end + added] = incoming.T
+            self._end += added
+            self._start = max(self._start, self._end - self.capacity)
+            return added
+
+    def view(self, limit: Optional[int] = None) -> OHLCV:
+        """Latest `limit` candles as an OHLCV copy, safe to keep while the buffer moves on"""
+        with self._lock:
+            start = self._start if limit is None else max(self._start, self._end - limit)
+            return OHLCV(self._block[:, start:self._end].copy())
@@ -0,0 +1,69 @@
+import numpy as np
+
+
+def _rolling_extreme(data: np.ndarray, window: int, op: np.ufunc, fill: float) -> np.ndarray:
+    """
+    Sliding-window max/min in linear time (van Herk / Gil-Werman).
+
+    The series is cut into blocks of `window` bars; every window spans at most
+    two blocks, so its extreme is op(suffix of the first, prefix of the second).
+    Returns one value per full window, i.e. len(data) - window + 1 values.
+    """
+    n = len(data)
+    if n < window:
+        return np.empty(0, dtype=np.float64)
+
+    n_blocks = -(-n // window)
+    padded = np.full(n_blocks * window, fill, dtype=np.float64)
+    padded[:n] = data
+    blocks = padded.reshape(n_blocks, window)
+
+    prefix = op.accumulate(blocks, axis=1).ravel()
+    suffix = op.accumulate(blocks[:, ::-1], axis=1)[:, ::-1].ravel()
+
+    starts = np.arange(n - window + 1)
+    return op(suffix[starts], prefix[starts + window - 1])
+
+
+def rolling_max(data, window: int) -> np.ndarray:
+    """Max of every full `window`-bar slice of data"""
+    return _rolling_extreme(np.asarray(data, dtype=np.float64), window, np.maximum, -np.inf)
+
+
+def rolling_min(data, window: int) -> np.ndarray:
+    """Min of every full `window`-bar slice of data"""
+    return _rolling_extreme(np.asarray(data, dtype=np.float64), window, np.minimum, np.inf)
+
+
+def find_pivot_highs(data, lbL: int, lbR: int) -> np.ndarray:
+    """Indices whose value is the max of the lbL bars before and lbR bars after"""
+    data = np.asarray(data, dtype=np.float64)
+    n = len(data)
+    if n < lbL + lbR + 1:
+        return np.empty(0, dtype=np.intp)
+    return np.flatnonzero(data[lbL:n - lbR] == rolling_max(data, lbL + lbR + 1)) + lbL
+
+
+def find_pivot_lows(data, lbL: int, lbR: int) -> np.ndarray:
+    """Indices whose value is the min of the lbL bars before and lbR bars after"""
+    data = np.asarray(data, dtype=np.float64)
+    n = len(data)
+    if n < lbL + lbR + 1:
+        return np.empty(0, dtype=np.intp)
+    return np.flatnonzero(data[lbL:n - lbR] == rolling_min(data, lbL + lbR + 1)) + lbL
+
+
+def find_pivots(data, lbL: int, lbR: int):
+    """Pivot highs and pivot lows of one series as (highs, lows) index arrays"""
+    data = np.asarray(data, dtype=np.float64)
+    return find_pivot_highs(data, lbL, lbR), find_pivot_lows(data, lbL, lbR)
+
+
+def find_peaks(data, min_distance: int = 5) -> np.ndarray:
+    """Bars that are the highest within min_distance bars on both sides"""
+    return find_pivot_highs(data, min_distance, min_distance)
+
+
+def find_troughs(data, min_distance: int = 5) -> np.ndarray:
+    """Bars that are the lowest within min_distance bars on both sides"""
+    return find_pivot_lows(data, min_distance, min_distance)
@@ -0,0 +1,239 @@
+import multiprocessing
+import os
+import time
+from collections import deque
+from datetime import datetime
+from typing import List, Tuple
+
+import numpy as np
+
+from alerts import Alert, AlertDispatcher, AudioSink, FileSink
+from audio import SoundPlayer
+from candle_cache import CandleCache
+from divergence import BULLISH_TYPES, DivergenceDetector
+from exchange_client import create_client
+from indicators import RSIState
+from scheduler import DEFAULT_SETTLE_SECONDS
+from shared_snapshot import SharedSnapshot, divergence_bits, divergence_types, stale_rows
+from timeframes import next_bar_close
+from universe import Universe, shard
+
+# Configuration
+EXCHANGE_ID = 'mexc'
+USE_FAKE_EXCHANGE = False  # Scan the offline FakeExchange instead of MEXC
+symbols = ['XRP/USDT']  # Add your coins here
+scan_universe = False  # Scan every USDT perp on the exchange (see universe.py) instead of `symbols`
+universe_min_volume = 1_000_000  # Minimum 24h quote volume for scan_universe
+worker_processes = os.cpu_count() or 1  # Scanner processes, each owning a shard of the symbols
+timeframe = '5m'
+rsi_period = 14
+price_refresh_seconds = 5  # Live price refresh interval inside each worker
+display_refresh_seconds = 1
+play_sounds = True
+log_file = "divergence_log.txt"
+rows_shown = 20  # Active divergences listed on screen
+
+# Divergence detection parameters (from PineScript, as in new_logic.py)
+lbL = 5
+lbR = 5
+rangeUpper = 60
+rangeLower = 5
+enabled_divergences = ("regular_bullish", "regular_bearish")
+
+
+def create_exchange(names: List[str]):
+    if USE_FAKE_EXCHANGE:
+        from fake_exchange import FakeExchange
+        return FakeExchange(names)
+    return create_client(EXCHANGE_ID, market_type='swap')
+
+
+class SymbolState:
+    """RSI and divergence state of one symbol, fed closed candles like new_logic.py"""
+
+    def __init__(self):
+        self.rsi = RSIState(rsi_period)
+        self.detector = DivergenceDetector(lbL, lbR, rangeLower, rangeUpper, enabled_divergences)
+        self.event_count = 0
+
+    def update(self, ohlcv: List[list]) -> List[str]:
+        """Apply candles closed since the last call; returns divergences they confirmed"""
+        warm = self.rsi.last_timestamp is not None
+        events = []
+        for candle in ohlcv[:-1]:  # Last candle is still forming
+            if warm and candle[0] <= self.rsi.last_timestamp:
+                continue
+            rsi = self.rsi.update(candle[4], candle[0])
+            if rsi is not None:
+                events += self.detector.update(rsi, candle[3], candle[2])
+        # Divergences confirmed while replaying history are not new
+        return events if warm else []
+
+
+def _scan_shard(snapshot: SharedSnapshot, candle_cache: CandleCache, states, assignments):
+    min_bars = max(rangeUpper + lbL + lbR, 100)
+    for slot, symbol in assignments:
+        try:
+            ohlcv = candle_cache.get(symbol, timeframe, min_bars)
+        except Exception as e:
+            print(f"Fetch error for {symbol}: {e}")
+            continue
+        if len(ohlcv) < 2:
+            continue
+        state = states[symbol]
+        events = state.update(ohlcv)
+        fields = {
+            'bar_time': ohlcv[-2][0], 'price': ohlcv[-1][4],
+            'rsi': state.rsi.peek(ohlcv[-1][4]) if state.rsi.ready else np.nan,
+            'state': divergence_bits(t for t, active in state.detector.state.items() if active),
+        }
+        if events:
+            state.event_count += 1
+            fields.update(events=divergence_bits(events), event_count=state.event_count)
+        snapshot.write(slot, **fields)
+
+
+def _refresh_prices(snapshot: SharedSnapshot, exchange, assignments):
+    try:
+        tickers = exchange.fetch_tickers([symbol for _, symbol in assignments])
+    except Exception as e:
+        print(f"Ticker error: {e}")
+        return
+    for slot, symbol in assignments:
+        last = (tickers.get(symbol) or {}).get('last')
+        if last is not None:
+            snapshot.write(slot, price=last)
+
+
+def scan_worker(worker: int, snapshot_name: str, slots: int, assignments: List[Tuple[int, str]], stop):
+    """
+    Worker process: scans its (slot, symbol) shard at every bar close and
+    refreshes prices in between, publishing into the shared snapshot.
+    """
+    snapshot = SharedSnapshot.attach(snapshot_name, slots)
+    exchange = create_exchange([symbol for _, symbol in assignments])
+    Universe(exchange).markets()  # Disk-cached markets instead of a load_markets per worker
+    candle_cache = CandleCache(exchange)
+    states = {symbol: SymbolState() for _, symbol in assignments}
+    for slot, _ in assignments:
+        snapshot.write(slot, worker=worker)
+
+    next_scan = 0.0
+    try:
+        while not stop.is_set():
+            if time.time() >= next_scan:
+                _scan_shard(snapshot, candle_cache, states, assignments)
+                next_scan = next_bar_close(timeframe, time.time()) + DEFAULT_SETTLE_SECONDS
+            else:
+                _refresh_prices(snapshot, exchange, assignments)
+            stop.wait(max(0.0, min(price_refresh_seconds, next_scan - time.time())))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        snapshot.close()
+
+
+def start_workers(names: List[str], workers: int):
+    """Create the snapshot and one spawned process per non-empty shard"""
+    snapshot = SharedSnapshot.create(names)
+    slots = {symbol: slot for slot, symbol in enumerate(names)}
+    context = multiprocessing.get_context('spawn')
+    stop = context.Event()
+    processes = []
+    for worker, symbols_ in enumerate(shard(names, workers)):
+        if not symbols_:
+            continue
+        assignments = [(slots[symbol], symbol) for symbol in symbols_]
+        process = context.Process(target=scan_worker, args=(worker, snapshot.name, len(names), assignments, stop),
+                                  name=f"scanner-{worker}", daemon=True)
+        process.start()
+        processes.append(process)
+    return snapshot, processes, stop
+
+
+def stop_workers(snapshot: SharedSnapshot, processes, stop, timeout: float = 10.0):
+    stop.set()
+    for process in processes:
+        process.join(timeout)
+        if process.is_alive():
+            process.terminate()
+    snapshot.close()
+
+
+def create_alert_dispatcher() -> AlertDispatcher:
+    sinks = [FileSink(log_file)]
+    if play_sounds:
+        bullish_sound = "XRP-1m-bullish.wav" if timeframe == '1m' else "XRP-5m-Bullish.wav"
+        bearish_sound = "XRP-1m-bearish.wav" if timeframe == '1m' else "XRP-5m-Bearish.wav"
+        sounds = SoundPlayer.from_files([bullish_sound, bearish_sound])
+        sinks.append(AudioSink(lambda alert: sounds.play(
+            bullish_sound if alert.kind in BULLISH_TYPES else bearish_sound, repeat=2)))
+    return AlertDispatcher(sinks)
+
+
+def dispatch_new_events(rows: np.ndarray, seen: np.ndarray, alerts: AlertDispatcher, history: deque) -> np.ndarray:
+    """Alert on rows whose event_count moved since `seen`; returns the counts to compare with next time"""
+    stale = stale_rows(rows)
+    for slot in np.flatnonzero((rows['event_count'] != seen) & ~stale):
+        symbol = rows['symbol'][slot].decode()
+        price = float(rows['price'][slot])
+        missed = int(rows['event_count'][slot] - seen[slot])  # More than 1 if events piled up between reads
+        for div_type in divergence_types(int(rows['events'][slot])):
+            alerts.dispatch(Alert(symbol, div_type, div_type.replace('_', ' ').title(), price,
+                                  source='process_scanner', count=missed))
+            history.append(f"{datetime.now().strftime('%H:%M:%S')} {symbol} {div_type} at {price:.4f}")
+    return np.where(stale, seen, rows['event_count'])  # A stale row is checked again on the next read
+
+
+def render(rows: np.ndarray, processes, history: deque) -> str:
+    alive = sum(process.is_alive() for process in processes)
+    now = time.time()
+    updated = rows['updated'] > 0
+    age = f"{now - rows['updated'][updated].min():.0f}s" if updated.any() else "-"
+    lines = [
+        f"RSI Divergence Monitor, {len(processes)} worker processes ({timeframe}) | "
+        f"{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}",
+        "=" * 70,
+        f"Workers alive: {alive}/{len(processes)} | Symbols: {int(updated.sum())}/{len(rows)} reporting | "
+        f"Oldest update: {age}",
+        "-" * 70,
+        "CURRENT DIVERGENCES:",
+    ]
+    active = np.flatnonzero((rows['state'] != 0) & ~stale_rows(rows))
+    for slot in active[:rows_shown]:
+        kinds = ', '.join(t.replace('_', ' ').upper() for t in divergence_types(int(rows['state'][slot])))
+        lines.append(f"  {rows['symbol'][slot].decode():<20} {rows['price'][slot]:>12.4f}  "
+                     f"RSI {rows['rsi'][slot]:5.1f}  {kinds}")
+    if len(active) > rows_shown:
+        lines.append(f"  ... and {len(active) - rows_shown} more")
+    if not len(active):
+        lines.append("  No current divergences")
+    lines += ["-" * 70, "RECENT ALERTS (newest first):"]
+    lines += [f"  {entry}" for entry in reversed(history)] or ["  None yet"]
+    lines += ["=" * 70, f"Monitoring... Press Ctrl+C to exit | Log: {log_file}"]
+    return "\n".join(lines)
+
+
+def main():
+    names = symbols
+    if scan_universe:
+        names = Universe(create_exchange(symbols)).symbols('swap', 'USDT', universe_min_volume)
+    snapshot, processes, stop = start_workers(names, min(worker_processes, len(names)))
+    alerts = create_alert_dispatcher().start()
+    history = deque(maxlen=10)
+    seen = snapshot.read()['event_count']
+    try:
+        while True:
+            rows = snapshot.read()
+            seen = dispatch_new_events(rows, seen, alerts, history)
+            print("\033[H\033[J" + render(rows, processes, history), flush=True)
+            time.sleep(display_refresh_seconds)
+    except KeyboardInterrupt:
+        print("\nExiting...")
+    finally:
+        stop_workers(snapshot, processes, stop)
+        alerts.stop(timeout=5)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,259 @@
+import asyncio
+import heapq
+import inspect
+import itertools
+import os
+import struct
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+# MEXC published limits per market type: (bucket capacity, refill window in seconds, weights by call).
+# Spot v3 shares 500 weight per 10 s per IP; the contract API allows 20 calls per 2 s per endpoint.
+RATE_LIMITS = {
+    'spot': (500, 10.0, {'fetch_ohlcv': 1, 'fetch_ticker': 1, 'fetch_tickers': 40, 'load_markets': 10}),
+    'swap': (20, 2.0, {'fetch_ohlcv': 1, 'fetch_ticker': 1, 'fetch_tickers': 1, 'load_markets': 2}),
+}
+
+# Priority classes, most urgent first, with the share of the bucket each must leave for the ones above it
+PRIORITIES = ('candles', 'default', 'ticker')
+PRIORITY_RESERVE = {'candles': 0.0, 'default': 0.2, 'ticker': 0.5}
+METHOD_PRIORITIES = {'fetch_ohlcv': 'candles', 'fetch_ticker': 'ticker', 'fetch_tickers': 'ticker'}
+
+RATE_LIMIT_PAUSE_SECONDS = 10.0  # Bucket is emptied for this long after a 429
+
+
+class TokenBucket:
+    """
+    Token bucket refilled continuously at capacity / window tokens per second.
+    take() never blocks: it either takes the tokens or says how long to wait.
+    """
+
+    def __init__(self, capacity: float, window: float):
+        self.capacity = capacity
+        self.rate = capacity / window
+        self.tokens = float(capacity)
+        self.updated = time.time()
+        self._lock = threading.Lock()
+
+    def _refill(self, tokens: float, updated: float, now: float):
+        return min(self.capacity, tokens + max(0.0, now - updated) * self.rate), max(updated, now)
+
+    def _apply(self, tokens: float, updated: float, weight: float, reserve: float, now: float):
+        """New (tokens, updated) and the wait in seconds, 0 if the tokens were taken"""
+        tokens, updated = self._refill(tokens, updated, now)
+        if updated > now:  # Paused after a 429
+            return tokens, updated, updated - now
+        if tokens - weight >= reserve:
+            return tokens - weight, updated, 0.0
+        return tokens, updated, (weight + reserve - tokens) / self.rate
+
+    def take(self, weight: float, reserve: float = 0.0) -> float:
+        """Take `weight` tokens if `reserve` tokens remain afterwards; else the seconds to wait"""
+        with self._lock:
+            self.tokens, self.updated, wait = self._apply(self.tokens, self.updated, weight, reserve, time.time())
+            return wait
+
+    def pause(self, seconds: float):
+        """Empty the bucket and stop refilling for `seconds`"""
+        with self._lock:
+            self.tokens, self.updated = 0.0, time.time() + seconds
+
+
+class FileTokenBucket(TokenBucket):
+    """
+    TokenBucket whose state lives in a small file guarded by an OS file lock,
+    so every process on the machine draws from the same bucket.
+    """
+
+    _STATE = struct.Struct('<dd')  # tokens, updated
+
+    def __init__(self, capacity: float, window: float, path: str):
+        super().__init__(capacity, window)
+        self.path = path
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self._file = open(path, 'a+b')
+
+    @contextmanager
+    def _locked(self):
+        with self._lock:  # flock does not exclude threads sharing the file
+            self._file.seek(0)
+            if os.name == 'nt':
+                import msvcrt
+                msvcrt.locking(self._file.fileno(), msvcrt.LK_LOCK, 1)
+            else:
+                import fcntl
+                fcntl.flock(self._file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                self._file.seek(0)
+                if os.name == 'nt':
+                    import msvcrt
+                    msvcrt.locking(self._file.fileno(), msvcrt.LK_UNLCK, 1)
+                else:
+                    import fcntl
+                    fcntl.flock(self._file, fcntl.LOCK_UN)
+
+    def _read(self):
+        self._file.seek(0)
+        data = self._file.read(self._STATE.size)
+        if len(data) < self._STATE.size:
+            return float(self.capacity), time.time()  # New file: start full
+        return self._STATE.unpack(data)
+
+    def _write(self, tokens: float, updated: float):
+        self._file.seek(0)
+        self._file.truncate()
+        self._file.write(self._STATE.pack(tokens, updated))
+        self._file.flush()
+
+    def take(self, weight: float, reserve: float = 0.0) -> float:
+        with self._locked():
+            tokens, updated, wait = self._apply(*self._read(), weight, reserve, time.time())
+            self._write(tokens, updated)
+            return wait
+
+    def pause(self, seconds: float):
+        with self._locked():
+            self._write(0.0, time.time() + seconds)
+
+
+def shared_bucket_path(exchange_id: str, market_type: str) -> str:
+    """Machine-wide state file, the same whichever directory a script runs from"""
+    return os.path.join(tempfile.gettempdir(), f"rsi-code-ratelimit-{exchange_id}-{market_type}.bin")
+
+
+class RateLimiter:
+    """
+    Hands out bucket tokens by priority.
+
+    Within a process, waiting requests queue in priority order and only the
+    head of the queue draws from the bucket. Across processes (FileTokenBucket)
+    priority comes from the reserve: a lower class may only draw while its
+    PRIORITY_RESERVE share of the bucket stays untouched for the classes above.
+    """
+
+    def __init__(self, bucket: TokenBucket):
+        self.bucket = bucket
+        self._waiting = []
+        self._counter = itertools.count()
+        self._condition = threading.Condition()
+
+    def acquire(self, weight: float = 1, priority: str = 'default'):
+        """Block until `weight` tokens are granted to this request"""
+        weight = min(weight, self.bucket.capacity)
+        reserve = PRIORITY_RESERVE[priority] * self.bucket.capacity
+        ticket = (PRIORITIES.index(priority), next(self._counter))
+        with self._condition:
+            heapq.heappush(self._waiting, ticket)
+            self._condition.notify_all()  # A more urgent request may have jumped the queue
+            try:
+                while True:
+                    wait = None
+                    if self._waiting[0] == ticket:
+                        wait = self.bucket.take(weight, reserve)
+                        if wait == 0:
+                            return
+                    self._condition.wait(wait)
+            finally:
+                self._waiting.remove(ticket)
+                heapq.heapify(self._waiting)
+                self._condition.notify_all()
+
+    def try_acquire(self, weight: float = 1, priority: str = 'default') -> bool:
+        """Take `weight` tokens only if that needs no waiting and nobody is queued"""
+        weight = min(weight, self.bucket.capacity)
+        with self._condition:
+            if self._waiting:
+                return False
+            return self.bucket.take(weight, PRIORITY_RESERVE[priority] * self.bucket.capacity) == 0
+
+
+class RateLimitedExchange:
+    """
+    Wraps a synchronous ccxt client so every weighted call waits for the
+    limiter first. Everything else is passed through untouched. A
+    RateLimitExceeded from the exchange pauses the whole bucket.
+    """
+
+    def __init__(self, exchange, limiter: RateLimiter, weights: Dict[str, float]):
+        self.exchange = exchange
+        self.limiter = limiter
+        self.weights = weights
+
+    def __getattr__(self, name):
+        attribute = getattr(self.exchange, name)
+        if name not in self.weights or not callable(attribute):
+            return attribute
+
+        def call(*args, **kwargs):
+            self.acquire(name)
+            return self.call_granted(name, *args, **kwargs)
+        return call
+
+    def acquire(self, name: str, blocking: bool = True) -> bool:
+        """Take the tokens for one `name` call; without `blocking`, False instead of waiting"""
+        priority = METHOD_PRIORITIES.get(name, 'default')
+        if blocking:
+            self.limiter.acquire(self.weights[name], priority)
+            return True
+        return self.limiter.try_acquire(self.weights[name], priority)
+
+    def call_granted(self, name: str, *args, **kwargs):
+        """Make a call whose tokens were already taken with acquire()"""
+        try:
+            return getattr(self.exchange, name)(*args, **kwargs)
+        except Exception as e:
+            if any(cls.__name__ == 'RateLimitExceeded' for cls in type(e).__mro__):
+                self.limiter.bucket.pause(RATE_LIMIT_PAUSE_SECONDS)
+            raise
+
+
+class AsyncRateLimitedExchange(RateLimitedExchange):
+    """
+    RateLimitedExchange for a ccxt.async_support client. The blocking
+    limiter wait runs in the loop's executor, so async requests queue in the
+    same priority order and bucket as the synchronous ones.
+    """
+
+    def __getattr__(self, name):
+        attribute = getattr(self.exchange, name)
+        if name not in self.weights or not callable(attribute):
+            return attribute
+
+        async def call(*args, **kwargs):
+            await self.acquire_async(name)
+            return await self.call_granted(name, *args, **kwargs)
+        return call
+
+    async def acquire_async(self, name: str):
+        """acquire() without blocking the event loop"""
+        await asyncio.get_running_loop().run_in_executor(None, self.acquire, name)
+
+    async def call_granted(self, name: str, *args, **kwargs):
+        try:
+            return await getattr(self.exchange, name)(*args, **kwargs)
+        except Exception as e:
+            if any(cls.__name__ == 'RateLimitExceeded' for cls in type(e).__mro__):
+                self.limiter.bucket.pause(RATE_LIMIT_PAUSE_SECONDS)
+            raise
+
+
+def rate_limited(exchange, shared: bool = True, market_type: Optional[str] = None) -> RateLimitedExchange:
+    """
+    Put `exchange` behind the MEXC limits for its market type. With `shared`
+    every process on the machine draws from one file-backed bucket. Clients
+    from ccxt.async_support get an AsyncRateLimitedExchange.
+    """
+    options = getattr(exchange, 'options', None) or {}
+    market_type = market_type or ('swap' if options.get('defaultType') in ('swap', 'future') else 'spot')
+    capacity, window, weights = RATE_LIMITS[market_type]
+    if shared:
+        bucket = FileTokenBucket(capacity, window, shared_bucket_path(exchange.id, market_type))
+    else:
+        bucket = TokenBucket(capacity, window)
+    wrapper = AsyncRateLimitedExchange if inspect.iscoroutinefunction(exchange.fetch_ohlcv) else RateLimitedExchange
+    return wrapper(exchange, RateLimiter(bucket), weights)
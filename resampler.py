@@ -0,0 +1,165 @@
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from timeframes import bar_open_ms, timeframe_ms
+
+BASE_TIMEFRAME = '1m'
+
+
+def resample(ohlcv, timeframe: str) -> np.ndarray:
+    """
+    Aggregate candles into `timeframe` buckets in one pass.
+    The last bucket may be partial; callers decide whether it has closed.
+    """
+    candles = np.asarray(ohlcv, dtype=np.float64)
+    if len(candles) == 0:
+        return np.empty((0, 6))
+    step = timeframe_ms(timeframe)
+    buckets = candles[:, 0] // step * step
+    starts = np.flatnonzero(np.concatenate(([True], buckets[1:] != buckets[:-1])))
+    ends = np.append(starts[1:], len(candles)) - 1
+    return np.column_stack((
+        buckets[starts],
+        candles[starts, 1],
+        np.maximum.reduceat(candles[:, 2], starts),
+        np.minimum.reduceat(candles[:, 3], starts),
+        candles[ends, 4],
+        np.add.reduceat(candles[:, 5], starts),
+    ))
+
+
+class Resampler:
+    """
+    Builds higher-timeframe candles from closed base (1m) candles.
+
+    Each new base candle only touches the open bucket of every timeframe. A
+    bucket is emitted as soon as its last base candle arrives, or, if that
+    one is missing, when the first candle of a later bucket shows up.
+
+    Without a seed, the first bucket usually starts mid-way (at start-up) and
+    only covers part of its period; it is dropped instead of being emitted
+    as a closed candle.
+    """
+
+    def __init__(self, timeframes: List[str], base: str = BASE_TIMEFRAME):
+        self.base = base
+        self.base_ms = timeframe_ms(base)
+        self.timeframes = [tf for tf in timeframes if tf != base]
+        self.current: Dict[str, Optional[list]] = {tf: None for tf in self.timeframes}
+        self.last_closed: Dict[str, Optional[int]] = {tf: None for tf in self.timeframes}
+        self._partial: Dict[str, bool] = {tf: False for tf in self.timeframes}  # Open bucket missed its start
+
+    def seed(self, timeframe: str, last_closed_open: int):
+        """Mark buckets up to `last_closed_open` as already known (e.g. fetched over REST)"""
+        self.last_closed[timeframe] = last_closed_open
+        if self.current[timeframe] is not None and self.current[timeframe][0] <= last_closed_open:
+            self.current[timeframe] = None
+            self._partial[timeframe] = False
+
+    def add(self, candle: list) -> List[Tuple[str, list]]:
+        """Apply one closed base candle; returns (timeframe, candle) for buckets it closed"""
+        closed = []
+        for timeframe in self.timeframes:
+            bucket = bar_open_ms(int(candle[0]), timeframe)
+            last = self.last_closed[timeframe]
+            if last is not None and bucket <= last:
+                continue
+            current = self.current[timeframe]
+            if current is not None and current[0] != bucket:
+                self._close(timeframe, current, closed)
+                current = None
+            if current is None:
+                current = [bucket, candle[1], candle[2], candle[3], candle[4], candle[5]]
+                # Nothing before this bucket is known, so a late start means start-up, not a gap
+                self._partial[timeframe] = last is None and candle[0] != bucket
+            else:
+                current[2] = max(current[2], candle[2])
+                current[3] = min(current[3], candle[3])
+                current[4] = candle[4]
+                current[5] += candle[5]
+
+            if candle[0] + self.base_ms == bucket + timeframe_ms(timeframe):
+                self._close(timeframe, current, closed)
+                current = None
+            self.current[timeframe] = current
+        return closed
+
+    def _close(self, timeframe: str, bucket: list, closed: List[Tuple[str, list]]):
+        if not self._partial[timeframe]:
+            closed.append((timeframe, bucket))
+        self._partial[timeframe] = False
+        self.last_closed[timeframe] = bucket[0]
+
+    def forming(self, timeframe: str) -> Optional[list]:
+        """The still-open bucket of `timeframe`, if any"""
+        return self.current.get(timeframe)
+
+
+class ResampledFeed:
+    """
+    Closed candle series per symbol for every timeframe, fed from 1m only.
+
+    Higher timeframes are fetched once per symbol to seed their history; from
+    then on only the base timeframe is polled and the rest are resampled.
+    """
+
+    def __init__(self, candle_cache, timeframes: List[str], history: int = 300, base: str = BASE_TIMEFRAME):
+        self.candle_cache = candle_cache
+        self.base = base
+        self.timeframes = sorted(set(timeframes) | {base}, key=timeframe_ms)
+        self.history = history
+        self._series: Dict[Tuple[str, str], deque] = {}
+        self._resamplers: Dict[str, Resampler] = {}
+        self._last_base: Dict[str, int] = {}
+
+    def _closed(self, symbol: str, timeframe: str, now_ms: int) -> List[list]:
+        step = timeframe_ms(timeframe)
+        # Enough base candles to rebuild the open bucket of the longest timeframe
+        limit = self.history + 1
+        if timeframe == self.base:
+            limit = max(limit, timeframe_ms(self.timeframes[-1]) // step + 1)
+        ohlcv = self.candle_cache.get(symbol, timeframe, limit)
+        return [list(candle) for candle in ohlcv if candle[0] + step <= now_ms]
+
+    def _seed(self, symbol: str, now_ms: int):
+        resampler = self._resamplers[symbol] = Resampler(self.timeframes, self.base)
+        for timeframe in resampler.timeframes:
+            closed = self._closed(symbol, timeframe, now_ms)
+            self._series[(symbol, timeframe)] = deque(closed, maxlen=self.history)
+            if closed:
+                resampler.seed(timeframe, closed[-1][0])
+
+        base = self._closed(symbol, self.base, now_ms)
+        self._series[(symbol, self.base)] = deque(base, maxlen=self.history)
+        for candle in base:
+            for timeframe, bucket in resampler.add(candle):
+                self._series[(symbol, timeframe)].append(bucket)
+        if base:
+            self._last_base[symbol] = base[-1][0]
+
+    def update(self, symbol: str, now_ms: int) -> List[str]:
+        """Pull new 1m candles for `symbol`; returns timeframes that gained a closed bar"""
+        if symbol not in self._resamplers:
+            self._seed(symbol, now_ms)
+            return list(self.timeframes)
+
+        last = self._last_base.get(symbol)
+        fresh = [c for c in self._closed(symbol, self.base, now_ms) if last is None or c[0] > last]
+        if not fresh:
+            return []
+        self._series[(symbol, self.base)].extend(fresh)
+        self._last_base[symbol] = fresh[-1][0]
+
+        updated = {self.base}
+        resampler = self._resamplers[symbol]
+        for candle in fresh:
+            for timeframe, bucket in resampler.add(candle):
+                self._series[(symbol, timeframe)].append(bucket)
+                updated.add(timeframe)
+        return [tf for tf in self.timeframes if tf in updated]
+
+    def candles(self, symbol: str, timeframe: str) -> np.ndarray:
+        """Closed candles for (symbol, timeframe) as an (n x 6) array"""
+        return np.array(self._series.get((symbol, timeframe), ()), dtype=np.float64).reshape(-1, 6)
@@ -0,0 +1,266 @@
+import asyncio
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from functools import partial
+from typing import Dict, Optional
+
+from rate_limit import RateLimitedExchange
+from timeframes import bar_open_ms, timeframe_ms
+
+# Calls that get retries and a circuit breaker; only idempotent reads belong here
+RETRIED_METHODS = ('fetch_ohlcv', 'fetch_ticker', 'fetch_tickers')
+
+BASE_DELAY_SECONDS = 0.5  # First backoff; doubles per attempt, with full jitter
+MAX_DELAY_SECONDS = 8.0
+RATE_LIMIT_DELAY_SECONDS = 2.0  # First backoff after a 429 (the shared bucket is paused as well)
+DEADLINE_SECONDS = 20.0  # No retry is started that would end past this, so one call never stalls a scan longer
+
+BREAKER_FAILURES = 5  # Consecutive failed attempts that open an endpoint's breaker
+BREAKER_RESET_SECONDS = 30.0  # Open time before a single trial call is let through
+
+HEDGE_AFTER_SECONDS = 1.5  # Send a second copy of a hedged call still running after this long...
+HEDGE_MIN_SECONDS = 0.3
+HEDGE_QUANTILE = 0.95  # ...or sooner, after the p95 of its recent latencies once there are enough
+HEDGE_SAMPLES = 20
+
+
+def is_bar_close_fetch(method: str, args, kwargs, now_ms: Optional[float] = None) -> bool:
+    """
+    fetch_ohlcv from a `since` with no `limit` (CandleCache's incremental
+    poll) whose `since` bar closed within the last bar: the first poll after
+    a close, which picks up the bar that just closed. Polls in the middle of
+    a bar, catch-ups after an outage, refills and backfill pages are not.
+    """
+    if method != 'fetch_ohlcv':
+        return False
+    since = kwargs.get('since', args[2] if len(args) > 2 else None)
+    limit = kwargs.get('limit', args[3] if len(args) > 3 else None)
+    if since is None or limit is not None:
+        return False
+    timeframe = kwargs.get('timeframe', args[1] if len(args) > 1 else '1m')
+    try:
+        step = timeframe_ms(timeframe)
+    except ValueError:
+        return False
+    now_ms = time.time() * 1000 if now_ms is None else now_ms
+    closed_at = bar_open_ms(int(since), timeframe) + step
+    return closed_at <= now_ms < closed_at + step
+
+
+def error_kind(error: BaseException) -> str:
+    """
+    'rate_limit', 'network', 'exchange' or 'other'. ccxt is matched by class
+    name so this module works without it; RateLimitExceeded and
+    ExchangeNotAvailable are NetworkError subclasses, so order matters.
+    """
+    names = {cls.__name__ for cls in type(error).__mro__}
+    if names & {'RateLimitExceeded', 'DDoSProtection'}:
+        return 'rate_limit'
+    if 'NetworkError' in names:
+        return 'network'
+    if 'ExchangeError' in names:
+        return 'exchange'
+    return 'other'
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling an endpoint whose breaker is open"""
+
+    def __init__(self, endpoint: str, retry_in: float):
+        super().__init__(f"{endpoint} circuit open after repeated failures, retrying in {retry_in:.0f}s")
+        self.endpoint = endpoint
+        self.retry_in = retry_in
+
+
+class CircuitBreaker:
+    """
+    Closed: calls go through and consecutive failures are counted. After
+    `failures` in a row it opens and calls fail fast for `reset_seconds`;
+    then one trial call is let through (half-open), which closes the
+    breaker on success and reopens it on failure.
+    """
+
+    def __init__(self, endpoint: str, failures: int = BREAKER_FAILURES, reset_seconds: float = BREAKER_RESET_SECONDS):
+        self.endpoint = endpoint
+        self.max_failures = failures
+        self.reset_seconds = reset_seconds
+        self.state = 'closed'
+        self.failures = 0
+        self.opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def before_call(self):
+        """Raise CircuitOpenError unless a call may go out now"""
+        with self._lock:
+            if self.state == 'closed':
+                return
+            retry_in = self.opened_at + self.reset_seconds - time.time()
+            if self.state == 'open' and retry_in <= 0:
+                self.state = 'half_open'  # This caller makes the trial call
+                return
+            raise CircuitOpenError(self.endpoint, max(0.0, retry_in))
+
+    def success(self):
+        with self._lock:
+            self.state = 'closed'
+            self.failures = 0
+
+    def failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == 'half_open' or self.failures >= self.max_failures:
+                if self.state != 'open':
+                    print(f"Circuit for {self.endpoint} opened after {self.failures} failures")
+                self.state = 'open'
+                self.opened_at = time.time()
+
+
+class ResilientExchange:
+    """
+    Wraps an exchange client (typically already rate limited) so the
+    RETRIED_METHODS retry with jittered exponential backoff inside a
+    deadline, each behind its own circuit breaker, and bar-close candle
+    fetches send a duplicate request when the first one is slower than
+    usual and take whichever answers first. A duplicate is only sent if the
+    rate limiter can grant it at once, so hedging never adds to a queue.
+
+    Network errors and timeouts are retried and count against the breaker;
+    rate limit errors are retried after a longer backoff without tripping
+    it; exchange errors (bad symbol, rejected parameters) are the caller's
+    problem and are raised at once, as is anything that is not a ccxt error.
+    """
+
+    def __init__(self, exchange, deadline: float = DEADLINE_SECONDS, hedge_workers: int = 4):
+        self.exchange = exchange
+        self.deadline = deadline
+        self.breakers: Dict[str, CircuitBreaker] = {method: CircuitBreaker(method) for method in RETRIED_METHODS}
+        self._latencies = deque(maxlen=200)  # Bar-close fetches, timed from the limiter grant
+        self._hedge_pool = ThreadPoolExecutor(max_workers=hedge_workers, thread_name_prefix='hedge')
+        self.hedges = 0  # Duplicate requests sent
+        self.hedge_wins = 0  # ...that answered first
+
+    def __getattr__(self, name):
+        attribute = getattr(self.exchange, name)
+        if name not in RETRIED_METHODS or not callable(attribute):
+            return attribute
+
+        def call(*args, **kwargs):
+            return self._call(name, attribute, args, kwargs)
+        return call
+
+    def hedge_delay(self) -> float:
+        """Seconds to wait on a bar-close fetch before duplicating it"""
+        samples = sorted(self._latencies)
+        if len(samples) < HEDGE_SAMPLES:
+            return HEDGE_AFTER_SECONDS
+        return min(HEDGE_AFTER_SECONDS, max(HEDGE_MIN_SECONDS, samples[int(HEDGE_QUANTILE * (len(samples) - 1))]))
+
+    def _attempt(self, method: str, function, args, kwargs):
+        """One try; bar-close fetches may make it with two requests in flight"""
+        if not is_bar_close_fetch(method, args, kwargs):
+            return function(*args, **kwargs)
+
+        # Take the limiter tokens here so the clock starts at the grant, not in the queue
+        limited = self.exchange if isinstance(self.exchange, RateLimitedExchange) else None
+        if limited is not None:
+            limited.acquire(method)
+            send = partial(limited.call_granted, method, *args, **kwargs)
+        else:
+            send = partial(function, *args, **kwargs)
+
+        started = time.time()
+        first = self._hedge_pool.submit(send)
+        done, _ = wait([first], timeout=self.hedge_delay())
+        pending = {first}
+        if not done and (limited is None or limited.acquire(method, blocking=False)):
+            self.hedges += 1
+            pending.add(self._hedge_pool.submit(send))
+        error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    self._latencies.append(time.time() - started)
+                    self.hedge_wins += future is not first
+                    return future.result()  # The slower copy finishes in the background and is dropped
+                error = future.exception()
+        raise error
+
+    def _backoff(self, method: str, breaker: CircuitBreaker, error: Exception, attempt: int,
+                 started: float) -> Optional[float]:
+        """Seconds to wait before retrying after `error`, or None to give up and raise it"""
+        kind = error_kind(error)
+        if kind == 'network':
+            breaker.failure()
+        elif kind == 'rate_limit':
+            breaker.success()  # The endpoint answered; the shared bucket handles the pause
+        else:
+            breaker.success()
+            return None
+        base = RATE_LIMIT_DELAY_SECONDS if kind == 'rate_limit' else BASE_DELAY_SECONDS
+        delay = random.uniform(0, min(MAX_DELAY_SECONDS, base * 2 ** attempt))
+        if breaker.state == 'open' or time.time() - started + delay > self.deadline:
+            return None
+        print(f"{method} {kind} error ({error}), retry {attempt + 1} in {delay:.1f}s")
+        return delay
+
+    def _call(self, method: str, function, args, kwargs):
+        breaker = self.breakers[method]
+        started = time.time()
+        attempt = 0
+        while True:
+            breaker.before_call()
+            try:
+                result = self._attempt(method, function, args, kwargs)
+            except Exception as e:
+                delay = self._backoff(method, breaker, e, attempt, started)
+                if delay is None:
+                    raise
+                attempt += 1
+                time.sleep(delay)
+                continue
+            breaker.success()
+            return result
+
+    def resilience_report(self) -> str:
+        """Open breakers and hedging counts, for the dashboards"""
+        tripped = [method for method, breaker in self.breakers.items() if breaker.state != 'closed']
+        return f"Circuits open: {', '.join(tripped) or 'none'} | Hedged {self.hedges}, won {self.hedge_wins}"
+
+
+class AsyncResilientExchange(ResilientExchange):
+    """
+    ResilientExchange for a ccxt.async_support client: the same retries,
+    backoff and circuit breakers, sleeping with asyncio. Calls are not
+    hedged; the async scanner already keeps many requests in flight.
+    """
+
+    def __getattr__(self, name):
+        attribute = getattr(self.exchange, name)
+        if name not in RETRIED_METHODS or not callable(attribute):
+            return attribute
+
+        async def call(*args, **kwargs):
+            return await self._call_async(name, attribute, args, kwargs)
+        return call
+
+    async def _call_async(self, method: str, function, args, kwargs):
+        breaker = self.breakers[method]
+        started = time.time()
+        attempt = 0
+        while True:
+            breaker.before_call()
+            try:
+                result = await function(*args, **kwargs)
+            except Exception as e:
+                delay = self._backoff(method, breaker, e, attempt, started)
+                if delay is None:
+                    raise
+                attempt += 1
+                await asyncio.sleep(delay)
+                continue
+            breaker.success()
+            return result
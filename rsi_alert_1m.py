@@ -1,16 +1,17 @@
 import ccxt
-import pandas as pd
-import pandas_ta as ta
 import time
-import os
 from typing import Optional
 from datetime import datetime
 
-# Conditional import for Windows-specific sound library
-try:
-    import winsound
-except ImportError:
-    winsound = None
+from alerts import Alert, AlertDispatcher, AudioSink
+from audio import SoundPlayer
+from candle_cache import CandleCache
+from candle_store import CandleStore
+from exchange_client import create_client
+from indicators import RSIState
+from live_prices import LivePriceService
+from resilience import CircuitOpenError
+from timeframes import timeframe_ms
 
 # --- Configuration ---
 SYMBOL = 'XRP/USDT'
@@ -22,75 +23,57 @@ CHECK_INTERVAL_SECONDS = 1  # Check every second
 ALERT_COOLDOWN_SECONDS = 300  # 5 minutes between same alerts
 
 # --- Alert Sound Configuration ---
-OVERBOUGHT_SOUND_FILE = 'overbought.wav'  # Must be a .wav file for winsound
-OVERSOLD_SOUND_FILE = 'oversold.wav'    # Must be a .wav file for winsound
+OVERBOUGHT_SOUND_FILE = 'overbought.wav'  # Must be a .wav file
+OVERSOLD_SOUND_FILE = 'oversold.wav'    # Must be a .wav file
 
 # --- Initialize Exchange for Perpetual Swaps ---
 # The user requested perpetuals, which requires setting the 'defaultType' to 'swap'.
-exchange = ccxt.mexc({
-    'options': {
-        'defaultType': 'swap',  # Use 'swap' for perpetuals, 'spot' for spot market
-    },
-})
+exchange = create_client('mexc', market_type='swap')  # Use 'swap' for perpetuals, 'spot' for spot market
+candle_cache = CandleCache(exchange)
+candle_store = CandleStore(exchange_id='mexc')  # Filled by `python candle_store.py backfill`
+live_prices = LivePriceService(exchange, [SYMBOL], CHECK_INTERVAL_SECONDS)
 
+sounds = SoundPlayer.from_files([OVERBOUGHT_SOUND_FILE, OVERSOLD_SOUND_FILE])
 
-def play_alert_sound(sound_file: str):
-    """
-    Plays a specified .wav sound file for an alert using winsound on Windows.
-    Falls back to a system beep if the file is not found or on other OS.
-    """
-    try:
-        # On Windows, use winsound to play the .wav file
-        if os.name == 'nt' and winsound:
-            if os.path.exists(sound_file):
-                # Play the specified .wav file. SND_FILENAME flag is crucial.
-                winsound.PlaySound(sound_file, winsound.SND_FILENAME)
-            else:
-                # If file is not found, print a warning and play a default beep
-                print(f"\nWarning: Sound file not found at '{sound_file}'. Falling back to system beep.", flush=True)
-                winsound.Beep(1000, 500)  # Fallback beep
-        else:
-            # For other operating systems (macOS, Linux), use a generic beep
-            # as winsound is not available.
-            print("\a", end='', flush=True)
-    except Exception as e:
-        print(f"\nCould not play alert sound '{sound_file}': {e}", flush=True)
-
-
-def calculate_rsi(closes: pd.Series, period: int) -> Optional[float]:
+alerts = AlertDispatcher([AudioSink(sounds.play_alert)])
+
+
+def warm_rsi_state(ohlcv: list) -> RSIState:
     """
-    Calculate RSI using pandas-ta library.
-    :param closes: A pandas Series of closing prices.
-    :param period: The lookback period for RSI.
-    :return: The latest RSI value, or None if calculation is not possible.
+    RSI state replayed over the stored history when the candle store reaches
+    the fetched candles, so the first reading already has long Wilder
+    smoothing behind it; a cold state if the store is empty or stale.
     """
-    if closes is None or len(closes) < period:
-        return None
-
-    # Calculate RSI using pandas-ta
-    rsi_series = ta.rsi(close=closes, length=period)
+    state = candle_store.warm_rsi_state(SYMBOL, TIMEFRAME, RSI_PERIOD)
+    if state.last_timestamp is None or state.last_timestamp < ohlcv[0][0] - timeframe_ms(TIMEFRAME):
+        return RSIState(RSI_PERIOD)
+    return state
 
-    if rsi_series is None or rsi_series.empty:
-        return None
 
-    # Return the last calculated RSI value
-    return rsi_series.iloc[-1]
+def update_rsi_state(state: RSIState, ohlcv: list) -> Optional[float]:
+    """
+    Apply newly closed candles to the RSI state and peek at the forming one.
+    :param state: RSIState carried over between polls.
+    :param ohlcv: ccxt OHLCV rows, the last row being the still-open candle.
+    :return: RSI including the forming candle, or None if not warmed up yet.
+    """
+    closed_candles, forming_candle = ohlcv[:-1], ohlcv[-1]
+    for candle in closed_candles:
+        if state.last_timestamp is None or candle[0] > state.last_timestamp:
+            state.update(candle[4], candle[0])
+    return state.peek(forming_candle[4])
 
 
 def get_current_price(symbol: str) -> Optional[float]:
-    """Fetches the last traded price for a symbol."""
-    try:
-        ticker = exchange.fetch_ticker(symbol)
-        return ticker['last']
-    except Exception as e:
-        print(f"Could not fetch current price for {symbol}: {e}")
-        return None
+    """Reads the last traded price for a symbol from the shared live price snapshot."""
+    return live_prices.get(symbol)
 
 
 def main():
     """Main function to run the RSI alert bot."""
     last_alert_type = None
     last_alert_time = 0
+    rsi_state = None  # Warmed from the candle store on the first fetch
 
     print(f"--- Starting RSI Alert Bot for {SYMBOL} on MEXC Perpetuals ---")
     print(f"Timeframe: {TIMEFRAME}, RSI Period: {RSI_PERIOD}")
@@ -98,23 +81,24 @@ def main():
     print(f"Check Interval: {CHECK_INTERVAL_SECONDS}s, Alert Cooldown: {ALERT_COOLDOWN_SECONDS}s")
     print("-" * 20)
 
+    live_prices.start()
+    alerts.start()
+
     while True:
         try:
             # Fetch more data to ensure indicator is "warmed up" and accurate
             limit = RSI_PERIOD * 10
-            ohlcv = exchange.fetch_ohlcv(SYMBOL, TIMEFRAME, limit=limit)
+            ohlcv = candle_cache.get(SYMBOL, TIMEFRAME, limit)
 
             if not ohlcv or len(ohlcv) < RSI_PERIOD + 1:
                 print(f"Warning: Not enough data for RSI. Found {len(ohlcv)} candles, need > {RSI_PERIOD + 1}.")
                 time.sleep(CHECK_INTERVAL_SECONDS)
                 continue
 
-            # Create a pandas DataFrame for easier manipulation
-            df = pd.DataFrame(ohlcv, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
-            df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
-
-            # Calculate RSI
-            current_rsi = calculate_rsi(df['close'], RSI_PERIOD)
+            if rsi_state is None:
+                rsi_state = warm_rsi_state(ohlcv)
+            # Only candles closed since the last poll touch the RSI state
+            current_rsi = update_rsi_state(rsi_state, ohlcv)
 
             if current_rsi is None:
                 print("Could not calculate RSI.")
@@ -160,7 +144,8 @@ def main():
                     sound_to_play = OVERSOLD_SOUND_FILE
 
                 if sound_to_play:
-                    play_alert_sound(sound_to_play)
+                    alerts.dispatch(Alert(SYMBOL, current_alert_type, status_message, current_price,
+                                          sound=sound_to_play, source='rsi_alert_1m'))
 
                 last_alert_time = time.time()
                 last_alert_type = current_alert_type
@@ -184,9 +169,14 @@ def main():
         except KeyboardInterrupt:
             print("\nScript interrupted by user. Goodbye!")
             break
+        except CircuitOpenError as e:
+            # MEXC keeps failing; the breaker answers at once until it lets a trial call through
+            print(f"{e}. Waiting {e.retry_in:.0f}s...")
+            time.sleep(max(CHECK_INTERVAL_SECONDS, e.retry_in))
         except Exception as e:
-            print(f"An unexpected error occurred: {e}. Goodbye!")
-            break
+            # Keep monitoring; the next poll starts from the same cached state
+            print(f"An unexpected error occurred: {e}. Retrying in {CHECK_INTERVAL_SECONDS}s...")
+            time.sleep(CHECK_INTERVAL_SECONDS)
 
 
 if __name__ == "__main__":
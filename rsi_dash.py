@@ -1,17 +1,23 @@
-import ccxt
 import time
 import numpy as np
 from datetime import datetime
 import platform
 import os
-import winsound
 import threading
 import sys
 
+from alerts import Alert, AlertDispatcher, AudioSink
+from audio import SoundPlayer
+from candle_cache import CandleCache
+from exchange_client import create_client, latency_report
+from indicators import calculate_rsi_batch
+from live_prices import LivePriceService
+from pivots import find_peaks, find_troughs
+from scheduler import sleep_until_next_bar
+
 # Initialize MEXC exchange
-exchange = ccxt.mexc({
-    'enableRateLimit': True,
-})
+exchange = create_client('mexc')  # Pooled keep-alive session shared by the polling threads
+candle_cache = CandleCache(exchange)
 
 # Configuration
 # symbols = ['BTC/USDT', 'ETH/USDT', 'SOL/USDT']  # Add your coins here
@@ -22,9 +28,10 @@ price_lookback = 200  # Candles to analyze for divergence
 min_peak_distance = 5  # Minimum candles between peaks
 play_sounds = True  # Set to False to disable alert sounds
 price_refresh_seconds = 5  # Live price refresh interval
+error_retry_seconds = 5  # Pause after a failed check; exchange calls already retry with backoff
 
 # Global variables for tracking state
-live_prices = {symbol: "Loading..." for symbol in symbols}
+live_prices = LivePriceService(exchange, symbols, price_refresh_seconds)
 last_alerts = {symbol: {"bullish": None, "bearish": None} for symbol in symbols}
 screen_lines = 0
 
@@ -41,23 +48,11 @@ def print_header():
     print(f"RSI Divergence Monitor RSI Dash ({timeframe}) | {timestamp}")
     print("=" * 50)
 
-def update_live_prices():
-    """Fetch and update live prices for all symbols"""
-    while True:
-        try:
-            for symbol in symbols:
-                ticker = exchange.fetch_ticker(symbol)
-                live_prices[symbol] = float(ticker['last'])
-            time.sleep(price_refresh_seconds)
-        except Exception as e:
-            print(f"Price update error: {e}")
-            time.sleep(5)
-
 def print_live_prices():
     """Print live prices in a fixed position"""
     print("LIVE PRICES:")
     for symbol in symbols:
-        price = live_prices[symbol]
+        price = live_prices.get(symbol, "Loading...")
         alert_status = ""
         if last_alerts[symbol]["bullish"]:
             alert_status = " | 🟢 BULLISH ALERT"
@@ -66,78 +61,14 @@ def print_live_prices():
         print(f"  {symbol}: {price:.4f}{alert_status}")
     print("-" * 50)
 
-def play_bullish_alert():
-    """Play sound for bullish divergence detection"""
-    if not play_sounds:
-        return
-        
-    system = platform.system()
-    try:
-        if system == 'Windows':
-            winsound.PlaySound("alert.wav", winsound.SND_FILENAME)  # Higher pitch
-            winsound.PlaySound("alert.wav", winsound.SND_FILENAME)
-        elif system == 'Darwin':  # macOS
-            os.system('afplay /System/Library/Sounds/Ping.aiff')
-            time.sleep(0.5)
-            os.system('afplay /System/Library/Sounds/Ping.aiff')
-        elif system == 'Linux':
-            os.system('spd-say "bullish divergence"')
-        else:
-            print('\a')  # System beep as fallback
-            time.sleep(0.3)
-            print('\a')
-    except:
-        print("Couldn't play sound")
+sounds = SoundPlayer.from_files(["alert.wav"])
 
-def play_bearish_alert():
-    """Play sound for bearish divergence detection"""
-    if not play_sounds:
-        return
-        
-    system = platform.system()
-    try:
-        if system == 'Windows':
-            winsound.PlaySound("alert.wav", winsound.SND_FILENAME)  # Lower pitch
-            winsound.PlaySound("alert.wav", winsound.SND_FILENAME)
-        elif system == 'Darwin':  # macOS
-            os.system('afplay /System/Library/Sounds/Basso.aiff')
-        elif system == 'Linux':
-            os.system('spd-say "bearish divergence"')
-        else:
-            print('\a')  # System beep
-    except:
-        print("Couldn't play sound")
-
-def calculate_rsi(prices, period=14):
-    deltas = np.diff(prices)
-    gains = np.where(deltas > 0, deltas, 0)
-    losses = np.where(deltas < 0, -deltas, 0)
-    
-    avg_gain = np.mean(gains[:period])
-    avg_loss = np.mean(losses[:period])
-    
-    rsi = np.zeros_like(prices)
-    rsi[:period] = 100.0 - 100.0 / (1 + avg_gain / (avg_loss + 1e-10))
-    
-    for i in range(period, len(prices)):
-        avg_gain = ((avg_gain * (period - 1)) + gains[i-1]) / period
-        avg_loss = ((avg_loss * (period - 1)) + losses[i-1]) / period
-        
-        if avg_loss < 1e-10:
-            rs = 100  # Prevent division by zero
-        else:
-            rs = avg_gain / avg_loss
-            
-        rsi[i] = 100.0 - 100.0 / (1 + rs)
-    
-    return rsi
+def play_divergence_alert(alert):
+    """Audio sink player: the alert sound, twice"""
+    if play_sounds:
+        sounds.play("alert.wav", repeat=2)
 
-def find_peaks(data, min_distance=5):
-    peaks = []
-    for i in range(min_distance, len(data)-min_distance):
-        if data[i] == max(data[i-min_distance:i+min_distance+1]):
-            peaks.append(i)
-    return peaks
+alerts = AlertDispatcher([AudioSink(play_divergence_alert)])
 
 def detect_divergence(prices, rsi_values):
     # Find price peaks
@@ -159,9 +90,9 @@ def detect_divergence(prices, rsi_values):
             rsi_values[last_rsi_peak] < rsi_values[prev_rsi_peak]):
             bearish_divergences.append((prev_price_peak, last_price_peak))
     
-    # Find troughs (reverse of peaks)
-    price_troughs = find_peaks([-x for x in prices], min_peak_distance)
-    rsi_troughs = find_peaks([-x for x in rsi_values], min_peak_distance)
+    # Find troughs
+    price_troughs = find_troughs(prices, min_peak_distance)
+    rsi_troughs = find_troughs(rsi_values, min_peak_distance)
     
     # Check last two troughs for bullish divergence
     if len(price_troughs) >= 2 and len(rsi_troughs) >= 2:
@@ -181,23 +112,31 @@ def check_divergences():
     """Check for divergences in all symbols"""
     while True:
         try:
+            # Fetch OHLCV data for every symbol first
+            window = price_lookback + rsi_period
+            batch = []
             for symbol in symbols:
                 # Reset alert status
                 last_alerts[symbol]["bullish"] = False
                 last_alerts[symbol]["bearish"] = False
                 
-                # Fetch OHLCV data
-                ohlcv = exchange.fetch_ohlcv(symbol, timeframe, limit=price_lookback + rsi_period)
-                if len(ohlcv) < price_lookback + rsi_period:
+                try:
+                    ohlcv = candle_cache.get(symbol, timeframe, window)
+                except Exception as e:  # Retries are spent; the other symbols still get this bar
+                    print(f"Fetch error for {symbol}: {e}")
                     continue
-                
-                # Extract closing prices
-                closes = np.array([x[4] for x in ohlcv])
-                
-                # Calculate RSI
-                rsi = calculate_rsi(closes, rsi_period)
-                valid_rsi = rsi[-price_lookback:]
-                valid_prices = closes[-price_lookback:]
+                if len(ohlcv) < window:
+                    continue
+                batch.append((symbol, ohlcv[-window:]))
+            
+            # Calculate RSI for the whole batch in one pass
+            if batch:
+                closes = np.array([[x[4] for x in ohlcv] for _, ohlcv in batch])
+                rsi = calculate_rsi_batch(closes, rsi_period)
+            
+            for row, (symbol, _) in enumerate(batch):
+                valid_rsi = rsi[row, -price_lookback:]
+                valid_prices = closes[row, -price_lookback:]
                 
                 # Detect divergences
                 bullish, bearish = detect_divergence(valid_prices, valid_rsi)
@@ -205,31 +144,19 @@ def check_divergences():
                 # Process bullish divergence
                 if bullish:
                     last_alerts[symbol]["bullish"] = True
-                    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                    threading.Thread(target=play_bullish_alert).start()
+                    alerts.dispatch(Alert(symbol, 'bullish', "Bullish divergence", valid_prices[-1], source='rsi_dash'))
                 
                 # Process bearish divergence
                 if bearish:
                     last_alerts[symbol]["bearish"] = True
-                    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                    threading.Thread(target=play_bearish_alert).start()
-            
-            # Wait before next check (based on timeframe)
-            sleep_time = {
-                '1m': 60,
-                '5m': 300,
-                '15m': 900,
-                '30m': 1800,
-                '1h': 3600,
-                '4h': 14400,
-                '1d': 86400
-            }.get(timeframe, 300)
+                    alerts.dispatch(Alert(symbol, 'bearish', "Bearish divergence", valid_prices[-1], source='rsi_dash'))
             
-            time.sleep(sleep_time)
+            # Wait for the current bar to close
+            sleep_until_next_bar(timeframe)
             
         except Exception as e:
             print(f"Divergence check error: {e}")
-            time.sleep(60)
+            time.sleep(error_retry_seconds)
 
 def display_loop():
     """Main display loop that updates the console"""
@@ -267,7 +194,7 @@ def display_loop():
             
             # Print footer
             print("=" * 50)
-            print("Monitoring... Press Ctrl+C to exit")
+            print(f"Monitoring... Press Ctrl+C to exit | {latency_report(exchange)}")
             
             # Update line count
             screen_lines = len(symbols) + 10  # Header + prices + alerts + footer
@@ -282,9 +209,9 @@ def display_loop():
             time.sleep(5)
 
 if __name__ == "__main__":
-    # Start live price updater thread
-    price_thread = threading.Thread(target=update_live_prices, daemon=True)
-    price_thread.start()
+    # Start live price updater thread (one bulk ticker request per refresh)
+    live_prices.start()
+    alerts.start()
     
     # Start divergence checker thread
     divergence_thread = threading.Thread(target=check_divergences, daemon=True)
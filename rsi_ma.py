@@ -1,16 +1,14 @@
-import ccxt
-import pandas as pd
-import numpy as np  # Using numpy for manual calculations instead of pandas_ta
 import time
-import os
 from typing import Optional, Tuple
 from datetime import datetime
 
-# Conditional import for Windows-specific sound library
-try:
-    import winsound
-except ImportError:
-    winsound = None
+from alerts import Alert, AlertDispatcher, AudioSink
+from audio import SoundPlayer
+from candle_cache import CandleCache
+from exchange_client import create_client
+from indicators import ATRState, RSIState, moving_average_state
+from live_prices import LivePriceService
+from ohlcv import OHLCV
 
 # --- Configuration ---
 SYMBOL = 'XRP/USDT'
@@ -29,121 +27,50 @@ BUY_SOUND_FILE = 'buy_signal.wav'
 SELL_SOUND_FILE = 'sell_signal.wav'
 
 # --- Initialize Exchange ---
-exchange = ccxt.mexc({
-    'options': {
-        'defaultType': 'swap',
-    },
-    'rateLimit': 1000,  # Add rate limiting
-})
-
-
-def play_alert_sound(sound_file: str):
-    """Play alert sound on Windows"""
-    try:
-        if os.name == 'nt' and winsound:
-            if os.path.exists(sound_file):
-                winsound.PlaySound(sound_file, winsound.SND_FILENAME)
-            else:
-                print(f"\nWarning: Sound file not found at '{sound_file}'")
-                winsound.Beep(1000, 500)
-        else:
-            print("\a", end='', flush=True)
-    except Exception as e:
-        print(f"\nCould not play alert sound: {e}")
-
-
-def calculate_rsi_manual(prices: pd.Series, period: int) -> pd.Series:
-    """Manual RSI calculation without pandas_ta"""
-    deltas = np.diff(prices)
-    seed = deltas[:period+1]
-    
-    up = seed[seed >= 0].sum() / period
-    down = -seed[seed < 0].sum() / period
-    
-    rs = up / down
-    rsi = np.zeros_like(prices)
-    rsi[:period] = 100. - 100. / (1. + rs)
-    
-    for i in range(period, len(prices)):
-        delta = deltas[i-1]
-        
-        if delta > 0:
-            up_val = delta
-            down_val = 0.
-        else:
-            up_val = 0.
-            down_val = -delta
-        
-        up = (up * (period - 1) + up_val) / period
-        down = (down * (period - 1) + down_val) / period
-        
-        rs = up / down
-        rsi[i] = 100. - 100. / (1. + rs)
-    
-    return pd.Series(rsi, index=prices.index)
+exchange = create_client('mexc', market_type='swap')  # Shared MEXC rate limit instead of a fixed 1 s rateLimit
+candle_cache = CandleCache(exchange)
+live_prices = LivePriceService(exchange, [SYMBOL], CHECK_INTERVAL_SECONDS)
 
 
-def calculate_ema_manual(series: pd.Series, period: int) -> pd.Series:
-    """Manual EMA calculation"""
-    return series.ewm(span=period, adjust=False).mean()
+sounds = SoundPlayer.from_files([BUY_SOUND_FILE, SELL_SOUND_FILE])
 
+alerts = AlertDispatcher([AudioSink(sounds.play_alert)])
 
-def calculate_sma_manual(series: pd.Series, period: int) -> pd.Series:
-    """Manual SMA calculation"""
-    return series.rolling(window=period).mean()
 
+class CrossoverState:
+    """
+    RSI, its MA and ATR carried between polls. Each closed candle is one O(1)
+    update of the streaming indicators; the forming candle is only peeked at.
+    """
 
-def calculate_atr_manual(high: pd.Series, low: pd.Series, close: pd.Series, period: int) -> pd.Series:
-    """Manual ATR calculation"""
-    tr = pd.DataFrame()
-    tr['h-l'] = high - low
-    tr['h-pc'] = abs(high - close.shift(1))
-    tr['l-pc'] = abs(low - close.shift(1))
-    tr['tr'] = tr[['h-l', 'h-pc', 'l-pc']].max(axis=1)
-    
-    return tr['tr'].rolling(window=period).mean()
+    def __init__(self):
+        self.rsi = RSIState(RSI_PERIOD)
+        self.ma = moving_average_state(MA_TYPE, MA_LENGTH)
+        self.atr = ATRState(ATR_LENGTH)
 
+    def update(self, candles: OHLCV) -> Tuple[Optional[float], Optional[float], Optional[float], bool, bool]:
+        """Apply newly closed candles; returns RSI, MA and ATR of the forming candle and the crossover flags"""
+        timestamp, high, low, close = candles.timestamp, candles.high, candles.low, candles.close
+        for i in range(len(candles) - 1):
+            if self.rsi.last_timestamp is None or timestamp[i] > self.rsi.last_timestamp:
+                rsi = self.rsi.update(close[i], timestamp[i])
+                if rsi is not None:
+                    self.ma.update(rsi)
+                self.atr.update(high[i], low[i], close[i])
+
+        # Previous values are the last closed bar, current ones the forming bar
+        rsi_prev, ma_prev = self.rsi.value, self.ma.value
+        current_rsi = self.rsi.peek(close[-1])
+        current_ma = self.ma.peek(current_rsi) if current_rsi is not None else None
+        current_atr = self.atr.peek(high[-1], low[-1], close[-1])
+        if None in (rsi_prev, ma_prev, current_rsi, current_ma, current_atr):
+            return None, None, None, False, False
 
-def calculate_indicators(df: pd.DataFrame) -> Tuple[Optional[float], Optional[float], Optional[float], bool, bool]:
-    """Calculate all indicators manually"""
-    min_data_needed = max(RSI_PERIOD, MA_LENGTH, ATR_LENGTH) + 2
-    
-    if len(df) < min_data_needed:
-        return None, None, None, False, False
-
-    try:
-        # Calculate RSI manually
-        rsi_series = calculate_rsi_manual(df['close'], RSI_PERIOD)
-        
-        # Calculate smoothed MA of RSI
-        if MA_TYPE == 'SMA':
-            smoothed_ma = calculate_sma_manual(rsi_series, MA_LENGTH)
-        elif MA_TYPE == 'EMA':
-            smoothed_ma = calculate_ema_manual(rsi_series, MA_LENGTH)
-        else:  # WMA or default to EMA
-            smoothed_ma = calculate_ema_manual(rsi_series, MA_LENGTH)
-        
-        # Calculate ATR manually
-        atr_series = calculate_atr_manual(df['high'], df['low'], df['close'], ATR_LENGTH)
-        
-        # Get current values
-        current_rsi = rsi_series.iloc[-1]
-        current_ma = smoothed_ma.iloc[-1]
-        current_atr = atr_series.iloc[-1]
-        
-        # Get previous values for crossover detection
-        rsi_prev = rsi_series.iloc[-2]
-        ma_prev = smoothed_ma.iloc[-2]
-        
         # Check for crossovers
         buy_signal = (rsi_prev <= ma_prev) and (current_rsi > current_ma)
         sell_signal = (rsi_prev >= ma_prev) and (current_rsi < current_ma)
-        
+
         return current_rsi, current_ma, current_atr, buy_signal, sell_signal
-        
-    except Exception as e:
-        print(f"Error calculating indicators: {e}")
-        return None, None, None, False, False
 
 
 def calculate_tp_sl(current_price: float, atr_value: float, signal_type: str) -> Tuple[float, float]:
@@ -161,41 +88,37 @@ def calculate_tp_sl(current_price: float, atr_value: float, signal_type: str) ->
 
 
 def get_current_price(symbol: str) -> Optional[float]:
-    """Fetch current price"""
-    try:
-        ticker = exchange.fetch_ticker(symbol)
-        return ticker['last']
-    except Exception as e:
-        print(f"Price fetch error: {e}")
-        return None
+    """Read current price from the shared live price snapshot"""
+    return live_prices.get(symbol)
 
 
 def main():
     """Main trading bot function"""
     last_alert_type = None
     last_alert_time = 0
+    indicators = CrossoverState()
     
     print(f"--- RSI vs MA Crossover Bot for {SYMBOL} ---")
     print(f"Timeframe: {TIMEFRAME}, RSI: {RSI_PERIOD}, MA: {MA_LENGTH} ({MA_TYPE})")
     print(f"ATR: {ATR_LENGTH}, TP: {TP_MULTIPLIER}x, SL: {SL_MULTIPLIER}x")
     print("-" * 50)
 
+    live_prices.start()
+    alerts.start()
+
     while True:
         try:
-            # Fetch OHLCV data
-            limit = max(RSI_PERIOD, MA_LENGTH, ATR_LENGTH) * 2 + 10
-            ohlcv = exchange.fetch_ohlcv(SYMBOL, TIMEFRAME, limit=limit)
+            # Fetch OHLCV data; the first poll's history warms the indicator states up
+            limit = max(RSI_PERIOD, MA_LENGTH, ATR_LENGTH) * 10
+            candles = candle_cache.get_ohlcv(SYMBOL, TIMEFRAME, limit)
             
-            if len(ohlcv) < 30:  # Minimum data check
-                print(f"Waiting for more data... ({len(ohlcv)} candles)")
+            if len(candles) < 30:  # Minimum data check
+                print(f"Waiting for more data... ({len(candles)} candles)")
                 time.sleep(CHECK_INTERVAL_SECONDS)
                 continue
 
-            # Create DataFrame
-            df = pd.DataFrame(ohlcv, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
-            
-            # Calculate indicators
-            current_rsi, current_ma, current_atr, buy_signal, sell_signal = calculate_indicators(df)
+            # Only candles closed since the last poll touch the indicator states
+            current_rsi, current_ma, current_atr, buy_signal, sell_signal = indicators.update(candles)
             
             if current_rsi is None:
                 time.sleep(CHECK_INTERVAL_SECONDS)
@@ -235,10 +158,9 @@ def main():
             if alert_to_fire and (time.time() - last_alert_time) > ALERT_COOLDOWN_SECONDS:
                 print(f"\n*** SIGNAL [{timestamp}] {SYMBOL} {price_str} - {status_message} ***")
                 
-                if current_alert_type == 'buy':
-                    play_alert_sound(BUY_SOUND_FILE)
-                elif current_alert_type == 'sell':
-                    play_alert_sound(SELL_SOUND_FILE)
+                sound_file = BUY_SOUND_FILE if current_alert_type == 'buy' else SELL_SOUND_FILE
+                alerts.dispatch(Alert(SYMBOL, current_alert_type, status_message, current_price,
+                                      sound=sound_file, source='rsi_ma'))
                 
                 last_alert_time = time.time()
                 last_alert_type = current_alert_type
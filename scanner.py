@@ -0,0 +1,437 @@
+import time
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from alerts import Alert, AlertDispatcher, AudioSink, ConsoleSink, WebhookSink
+from audio import SoundPlayer
+from candle_cache import CandleCache
+from divergence import BULLISH_TYPES, DivergenceDetector
+from exchange_client import create_client
+from indicators import RSIState, atr, calculate_rsi, moving_average
+from pivots import find_peaks, find_troughs
+from resampler import BASE_TIMEFRAME, ResampledFeed
+from scheduler import BarScheduler
+from timeframes import timeframe_ms
+from universe import Universe
+
+# Configuration
+EXCHANGE_ID = 'mexc'
+USE_FAKE_EXCHANGE = False  # Scan the offline FakeExchange instead of MEXC
+symbols = ['XRP/USDT']  # Add your coins here
+scan_universe = False  # Scan every USDT perp on the exchange (see universe.py) instead of `symbols`
+universe_min_volume = 1_000_000  # Minimum 24h quote volume for scan_universe
+universe_top = None  # Or only the N most liquid
+play_sounds = True
+webhook_url = None  # POST signals as JSON here as well, if set
+history_bars = 300  # Closed candles kept per (symbol, timeframe); RSI warm-up included
+resample_from_1m = True  # Poll 1m only and build the higher timeframes locally
+
+# Sounds the strategies can ask for, preloaded into memory at start-up
+SOUND_FILES = [
+    'overbought.wav', 'oversold.wav', 'buy_signal.wav', 'sell_signal.wav',
+    'XRP-1m-bullish.wav', 'XRP-1m-bearish.wav', 'XRP-5m-Bullish.wav', 'XRP-5m-Bearish.wav',
+]
+
+# Strategy instances to run: (registry name, keyword arguments)
+STRATEGIES = [
+    ('rsi_threshold', {'timeframe': '5m', 'overbought': 70, 'oversold': 30}),  # rsi_alert.py
+    ('rsi_threshold', {'timeframe': '1m', 'overbought': 65, 'oversold': 35}),  # rsi_alert_1m.py
+    ('rsi_ma', {'timeframe': '5m'}),  # rsi_ma.py
+    ('pivot_divergence', {'timeframe': '5m'}),  # new_logic.py
+    ('peak_divergence', {'timeframe': '1m'}),  # main.py / rsi_dash.py
+]
+
+
+class Signal(NamedTuple):
+    strategy: str
+    symbol: str
+    timeframe: str
+    kind: str
+    price: float
+    message: str
+    sound: Optional[str] = None
+
+
+class BarContext:
+    """
+    Closed candles for one (symbol, timeframe) in one scan cycle.
+
+    Indicator series are computed through the scanner, so every strategy
+    asking for the same RSI period on the same candles shares one series.
+    """
+
+    def __init__(self, scanner: "Scanner", symbol: str, timeframe: str, candles: np.ndarray):
+        self.scanner = scanner
+        self.symbol = symbol
+        self.timeframe = timeframe
+        self.candles = candles
+
+    @property
+    def timestamps(self) -> np.ndarray:
+        return self.candles[:, 0]
+
+    @property
+    def highs(self) -> np.ndarray:
+        return self.candles[:, 2]
+
+    @property
+    def lows(self) -> np.ndarray:
+        return self.candles[:, 3]
+
+    @property
+    def closes(self) -> np.ndarray:
+        return self.candles[:, 4]
+
+    def rsi(self, period: int) -> np.ndarray:
+        return self.scanner.indicator(self, ('rsi', period), lambda: calculate_rsi(self.closes, period))
+
+    def atr(self, length: int) -> np.ndarray:
+        return self.scanner.indicator(self, ('atr', length), lambda: atr(self.highs, self.lows, self.closes, length))
+
+
+# Strategy plugins, by name
+STRATEGY_REGISTRY: Dict[str, type] = {}
+
+
+def register_strategy(name: str):
+    """Class decorator adding a strategy to STRATEGY_REGISTRY"""
+    def decorator(cls):
+        cls.name = name
+        STRATEGY_REGISTRY[name] = cls
+        return cls
+    return decorator
+
+
+class Strategy:
+    """
+    Base class for scanner plugins. A strategy runs on one timeframe and is
+    handed the closed candles of each symbol once per bar close.
+    """
+
+    name = 'strategy'
+
+    def __init__(self, timeframe: str, rsi_period: int = 14):
+        self.timeframe = timeframe
+        self.rsi_period = rsi_period
+
+    @property
+    def min_bars(self) -> int:
+        """Closed candles needed before on_bar is called"""
+        return self.rsi_period + 2
+
+    def on_bar(self, context: BarContext) -> List[Signal]:
+        raise NotImplementedError
+
+    def divergence_sound(self, bullish: bool) -> str:
+        """The timeframe's divergence sound, picked as in new_logic.py"""
+        if bullish:
+            return "XRP-1m-bullish.wav" if self.timeframe == '1m' else "XRP-5m-Bullish.wav"
+        return "XRP-1m-bearish.wav" if self.timeframe == '1m' else "XRP-5m-Bearish.wav"
+
+
+@register_strategy('rsi_threshold')
+class RSIThresholdStrategy(Strategy):
+    """rsi_alert.py: RSI above overbought or below oversold, repeated after a cooldown"""
+
+    def __init__(self, timeframe: str = '5m', rsi_period: int = 14, overbought: float = 70,
+                 oversold: float = 30, cooldown_seconds: float = 300):
+        super().__init__(timeframe, rsi_period)
+        self.overbought = overbought
+        self.oversold = oversold
+        self.cooldown_seconds = cooldown_seconds
+        self._last_alerts: Dict[str, Tuple[str, float]] = {}  # symbol -> (zone, time)
+
+    def on_bar(self, context: BarContext) -> List[Signal]:
+        rsi = context.rsi(self.rsi_period)[-1]
+        if rsi > self.overbought:
+            zone, message, sound = 'overbought', f"Overbought! RSI: {rsi:.2f} > {self.overbought}", 'overbought.wav'
+        elif rsi < self.oversold:
+            zone, message, sound = 'oversold', f"Oversold! RSI: {rsi:.2f} < {self.oversold}", 'oversold.wav'
+        else:
+            self._last_alerts.pop(context.symbol, None)
+            return []
+
+        last_zone, last_time = self._last_alerts.get(context.symbol, (None, 0.0))
+        if zone == last_zone and time.time() - last_time <= self.cooldown_seconds:
+            return []
+        self._last_alerts[context.symbol] = (zone, time.time())
+        return [Signal(self.name, context.symbol, self.timeframe, zone, context.closes[-1], message, sound)]
+
+
+@register_strategy('rsi_ma')
+class RSIMACrossStrategy(Strategy):
+    """rsi_ma.py: RSI crossing its moving average, with ATR take-profit / stop-loss levels"""
+
+    def __init__(self, timeframe: str = '5m', rsi_period: int = 14, ma_length: int = 14, ma_type: str = 'SMA',
+                 atr_length: int = 14, tp_multiplier: float = 2.0, sl_multiplier: float = 1.0):
+        super().__init__(timeframe, rsi_period)
+        self.ma_length = ma_length
+        self.ma_type = ma_type
+        self.atr_length = atr_length
+        self.tp_multiplier = tp_multiplier
+        self.sl_multiplier = sl_multiplier
+
+    @property
+    def min_bars(self) -> int:
+        return max(self.rsi_period, self.ma_length, self.atr_length) + 2
+
+    def on_bar(self, context: BarContext) -> List[Signal]:
+        rsi = context.rsi(self.rsi_period)
+        ma = moving_average(rsi, self.ma_length, self.ma_type)
+        if rsi[-2] <= ma[-2] and rsi[-1] > ma[-1]:
+            kind, arrow, direction = 'buy', '↑', 1
+        elif rsi[-2] >= ma[-2] and rsi[-1] < ma[-1]:
+            kind, arrow, direction = 'sell', '↓', -1
+        else:
+            return []
+
+        price = context.closes[-1]
+        atr_value = context.atr(self.atr_length)[-1]
+        tp = price + direction * atr_value * self.tp_multiplier
+        sl = price - direction * atr_value * self.sl_multiplier
+        message = f"{kind.upper()}! RSI({rsi[-1]:.1f}){arrow}MA({ma[-1]:.1f}) | TP: {tp:.4f} SL: {sl:.4f}"
+        return [Signal(self.name, context.symbol, self.timeframe, kind, price, message, f"{kind}_signal.wav")]
+
+
+@register_strategy('pivot_divergence')
+class PivotDivergenceStrategy(Strategy):
+    """
+    new_logic.py: PineScript pivot divergences, confirmed lbR bars after the pivot.
+
+    Like new_logic.feed_closed_candles, each symbol keeps one RSIState and
+    one DivergenceDetector fed only the bars closed since the last cycle, so
+    every pivot is compared on RSI from the same Wilder seed.
+    """
+
+    def __init__(self, timeframe: str = '5m', rsi_period: int = 14, lbL: int = 5, lbR: int = 5,
+                 rangeLower: int = 5, rangeUpper: int = 60,
+                 enabled=("regular_bullish", "regular_bearish")):
+        super().__init__(timeframe, rsi_period)
+        self.params = (lbL, lbR, rangeLower, rangeUpper, tuple(enabled))
+        self._rsi_states: Dict[str, RSIState] = {}
+        self._detectors: Dict[str, DivergenceDetector] = {}
+
+    def on_bar(self, context: BarContext) -> List[Signal]:
+        rsi_state = self._rsi_states.get(context.symbol)
+        if rsi_state is None:
+            rsi_state = self._rsi_states[context.symbol] = RSIState(self.rsi_period)
+            self._detectors[context.symbol] = DivergenceDetector(*self.params)
+        detector = self._detectors[context.symbol]
+        last = rsi_state.last_timestamp
+
+        # Only bars closed since the last cycle touch the state
+        start = 0 if last is None else int(np.searchsorted(context.timestamps, last, side='right'))
+        events = []
+        for i in range(start, len(context.candles)):
+            rsi = rsi_state.update(context.closes[i], int(context.timestamps[i]))
+            if rsi is not None:
+                events += detector.update(rsi, context.lows[i], context.highs[i])
+
+        if last is None:
+            return []  # Divergences confirmed while replaying history are not new
+        return [
+            Signal(self.name, context.symbol, self.timeframe, div_type, context.closes[-1],
+                   div_type.replace('_', ' ').title(),
+                   self.divergence_sound(div_type in BULLISH_TYPES))
+            for div_type in events
+        ]
+
+
+@register_strategy('peak_divergence')
+class PeakDivergenceStrategy(Strategy):
+    """main.py / rsi_dash.py: last two price vs RSI peaks (troughs) over a lookback window"""
+
+    def __init__(self, timeframe: str = '1m', rsi_period: int = 14, price_lookback: int = 30,
+                 min_peak_distance: int = 5):
+        super().__init__(timeframe, rsi_period)
+        self.price_lookback = price_lookback
+        self.min_peak_distance = min_peak_distance
+        self._last_pairs: Dict[Tuple[str, str], Tuple[float, float]] = {}
+
+    @property
+    def min_bars(self) -> int:
+        return self.price_lookback + self.rsi_period
+
+    def _check(self, context: BarContext, kind: str, prices, rsi, times, finder, diverges) -> List[Signal]:
+        price_points = finder(prices, self.min_peak_distance)
+        rsi_points = finder(rsi, self.min_peak_distance)
+        if len(price_points) < 2 or len(rsi_points) < 2:
+            return []
+        prev, last = price_points[-2], price_points[-1]
+        if not diverges(prices[last], prices[prev], rsi[rsi_points[-1]], rsi[rsi_points[-2]]):
+            return []
+
+        # The same pair stays in the window for several bars; report it once
+        pair = (times[prev], times[last])
+        if self._last_pairs.get((context.symbol, kind)) == pair:
+            return []
+        self._last_pairs[(context.symbol, kind)] = pair
+        message = (f"{kind.title()} divergence | Price: {prices[prev]:.4f} -> {prices[last]:.4f} | "
+                   f"RSI: {rsi[prev]:.2f} -> {rsi[last]:.2f}")
+        return [Signal(self.name, context.symbol, self.timeframe, kind, context.closes[-1], message,
+                       self.divergence_sound(kind == 'bullish'))]
+
+    def on_bar(self, context: BarContext) -> List[Signal]:
+        prices = context.closes[-self.price_lookback:]
+        rsi = context.rsi(self.rsi_period)[-self.price_lookback:]
+        times = context.timestamps[-self.price_lookback:]
+        return (
+            self._check(context, 'bullish', prices, rsi, times, find_troughs,
+                        lambda p_last, p_prev, r_last, r_prev: p_last < p_prev and r_last > r_prev)
+            + self._check(context, 'bearish', prices, rsi, times, find_peaks,
+                          lambda p_last, p_prev, r_last, r_prev: p_last > p_prev and r_last < r_prev)
+        )
+
+
+def create_strategy(name: str, **params) -> Strategy:
+    if name not in STRATEGY_REGISTRY:
+        raise ValueError(f"Unknown strategy: {name}")
+    return STRATEGY_REGISTRY[name](**params)
+
+
+def create_alert_dispatcher() -> AlertDispatcher:
+    """Console sink plus audio and webhook sinks as configured"""
+    sinks = [ConsoleSink()]
+    if play_sounds:
+        sinks.append(AudioSink(SoundPlayer.from_files(SOUND_FILES).play_alert))
+    if webhook_url:
+        sinks.append(WebhookSink(webhook_url))
+    return AlertDispatcher(sinks)
+
+
+def signal_alert(signal: Signal) -> Alert:
+    return Alert(
+        signal.symbol, signal.kind,
+        f"{signal.timeframe} {signal.strategy}: {signal.message} @ {signal.price:.4f}",
+        signal.price, signal.sound, source=f"{signal.strategy}|{signal.timeframe}",
+    )
+
+
+class Scanner:
+    """
+    Runs every registered strategy from one exchange client and one candle
+    cache. Each (symbol, timeframe) is fetched once per bar close however many
+    strategies use it, and indicator series are shared between strategies
+    within the cycle.
+
+    With `resample` set, only 1m candles are polled after start-up; the other
+    timeframes are built from them by a ResampledFeed and each strategy runs
+    when its timeframe gains a closed bar.
+    """
+
+    def __init__(self, exchange, strategies: List[Strategy], symbols: List[str],
+                 on_signal: Optional[Callable[[Signal], None]] = None, history: int = history_bars,
+                 resample: bool = resample_from_1m):
+        self.exchange = exchange
+        self.strategies = strategies
+        self.symbols = list(symbols)
+        self.alerts: Optional[AlertDispatcher] = None
+        if on_signal is None:
+            self.alerts = create_alert_dispatcher().start()
+            on_signal = lambda signal: self.alerts.dispatch(signal_alert(signal))
+        self.on_signal = on_signal
+        self.history = max([history] + [strategy.min_bars for strategy in strategies])
+        max_candles = self.history + 1
+        if resample:
+            # The 1m buffer must span the open bucket of the longest timeframe
+            longest = max(self.timeframes + [BASE_TIMEFRAME], key=timeframe_ms)
+            max_candles = max(max_candles, timeframe_ms(longest) // timeframe_ms(BASE_TIMEFRAME) + 1)
+        self.candle_cache = CandleCache(exchange, max_candles=max_candles)
+        self.feed = ResampledFeed(self.candle_cache, self.timeframes, self.history) if resample else None
+        self._indicators: Dict[Tuple, Tuple[float, np.ndarray]] = {}
+
+    @property
+    def timeframes(self) -> List[str]:
+        return sorted({strategy.timeframe for strategy in self.strategies}, key=timeframe_ms)
+
+    def indicator(self, context: BarContext, key: Tuple, compute: Callable[[], np.ndarray]) -> np.ndarray:
+        """Series for (symbol, timeframe, key), recomputed only when a new bar has closed"""
+        cache_key = (context.symbol, context.timeframe) + key
+        last_timestamp = context.timestamps[-1]
+        cached = self._indicators.get(cache_key)
+        if cached is None or cached[0] != last_timestamp:
+            cached = self._indicators[cache_key] = (last_timestamp, compute())
+        return cached[1]
+
+    def closed_candles(self, symbol: str, timeframe: str) -> np.ndarray:
+        """Cached candles whose bar has ended, as an (n x 6) array"""
+        candles = self.candle_cache.get_ohlcv(symbol, timeframe, self.history + 1)
+        closed = candles.timestamp + timeframe_ms(timeframe) <= self.exchange.milliseconds()
+        return candles.data[:, closed].T
+
+    def run_strategies(self, symbol: str, timeframe: str, candles: np.ndarray) -> List[Signal]:
+        """Hand one (symbol, timeframe)'s closed candles to every strategy on that timeframe"""
+        signals = []
+        context = BarContext(self, symbol, timeframe, candles)
+        for strategy in self.strategies:
+            if strategy.timeframe != timeframe or len(candles) < strategy.min_bars:
+                continue
+            try:
+                signals += strategy.on_bar(context)
+            except Exception as e:
+                print(f"{strategy.name} error for {symbol} {timeframe}: {e}")
+        return signals
+
+    def scan(self, batch: Dict[str, List[str]], boundary: Optional[float] = None) -> List[Signal]:
+        """Run the strategies of each due timeframe over its symbols"""
+        signals = []
+        if self.feed is not None:
+            now = self.exchange.milliseconds()
+            for symbol in batch.get(self.feed.base, []):
+                try:
+                    timeframes = self.feed.update(symbol, now)
+                except Exception as e:
+                    print(f"Fetch error for {symbol}: {e}")
+                    continue
+                for timeframe in timeframes:
+                    signals += self.run_strategies(symbol, timeframe, self.feed.candles(symbol, timeframe))
+        else:
+            for timeframe, timeframe_symbols in batch.items():
+                for symbol in timeframe_symbols:
+                    try:
+                        candles = self.closed_candles(symbol, timeframe)
+                    except Exception as e:
+                        print(f"Fetch error for {symbol} {timeframe}: {e}")
+                        continue
+                    signals += self.run_strategies(symbol, timeframe, candles)
+        for signal in signals:
+            self.on_signal(signal)
+        return signals
+
+    def run(self, scheduler: Optional[BarScheduler] = None):
+        """Warm every strategy up now, then scan at each bar close"""
+        scheduler = scheduler or BarScheduler()
+        timeframes = [self.feed.base] if self.feed is not None else self.timeframes
+        for timeframe in timeframes:
+            scheduler.add(timeframe, self.symbols, self.scan)
+        self.scan({timeframe: self.symbols for timeframe in timeframes})
+        scheduler.run_forever()
+
+
+def create_exchange():
+    if USE_FAKE_EXCHANGE:
+        from fake_exchange import FakeExchange
+        return FakeExchange(symbols)
+    return create_client(EXCHANGE_ID, market_type='swap')
+
+
+def main():
+    strategies = [create_strategy(name, **params) for name, params in STRATEGIES]
+    exchange = create_exchange()
+    names = symbols
+    if scan_universe:
+        names = Universe(exchange).symbols('swap', 'USDT', universe_min_volume, universe_top)
+    scanner = Scanner(exchange, strategies, names)
+    source = f" (resampled from {BASE_TIMEFRAME})" if scanner.feed is not None else ""
+    print(f"--- Scanning {len(names)} symbols on {', '.join(scanner.timeframes)}{source} ---")
+    for strategy in strategies:
+        print(f"  {strategy.name} ({strategy.timeframe})")
+    scanner.run()
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except KeyboardInterrupt:
+        print("\nExiting...")
@@ -0,0 +1,108 @@
+import asyncio
+import time
+from collections import defaultdict
+from typing import Callable, Dict, List, NamedTuple, Optional
+
+from timeframes import next_bar_close, timeframe_seconds
+
+DEFAULT_SETTLE_SECONDS = 2.0  # Give the exchange time to finalise the closed bar
+IDLE_SECONDS = 1.0  # How often the run loops look again while no job is registered
+
+# Callback receives {timeframe: [symbols]} for everything due at one boundary
+BatchCallback = Callable[[Dict[str, List[str]], float], None]
+
+
+def seconds_until_next_bar(timeframe: str, settle_seconds: float = DEFAULT_SETTLE_SECONDS,
+                           now: Optional[float] = None) -> float:
+    """Time to wait until the current bar has closed, plus the settle delay"""
+    now = time.time() if now is None else now
+    return next_bar_close(timeframe, now) + settle_seconds - now
+
+
+def sleep_until_next_bar(timeframe: str, settle_seconds: float = DEFAULT_SETTLE_SECONDS):
+    """Block until the current bar of `timeframe` has closed"""
+    time.sleep(seconds_until_next_bar(timeframe, settle_seconds))
+
+
+class Job(NamedTuple):
+    timeframe: str
+    symbols: List[str]
+    callback: BatchCallback
+
+
+class BarScheduler:
+    """
+    Wakes at every bar boundary of the registered timeframes.
+
+    Several timeframes can close at the same instant (e.g. 1m, 5m and 15m at
+    10:15); all jobs sharing a callback are then coalesced into one call with
+    every due timeframe and its symbols.
+    """
+
+    def __init__(self, settle_seconds: float = DEFAULT_SETTLE_SECONDS, clock=time.time, sleep=time.sleep):
+        self.settle_seconds = settle_seconds
+        self.clock = clock
+        self.sleep = sleep
+        self.jobs: List[Job] = []
+
+    def add(self, timeframe: str, symbols: List[str], callback: BatchCallback):
+        """Register `symbols` to be handed to `callback` at every `timeframe` close"""
+        timeframe_seconds(timeframe)  # Reject unknown timeframes up front
+        self.jobs.append(Job(timeframe, list(symbols), callback))
+
+    def next_boundary(self, now: float) -> Optional[float]:
+        """Earliest bar close after `now` across all registered timeframes; None without jobs"""
+        if not self.jobs:
+            return None
+        return min(next_bar_close(job.timeframe, now) for job in self.jobs)
+
+    def due_batches(self, boundary: float) -> Dict[BatchCallback, Dict[str, List[str]]]:
+        """Group the jobs closing at `boundary` by callback, merging their symbols"""
+        batches: Dict[BatchCallback, Dict[str, List[str]]] = defaultdict(dict)
+        for job in self.jobs:
+            if int(boundary) % timeframe_seconds(job.timeframe) != 0:
+                continue
+            symbols = batches[job.callback].setdefault(job.timeframe, [])
+            symbols.extend(s for s in job.symbols if s not in symbols)
+        return batches
+
+    def run_due(self, boundary: float):
+        """Call every callback due at `boundary`, once each"""
+        for callback, batch in self.due_batches(boundary).items():
+            try:
+                callback(batch, boundary)
+            except Exception as e:
+                print(f"Scheduled job error: {e}")
+
+    def run_forever(self):
+        """
+        Sleep until each bar close (plus settle delay) and run the due jobs.
+        Until the first add() (e.g. from another thread) it just waits.
+        """
+        while True:
+            boundary = self.next_boundary(self.clock())
+            if boundary is None:
+                self.sleep(IDLE_SECONDS)
+                continue
+            delay = boundary + self.settle_seconds - self.clock()
+            if delay > 0:
+                self.sleep(delay)
+            self.run_due(boundary)
+
+    async def run_forever_async(self):
+        """run_forever for asyncio programs; callbacks may be coroutines"""
+        while True:
+            boundary = self.next_boundary(self.clock())
+            if boundary is None:
+                await asyncio.sleep(IDLE_SECONDS)
+                continue
+            delay = boundary + self.settle_seconds - self.clock()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            for callback, batch in self.due_batches(boundary).items():
+                try:
+                    result = callback(batch, boundary)
+                    if asyncio.iscoroutine(result):
+                        await result
+                except Exception as e:
+                    print(f"Scheduled job error: {e}")
@@ -0,0 +1,120 @@
+import time
+from multiprocessing import shared_memory
+from typing import Dict, Iterable, List
+
+import numpy as np
+
+from divergence import DIVERGENCE_TYPES
+
+# One row per symbol, written only by the worker that owns the symbol
+SNAPSHOT_DTYPE = np.dtype([
+    ('seq', '<u8'),  # Odd while the row is being written (seqlock)
+    ('symbol', 'S48'),
+    ('worker', '<i4'),
+    ('updated', '<f8'),  # Unix time of the last write
+    ('bar_time', '<i8'),  # Open time (ms) of the last closed bar processed
+    ('price', '<f8'),
+    ('rsi', '<f8'),  # RSI including the forming bar
+    ('state', 'u1'),  # DIVERGENCE_TYPES bits currently active
+    ('events', 'u1'),  # Bits newly confirmed on bar_time
+    ('event_count', '<u4'),  # Bumped with every new `events`; readers alert when it changes
+], align=True)
+
+
+def divergence_bits(div_types: Iterable[str]) -> int:
+    bits = 0
+    for div_type in div_types:
+        bits |= 1 << DIVERGENCE_TYPES.index(div_type)
+    return bits
+
+
+def divergence_types(bits: int) -> List[str]:
+    return [div_type for i, div_type in enumerate(DIVERGENCE_TYPES) if bits & (1 << i)]
+
+
+class SharedSnapshot:
+    """
+    Latest per-symbol indicator values in a shared memory struct array.
+
+    Scanner workers publish into their own rows and any process can read
+    the whole table without locks or pickling. Every row is a seqlock: the
+    writer makes `seq` odd, writes the fields, then makes it even again; a
+    reader copies the rows and retries those whose `seq` was odd or moved
+    during the copy. That is only safe with one writer per row, which the
+    symbol sharding guarantees.
+    """
+
+    def __init__(self, shm: shared_memory.SharedMemory, slots: int, owner: bool = False):
+        self.shm = shm
+        self.owner = owner
+        self.rows = np.ndarray((slots,), dtype=SNAPSHOT_DTYPE, buffer=shm.buf)
+
+    @classmethod
+    def create(cls, symbols: List[str]) -> "SharedSnapshot":
+        """New zeroed block with one row per symbol; the creator unlinks it"""
+        shm = shared_memory.SharedMemory(create=True, size=max(1, len(symbols)) * SNAPSHOT_DTYPE.itemsize)
+        snapshot = cls(shm, len(symbols), owner=True)
+        snapshot.rows[:] = np.zeros(len(symbols), dtype=SNAPSHOT_DTYPE)
+        snapshot.rows['symbol'] = [symbol.encode() for symbol in symbols]
+        snapshot.rows['worker'] = -1
+        snapshot.rows['price'] = np.nan
+        snapshot.rows['rsi'] = np.nan
+        return snapshot
+
+    @classmethod
+    def attach(cls, name: str, slots: int) -> "SharedSnapshot":
+        return cls(shared_memory.SharedMemory(name=name), slots)
+
+    @property
+    def name(self) -> str:
+        return self.shm.name
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def write(self, slot: int, **fields):
+        """Update some fields of one row; the caller must own the row"""
+        seq = self.rows['seq'][slot]
+        self.rows['seq'][slot] = seq + 1
+        for field, value in fields.items():
+            self.rows[field][slot] = value
+        self.rows['updated'][slot] = time.time()
+        self.rows['seq'][slot] = seq + 2
+
+    def read(self, max_retries: int = 1000) -> np.ndarray:
+        """
+        Copy of every row, each consistent on its own. A row still being
+        written after `max_retries` tries keeps an odd `seq` in the copy and
+        its other fields may be torn; readers skip it (see stale_rows).
+        """
+        before = self.rows['seq'].copy()
+        copy = self.rows.copy()
+        torn = np.flatnonzero((before & 1) | (before != self.rows['seq']))
+        for slot in torn:
+            for _ in range(max_retries):
+                seq = self.rows['seq'][slot]
+                if not seq & 1:
+                    row = self.rows[slot].copy()
+                    if self.rows['seq'][slot] == seq:
+                        copy[slot] = row
+                        break
+                time.sleep(0)
+            else:
+                copy['seq'][slot] |= 1
+        return copy
+
+    def close(self):
+        self.rows = None
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+
+def stale_rows(rows: np.ndarray) -> np.ndarray:
+    """Mask of rows in a read() copy that could not be read consistently"""
+    return (rows['seq'] & 1).astype(bool)
+
+
+def slot_map(rows: np.ndarray) -> Dict[str, int]:
+    """Symbol -> row index"""
+    return {symbol.decode(): i for i, symbol in enumerate(rows['symbol'])}
\ No newline at end of file
@@ -0,0 +1,250 @@
+import asyncio
+import json
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+from candle_store import COLUMNS, CandleStore
+from divergence import DivergenceDetector
+from exchange_client import create_client
+from indicators import RSIState
+from timeframes import bar_open_ms, timeframe_ms
+
+# Configuration
+EXCHANGE_ID = 'mexc'
+SYMBOL = 'XRP/USDT'
+TIMEFRAME = '1m'
+RSI_PERIOD = 14
+USE_TRADES = False  # Build candles from watch_trades instead of watch_ohlcv
+REPLAY_FILE = None  # Path to a recorded JSON-lines file to replay offline
+SEED_BARS = 300  # Closed candles replayed into the RSI and divergence state before streaming
+
+# Divergence detection parameters (from PineScript)
+lbL = 5
+lbR = 5
+rangeUpper = 60
+rangeLower = 5
+enabled_divergences = ("regular_bullish", "regular_bearish")
+
+
+class ReplayFinished(Exception):
+    """Raised by ReplayExchange once the recording is exhausted"""
+
+
+class CandleBuilder:
+    """
+    Turns a push stream of trades or kline updates into OHLCV candles.
+
+    Updates for the open bar replace it; the first update of a newer bar
+    closes the previous one, which is returned to the caller.
+    """
+
+    def __init__(self, timeframe: str):
+        self.timeframe = timeframe
+        self.current: Optional[list] = None
+
+    def add_candle(self, candle: list) -> Optional[list]:
+        """Apply a kline update; returns the candle it closed, if any"""
+        if self.current is None or candle[0] == self.current[0]:
+            self.current = list(candle)
+            return None
+        if candle[0] < self.current[0]:
+            return None  # Stale update for a bar already closed
+        closed, self.current = self.current, list(candle)
+        return closed
+
+    def add_trade(self, timestamp: int, price: float, amount: float) -> Optional[list]:
+        """Apply one trade; returns the candle it closed, if any"""
+        bar_open = bar_open_ms(timestamp, self.timeframe)
+        if self.current is not None and bar_open == self.current[0]:
+            candle = self.current
+            candle[2] = max(candle[2], price)
+            candle[3] = min(candle[3], price)
+            candle[4] = price
+            candle[5] += amount
+            return None
+        return self.add_candle([bar_open, price, price, price, price, amount])
+
+
+class BarPipeline:
+    """
+    Feeds closed bars through RSI and divergence state for one symbol.
+
+    seed() replays closed history first, as new_logic.feed_closed_candles
+    does on its first fetch, so RSI and divergences are live from the first
+    streamed bar instead of after rsi_period + lbL + lbR bars.
+    """
+
+    def __init__(self, symbol: str, rsi_period: int = RSI_PERIOD):
+        self.symbol = symbol
+        self.rsi = RSIState(rsi_period)
+        self.divergences = DivergenceDetector(lbL, lbR, rangeLower, rangeUpper, enabled_divergences)
+
+    def seed(self, ohlcv: List[list]):
+        """Replay closed candles into the state; divergences they confirm are not new, so none are returned"""
+        for candle in ohlcv:
+            self.on_closed(candle)
+
+    def on_closed(self, candle: list) -> List[str]:
+        """Apply a closed candle; returns divergence types it confirmed"""
+        if self.rsi.last_timestamp is not None and candle[0] <= self.rsi.last_timestamp:
+            return []  # Already applied, e.g. the last seeded bar
+        value = self.rsi.update(candle[4], candle[0])
+        if value is None:
+            return []
+        return self.divergences.update(value, candle[3], candle[2])
+
+    def on_forming(self, candle: list) -> Optional[float]:
+        """RSI of the still-forming candle"""
+        return self.rsi.peek(candle[4])
+
+
+class ReplayExchange:
+    """
+    Offline stand-in for a ccxt.pro exchange, replaying recorded pushes.
+
+    Each record is a trade {"symbol", "timestamp", "price", "amount"} or a
+    kline update {"symbol", "timeframe", "ohlcv": [...]}. `speed` scales the
+    recorded gaps between pushes; 0 replays as fast as possible.
+    """
+
+    def __init__(self, records: List[Dict], speed: float = 0.0):
+        self.records = records
+        self.speed = speed
+        self._positions: Dict[str, int] = {}
+        self._last_timestamps: Dict[str, int] = {}
+
+    @classmethod
+    def from_file(cls, path: str, speed: float = 0.0) -> "ReplayExchange":
+        with open(path) as f:
+            return cls([json.loads(line) for line in f if line.strip()], speed)
+
+    async def _next(self, stream: str, match: Callable[[Dict], bool]) -> Dict:
+        position = self._positions.get(stream, 0)
+        while position < len(self.records):
+            record = self.records[position]
+            position += 1
+            if match(record):
+                self._positions[stream] = position
+                timestamp = record['timestamp'] if 'timestamp' in record else record['ohlcv'][0]
+                previous = self._last_timestamps.get(stream)
+                self._last_timestamps[stream] = timestamp
+                if self.speed and previous is not None:
+                    await asyncio.sleep(max(0.0, (timestamp - previous) / 1000.0 / self.speed))
+                return record
+        self._positions[stream] = position
+        raise ReplayFinished(stream)
+
+    async def watch_trades(self, symbol: str, since=None, limit=None, params=None) -> List[Dict]:
+        record = await self._next(f"trades|{symbol}", lambda r: r.get('symbol') == symbol and 'price' in r)
+        return [record]
+
+    async def watch_ohlcv(self, symbol: str, timeframe: str = '1m', since=None, limit=None, params=None) -> List[list]:
+        record = await self._next(
+            f"ohlcv|{symbol}|{timeframe}",
+            lambda r: r.get('symbol') == symbol and r.get('timeframe') == timeframe and 'ohlcv' in r,
+        )
+        return [record['ohlcv']]
+
+    async def close(self):
+        pass
+
+
+def closed_history(symbol: str, timeframe: str, now_ms: int, store: Optional[CandleStore] = None,
+                   rest=None, bars: int = SEED_BARS) -> List[list]:
+    """
+    The last `bars` closed candles, from the candle store when it is up to
+    date with the last closed bar, else from one REST fetch on `rest`.
+    """
+    step = timeframe_ms(timeframe)
+    last_closed = bar_open_ms(now_ms, timeframe) - step
+    if store is not None and (store.last_timestamp(symbol, timeframe) or 0) >= last_closed:
+        columns = store.read(symbol, timeframe)
+        rows = np.column_stack([columns[name][-bars:] for name, _ in COLUMNS]).tolist()
+        for row in rows:
+            row[0] = int(row[0])
+        return rows
+    if rest is None:
+        return []
+    ohlcv = rest.fetch_ohlcv(symbol, timeframe, limit=bars + 1)
+    return [candle for candle in ohlcv if candle[0] + step <= now_ms][-bars:]
+
+
+def create_pro_exchange(exchange_id: str = EXCHANGE_ID, config: Optional[Dict] = None):
+    """ccxt.pro WebSocket client; imported lazily since only streaming needs it"""
+    import ccxt.pro as ccxtpro
+
+    return getattr(ccxtpro, exchange_id)({'enableRateLimit': True, **(config or {})})
+
+
+async def stream_symbol(exchange, symbol: str, timeframe: str,
+                        on_closed: Callable[[list], None],
+                        on_forming: Optional[Callable[[list], None]] = None,
+                        use_trades: bool = USE_TRADES):
+    """Build candles from the push stream and hand closed/forming bars to the callbacks"""
+    builder = CandleBuilder(timeframe)
+    while True:
+        try:
+            if use_trades:
+                closed = [
+                    builder.add_trade(trade['timestamp'], trade['price'], trade['amount'])
+                    for trade in await exchange.watch_trades(symbol)
+                ]
+            else:
+                closed = [builder.add_candle(candle) for candle in await exchange.watch_ohlcv(symbol, timeframe)]
+        except ReplayFinished:
+            return
+
+        for candle in closed:
+            if candle is not None:
+                on_closed(candle)
+        if on_forming and builder.current is not None:
+            on_forming(builder.current)
+
+
+async def record_stream(exchange, symbol: str, timeframe: str, path: str, count: int, use_trades: bool = USE_TRADES):
+    """Capture `count` pushes to a JSON-lines file that ReplayExchange can play back"""
+    with open(path, 'w') as f:
+        for _ in range(count):
+            if use_trades:
+                for trade in await exchange.watch_trades(symbol):
+                    f.write(json.dumps({
+                        'symbol': symbol, 'timestamp': trade['timestamp'],
+                        'price': trade['price'], 'amount': trade['amount'],
+                    }) + "\n")
+            else:
+                for candle in await exchange.watch_ohlcv(symbol, timeframe):
+                    f.write(json.dumps({'symbol': symbol, 'timeframe': timeframe, 'ohlcv': candle}) + "\n")
+
+
+async def main():
+    exchange = ReplayExchange.from_file(REPLAY_FILE) if REPLAY_FILE else create_pro_exchange()
+    pipeline = BarPipeline(SYMBOL)
+    if not REPLAY_FILE:
+        # Warm up from history, so the first streamed bar already has RSI and pivots behind it
+        rest = create_client(EXCHANGE_ID)
+        pipeline.seed(closed_history(SYMBOL, TIMEFRAME, rest.milliseconds(), CandleStore(exchange_id=EXCHANGE_ID), rest))
+
+    def on_closed(candle):
+        for div_type in pipeline.on_closed(candle):
+            timestamp = datetime.fromtimestamp(candle[0] / 1000).strftime("%Y-%m-%d %H:%M:%S")
+            print(f"\n{timestamp} | {SYMBOL} | {div_type} | {candle[4]:.4f}")
+
+    def on_forming(candle):
+        rsi = pipeline.on_forming(candle)
+        if rsi is not None:
+            print(f"{SYMBOL} {candle[4]:.4f} - RSI: {rsi:.2f}{'':<20}", end='\r', flush=True)
+
+    print(f"--- Streaming {SYMBOL} {TIMEFRAME} from {'replay' if REPLAY_FILE else EXCHANGE_ID} ---")
+    try:
+        await stream_symbol(exchange, SYMBOL, TIMEFRAME, on_closed, on_forming)
+    finally:
+        await exchange.close()
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        print("\nExiting...")
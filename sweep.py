@@ -0,0 +1,184 @@
+import itertools
+import os
+import time
+from multiprocessing import Pool, shared_memory
+from typing import Dict, List, Mapping, Optional, Tuple
+
+import numpy as np
+
+from backtest import run_backtest
+from indicators import atr, calculate_rsi
+
+SYMBOL = 'XRP/USDT'
+TIMEFRAME = '1m'
+TOP_RESULTS = 5  # Best grid points printed per strategy
+
+# Grids over the hand-picked constants of the live scripts
+PARAM_GRIDS = {
+    'rsi_threshold': {  # rsi_alert.py / rsi_alert_1m.py
+        'rsi_period': [7, 9, 14, 21],
+        'overbought': [65, 70, 75, 80],
+        'oversold': [20, 25, 30, 35],
+    },
+    'rsi_ma': {  # rsi_ma.py
+        'rsi_period': [9, 14, 21],
+        'ma_length': [9, 14, 21],
+        'ma_type': ['SMA', 'EMA'],
+        'tp_multiplier': [1.5, 2.0, 3.0],
+        'sl_multiplier': [0.5, 1.0, 1.5],
+    },
+    'divergence': {  # new_logic.py
+        'rsi_period': [9, 14],
+        'lbL': [3, 5, 8],
+        'lbR': [3, 5],
+        'rangeLower': [5],
+        'rangeUpper': [30, 60],
+    },
+}
+
+PRICE_COLUMNS = ('high', 'low', 'close')  # All a backtest reads
+
+# Per-worker state, set up once by _init_worker / _init_mapped_worker
+_shm: Optional[shared_memory.SharedMemory] = None
+_candles: Dict[str, np.ndarray] = {}
+_rsi_cache: Dict[int, np.ndarray] = {}
+_atr_cache: Dict[int, np.ndarray] = {}
+
+
+def expand_grid(grid: Dict[str, list]) -> List[Dict]:
+    """Every combination of the grid's values, as keyword dicts"""
+    names = list(grid)
+    return [dict(zip(names, values)) for values in itertools.product(*(grid[name] for name in names))]
+
+
+def price_columns(candles) -> Dict[str, np.ndarray]:
+    """High, low and close of an (n x 6) ccxt-style array or of named columns"""
+    if isinstance(candles, Mapping):
+        return {name: candles[name] for name in PRICE_COLUMNS}
+    candles = np.asarray(candles, dtype=np.float64)
+    return {'high': candles[:, 2], 'low': candles[:, 3], 'close': candles[:, 4]}
+
+
+def share_candles(columns: Dict[str, np.ndarray]) -> shared_memory.SharedMemory:
+    """Copy the price columns into a shared memory block workers can map without pickling"""
+    rows = len(columns['close'])
+    shm = shared_memory.SharedMemory(create=True, size=max(1, len(PRICE_COLUMNS) * rows * 8))
+    block = np.ndarray((len(PRICE_COLUMNS), rows), dtype=np.float64, buffer=shm.buf)
+    for position, name in enumerate(PRICE_COLUMNS):
+        block[position] = columns[name]
+    return shm
+
+
+def mapped_columns(columns: Dict[str, np.ndarray]) -> Optional[Dict[str, Tuple[str, str, int, int]]]:
+    """(file, dtype, offset, rows) per column if all are file memory maps, as CandleStore.read() gives"""
+    if not all(isinstance(column, np.memmap) and column.filename for column in columns.values()):
+        return None
+    return {name: (column.filename, column.dtype.str, column.offset, len(column)) for name, column in columns.items()}
+
+
+def _init_worker(shm_name: str, rows: int):
+    global _shm, _candles
+    _shm = shared_memory.SharedMemory(name=shm_name)
+    block = np.ndarray((len(PRICE_COLUMNS), rows), dtype=np.float64, buffer=_shm.buf)
+    _candles = dict(zip(PRICE_COLUMNS, block))
+    _rsi_cache.clear()
+    _atr_cache.clear()
+
+
+def _init_mapped_worker(files: Dict[str, Tuple[str, str, int, int]]):
+    """Map the store's column files directly; the OS page cache is shared by every worker"""
+    global _candles
+    _candles = {name: np.memmap(path, dtype=dtype, mode='r', offset=offset, shape=(rows,))
+                for name, (path, dtype, offset, rows) in files.items()}
+    _rsi_cache.clear()
+    _atr_cache.clear()
+
+
+def _cached_rsi(period: int) -> np.ndarray:
+    if period not in _rsi_cache:
+        _rsi_cache[period] = calculate_rsi(_candles['close'], period)
+    return _rsi_cache[period]
+
+
+def _cached_atr(length: int) -> np.ndarray:
+    if length not in _atr_cache:
+        _atr_cache[length] = atr(_candles['high'], _candles['low'], _candles['close'], length)
+    return _atr_cache[length]
+
+
+def _evaluate(task: Tuple[str, Dict]) -> Tuple[str, Dict, Dict[str, float]]:
+    """Backtest one grid point in a worker, reusing its cached RSI/ATR series"""
+    strategy, params = task
+    result = run_backtest(
+        _candles, strategy,
+        rsi=_cached_rsi(params.get('rsi_period', 14)),
+        atr_values=_cached_atr(params.get('atr_length', 14)),
+        **params,
+    )
+    return strategy, params, result
+
+
+def sweep(candles, grids: Dict[str, Dict[str, list]] = PARAM_GRIDS,
+          processes: Optional[int] = None) -> List[Tuple[str, Dict, Dict[str, float]]]:
+    """
+    Evaluate every grid point of every strategy across a process pool.
+
+    Memory-mapped columns from CandleStore.read() are mapped again by each
+    worker straight from their files; anything else has its price columns
+    copied once into a shared memory block mapped by all workers. Tasks
+    are ordered by RSI period and handed out in contiguous chunks, so each
+    worker computes the RSI for a period once and reuses it for the rest of
+    its chunk.
+    """
+    tasks = [(strategy, params) for strategy, grid in grids.items() for params in expand_grid(grid)]
+    tasks.sort(key=lambda task: (task[1].get('rsi_period', 14), task[1].get('atr_length', 14)))
+    processes = processes or os.cpu_count() or 1
+    chunksize = max(1, len(tasks) // (processes * 4))
+
+    columns = price_columns(candles)
+    files = mapped_columns(columns)
+    if files is not None:
+        with Pool(processes, initializer=_init_mapped_worker, initargs=(files,)) as pool:
+            return list(pool.imap_unordered(_evaluate, tasks, chunksize=chunksize))
+
+    shm = share_candles(columns)
+    try:
+        with Pool(processes, initializer=_init_worker, initargs=(shm.name, len(columns['close']))) as pool:
+            return list(pool.imap_unordered(_evaluate, tasks, chunksize=chunksize))
+    finally:
+        shm.close()
+        shm.unlink()
+
+
+def main():
+    from candle_store import CandleStore
+
+    candles = CandleStore().read(SYMBOL, TIMEFRAME)  # Memory-mapped; workers map the same files
+    bars = len(candles['close'])
+    source = 'stored'
+    if bars == 0:
+        from fake_exchange import FakeExchange
+
+        candles = FakeExchange().ohlcv_array(SYMBOL, TIMEFRAME, limit=200_000)
+        bars = len(candles)
+        source = 'synthetic'
+
+    points = sum(len(expand_grid(grid)) for grid in PARAM_GRIDS.values())
+    processes = os.cpu_count() or 1
+    print(f"--- Sweeping {points} grid points over {bars} {source} {TIMEFRAME} bars "
+          f"on {processes} processes ---")
+    started = time.perf_counter()
+    results = sweep(candles, processes=processes)
+    elapsed = time.perf_counter() - started
+    print(f"Done in {elapsed:.1f}s ({points / elapsed:.1f} grid points/s)")
+
+    for strategy in PARAM_GRIDS:
+        ranked = sorted((r for r in results if r[0] == strategy), key=lambda r: r[2]['total_return'], reverse=True)
+        print(f"\n{strategy}:")
+        for _, params, result in ranked[:TOP_RESULTS]:
+            print(f"  {params} -> trades: {result['trades']}, hit rate: {result['hit_rate']:.1%}, "
+                  f"PnL: {result['total_return']:+.2%}, PF: {result['profit_factor']:.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+import threading
+
+import pytest
+
+from alerts import Alert, AlertDispatcher, FileSink, Sink
+
+
+class GatedSink(Sink):
+    """Records alerts; every handle() waits for `gate`, so the queue behind it fills deterministically"""
+
+    name = 'gated'
+
+    def __init__(self):
+        self.gate = threading.Event()
+        self.entered = threading.Event()
+        self.handled = []
+
+    def handle(self, alert: Alert):
+        self.entered.set()
+        self.gate.wait(5)
+        self.handled.append(alert)
+
+
+class GatedFileSink(FileSink):
+    def __init__(self, path: str, gate: threading.Event):
+        super().__init__(path)
+        self.gate = gate
+
+    def handle(self, alert: Alert):
+        self.gate.wait(5)
+        super().handle(alert)
+
+
+def alert(kind: str, message: str = '', symbol: str = 'XRP/USDT') -> Alert:
+    return Alert(symbol, kind, message or kind, price=1.0, source='test')
+
+
+def blocked_dispatcher(sink: GatedSink, **kwargs) -> AlertDispatcher:
+    """Started dispatcher whose worker is stuck handling a first 'busy' alert"""
+    dispatcher = AlertDispatcher([sink], **kwargs).start()
+    dispatcher.dispatch(alert('busy'))
+    assert sink.entered.wait(2)
+    return dispatcher
+
+
+def test_identical_alerts_merge_while_queued():
+    sink = GatedSink()
+    dispatcher = blocked_dispatcher(sink)
+    for n in range(3):
+        dispatcher.dispatch(alert('overbought', f"RSI {71 + n}"))
+    dispatcher.dispatch(alert('oversold'))
+    assert dispatcher.stats()['gated'] == {'queued': 2, 'merged': 2, 'dropped': 0}
+
+    sink.gate.set()
+    assert dispatcher.flush(2)
+    assert [(a.kind, a.message, a.count) for a in sink.handled] == [
+        ('busy', 'busy', 1), ('overbought', 'RSI 73', 3), ('oversold', 'oversold', 1)]
+
+
+@pytest.mark.parametrize('overflow, delivered', [
+    ('drop_oldest', ['busy', 'b', 'c']),
+    ('drop_newest', ['busy', 'a', 'b']),
+])
+def test_overflow_policy(overflow, delivered):
+    sink = GatedSink()
+    dispatcher = blocked_dispatcher(sink, maxsize=2, overflow=overflow)
+    for kind in ('a', 'b', 'c'):
+        dispatcher.dispatch(alert(kind))
+    assert dispatcher.stats()['gated']['dropped'] == 1
+
+    sink.gate.set()
+    assert dispatcher.flush(2)
+    assert [a.kind for a in sink.handled] == delivered
+
+
+def test_unknown_overflow_policy():
+    with pytest.raises(ValueError):
+        AlertDispatcher([GatedSink()], overflow='drop_all')
+
+
+def test_file_sink_keeps_every_entry(tmp_path):
+    path = tmp_path / 'divergence_log.txt'
+    merging = GatedSink()
+    file_sink = GatedFileSink(str(path), merging.gate)
+    dispatcher = AlertDispatcher([merging, file_sink]).start()
+    for _ in range(3):
+        dispatcher.dispatch(alert('regular_bullish'))
+
+    merging.gate.set()
+    assert dispatcher.flush(2)
+    assert len(path.read_text().splitlines()) == 3
+    assert sum(a.count for a in merging.handled) == 3 and len(merging.handled) <= 2
+
+
+def test_flush_times_out_while_a_sink_is_stuck():
+    sink = GatedSink()
+    dispatcher = blocked_dispatcher(sink)
+    assert not dispatcher.flush(0.05)
+    sink.gate.set()
+    assert dispatcher.flush(2)
+
+
+def test_stop_delivers_everything_still_queued():
+    sink = GatedSink()
+    dispatcher = blocked_dispatcher(sink)
+    for kind in ('a', 'b', 'c'):
+        dispatcher.dispatch(alert(kind))
+
+    sink.gate.set()
+    dispatcher.stop(2)
+    assert [a.kind for a in sink.handled] == ['busy', 'a', 'b', 'c']
+    assert dispatcher.stats()['gated']['queued'] == 0
+
+
+def test_alerts_only_go_to_the_sinks_they_name():
+    console, audio = GatedSink(), GatedSink()
+    audio.name = 'audio'
+    console.gate.set()
+    audio.gate.set()
+    dispatcher = AlertDispatcher([console, audio]).start()
+    dispatcher.dispatch(alert('buy')._replace(sinks=('audio',)))
+    assert dispatcher.flush(2)
+    assert console.handled == [] and [a.kind for a in audio.handled] == ['buy']
@@ -0,0 +1,72 @@
+import asyncio
+
+import ccxt
+import pytest
+
+import resilience
+from async_scanner import fetch_all
+from fake_exchange import AsyncFakeExchange
+from rate_limit import AsyncRateLimitedExchange, rate_limited
+from resilience import AsyncResilientExchange
+
+SYMBOLS = [f"C{i}/USDT" for i in range(10)]
+
+
+class FlakyAsyncExchange(AsyncFakeExchange):
+    """The first fetch of each symbol in `failing` raises `error`"""
+
+    def __init__(self, error, failing=SYMBOLS, **kwargs):
+        super().__init__(SYMBOLS, **kwargs)
+        self.error = error
+        self.failed = set(SYMBOLS) - set(failing)
+
+    async def fetch_ohlcv(self, symbol, timeframe='1m', since=None, limit=None, params=None):
+        if symbol not in self.failed:
+            self.failed.add(symbol)
+            self.calls += 1
+            raise self.error
+        return await super().fetch_ohlcv(symbol, timeframe, since, limit, params)
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(resilience, 'BASE_DELAY_SECONDS', 0.001)
+    monkeypatch.setattr(resilience, 'RATE_LIMIT_DELAY_SECONDS', 0.001)
+
+
+def test_async_client_draws_from_the_rate_limiter():
+    limited = rate_limited(AsyncFakeExchange(SYMBOLS), shared=False)
+    assert isinstance(limited, AsyncRateLimitedExchange)
+    before = limited.limiter.bucket.tokens
+
+    candles = asyncio.run(fetch_all(AsyncResilientExchange(limited), SYMBOLS, '1m', 50))
+    assert sorted(candles) == SYMBOLS
+    assert limited.limiter.bucket.tokens == pytest.approx(before - len(SYMBOLS), abs=1.0)
+
+
+def test_async_client_retries_network_errors():
+    exchange = FlakyAsyncExchange(ccxt.NetworkError('reset'), failing=SYMBOLS[:3])  # Below the breaker's limit
+    client = AsyncResilientExchange(rate_limited(exchange, shared=False))
+
+    candles = asyncio.run(fetch_all(client, SYMBOLS, '1m', 50))
+    assert sorted(candles) == SYMBOLS
+    assert exchange.calls == len(SYMBOLS) + 3
+    assert client.breakers['fetch_ohlcv'].state == 'closed'
+
+
+def test_async_client_does_not_retry_exchange_errors():
+    exchange = FlakyAsyncExchange(ccxt.BadSymbol('no such market'))
+    client = AsyncResilientExchange(rate_limited(exchange, shared=False))
+
+    assert asyncio.run(fetch_all(client, SYMBOLS, '1m', 50)) == {}
+    assert exchange.calls == len(SYMBOLS)
+
+
+def test_async_rate_limit_error_pauses_the_bucket():
+    exchange = FlakyAsyncExchange(ccxt.RateLimitExceeded('429'))
+    limited = rate_limited(exchange, shared=False)
+    paused = []
+    limited.limiter.bucket.pause = paused.append
+
+    asyncio.run(fetch_all(AsyncResilientExchange(limited), SYMBOLS[:1], '1m', 50))
+    assert len(paused) == 1
@@ -0,0 +1,98 @@
+import sys
+import wave
+
+import numpy as np
+import pytest
+
+import audio
+from audio import (CHANNELS, FALLBACK_TONE, SAMPLE_RATE, BellBackend, RecordingBackend, SoundBank, SoundPlayer,
+                   decode_wav, default_backend, tone_samples)
+
+
+def write_wav(path, samples: np.ndarray, width: int, rate: int = SAMPLE_RATE) -> str:
+    """Write (frames, channels) samples, already in the sample width's integer range"""
+    with wave.open(str(path), 'wb') as w:
+        w.setnchannels(samples.shape[1])
+        w.setsampwidth(width)
+        w.setframerate(rate)
+        w.writeframes(samples.astype(np.uint8 if width == 1 else '<i2').tobytes())
+    return str(path)
+
+
+def ramp(frames: int, channels: int) -> np.ndarray:
+    """16-bit samples covering the whole range, different per channel"""
+    base = np.linspace(-32768, 32767, frames).astype(np.int64)
+    return np.column_stack([base if c == 0 else -base - 1 for c in range(channels)])
+
+
+@pytest.mark.parametrize('channels', [1, 2])
+def test_decode_16_bit(tmp_path, channels):
+    samples = ramp(1000, channels)
+    decoded = decode_wav(write_wav(tmp_path / 'a.wav', samples, 2))
+    assert decoded.dtype == np.int16 and decoded.shape == (1000, CHANNELS)
+    expected = np.repeat(samples, CHANNELS, axis=1) if channels == 1 else samples
+    np.testing.assert_array_equal(decoded, expected)
+
+
+@pytest.mark.parametrize('channels', [1, 2])
+def test_decode_8_bit(tmp_path, channels):
+    samples = np.column_stack([np.arange(256)] * channels)  # Unsigned, 128 is silence
+    decoded = decode_wav(write_wav(tmp_path / 'a.wav', samples, 1))
+    assert decoded.shape == (256, CHANNELS)
+    np.testing.assert_array_equal(decoded[:, 0], (np.arange(256) - 128) * 256)
+    np.testing.assert_array_equal(decoded[:, 1], decoded[:, 0])
+
+
+def test_decode_resamples_to_the_bank_rate(tmp_path):
+    samples = ramp(1000, 2)
+    decoded = decode_wav(write_wav(tmp_path / 'a.wav', samples, 2, rate=SAMPLE_RATE // 2))
+    assert decoded.shape == (2000, CHANNELS)
+    np.testing.assert_array_equal(decoded[::2], samples)  # Original samples land on the even frames
+
+
+def test_unreadable_file_falls_back_to_a_beep(tmp_path):
+    bank = SoundBank.from_files([str(tmp_path / 'missing.wav')])
+    np.testing.assert_array_equal(bank.get(str(tmp_path / 'missing.wav')).samples, tone_samples(FALLBACK_TONE))
+
+
+def test_mix_overlays_clips_and_scales_down_only_when_needed(tmp_path):
+    quiet = write_wav(tmp_path / 'quiet.wav', np.full((100, 2), 1000), 2)
+    short = write_wav(tmp_path / 'short.wav', np.full((40, 2), 2000), 2)
+    loud = write_wav(tmp_path / 'loud.wav', np.full((100, 2), 30000), 2)
+    bank = SoundBank.from_files([quiet, short, loud])
+
+    mixed = bank.mix([quiet, short])
+    assert mixed.name == f"{quiet}+{short}"
+    np.testing.assert_array_equal(mixed.samples[:40], 3000)
+    np.testing.assert_array_equal(mixed.samples[40:], 1000)  # Longest clip sets the length
+
+    clipped = bank.mix([loud, quiet, short]).samples
+    assert clipped.max() == 32767  # The peak, 33000, is scaled down to full scale...
+    assert clipped[50, 0] == int(31000 * 32767 / 33000)  # ...and everything else with it
+
+
+def test_mix_skips_unknown_names(tmp_path):
+    path = write_wav(tmp_path / 'a.wav', ramp(10, 2), 2)
+    bank = SoundBank.from_files([path])
+    assert bank.mix(['nope', path]) is bank.get(path)
+    assert bank.mix(['nope']) is None
+
+
+def test_play_repeats_the_mixed_clip(tmp_path):
+    a = write_wav(tmp_path / 'a.wav', ramp(10, 2), 2)
+    b = write_wav(tmp_path / 'b.wav', ramp(10, 1), 2)
+    backend = RecordingBackend()
+    player = SoundPlayer.from_files([a, b], backend)
+
+    player.play(a, b, repeat=2)
+    assert backend.played == [f"{a}+{b}"] * 2
+    player.play('unknown.wav', repeat=3)
+    assert backend.played == [f"{a}+{b}"] * 2
+
+
+def test_default_backend_falls_back_to_the_bell(monkeypatch):
+    monkeypatch.setattr(audio.os, 'name', 'posix')
+    monkeypatch.setattr(sys, 'platform', 'linux')
+    monkeypatch.setattr(audio.shutil, 'which', lambda program: None)  # No aplay / paplay
+    monkeypatch.setitem(sys.modules, 'sounddevice', None)  # Not installed
+    assert isinstance(default_backend(), BellBackend)
@@ -0,0 +1,124 @@
+import numpy as np
+import pytest
+
+import backtest
+from backtest import STRATEGIES, divergence_signals, resolve_exits, run_backtest
+from divergence import DivergenceDetector
+from fake_exchange import FakeExchange
+from indicators import atr, calculate_rsi
+
+BARS = 600
+RSI_PERIOD = 14
+
+
+def random_candles(seed: int, bars: int = BARS):
+    """(high, low, close) around a random walk"""
+    rng = np.random.default_rng(seed)
+    close = 100.0 + np.cumsum(rng.normal(0.0, 1.0, bars))
+    return close + rng.uniform(0.0, 1.0, bars), close - rng.uniform(0.0, 1.0, bars), close
+
+
+def fake_candles(symbol: str) -> np.ndarray:
+    return np.array(FakeExchange(now_ms=1_700_000_000_000).fetch_ohlcv(symbol, '5m', limit=BARS), dtype=np.float64)
+
+
+def naive_exits(high, low, close, longs, shorts, atr_values, tp_multiplier, sl_multiplier, max_holding_bars):
+    """Bar-by-bar reference for resolve_exits"""
+    n = len(close)
+    rows = []
+    for i in range(n):
+        if not (longs[i] or shorts[i]) or np.isnan(atr_values[i]):
+            continue
+        direction = 1 if longs[i] else -1
+        tp = close[i] + direction * atr_values[i] * tp_multiplier
+        sl = close[i] - direction * atr_values[i] * sl_multiplier
+        last = min(n - 1, i + max_holding_bars)
+        exit_index, exit_price, outcome = last, close[last], 0
+        for j in range(i + 1, last + 1):
+            sl_hit = low[j] <= sl if direction > 0 else high[j] >= sl
+            tp_hit = high[j] >= tp if direction > 0 else low[j] <= tp
+            if sl_hit or tp_hit:
+                exit_index, exit_price, outcome = j, sl if sl_hit else tp, -1 if sl_hit else 1
+                break
+        rows.append((i, direction, close[i], exit_index, exit_price, outcome))
+    return [np.array(column) for column in zip(*rows)] if rows else [np.empty(0)] * 6
+
+
+def assert_same_trades(trades, expected):
+    for got, want in zip(trades, expected):
+        np.testing.assert_array_equal(got, want)
+
+
+@pytest.mark.parametrize('seed', [1, 2, 3])
+@pytest.mark.parametrize('multipliers', [(2.0, 1.0), (0.5, 0.5), (8.0, 8.0)])
+@pytest.mark.parametrize('max_holding_bars', [1, 7, 1440])
+@pytest.mark.parametrize('walk_cells', [1 << 22, 64], ids=['one chunk', 'many chunks'])
+def test_resolve_exits_matches_bar_by_bar_walk(monkeypatch, seed, multipliers, max_holding_bars, walk_cells):
+    monkeypatch.setattr(backtest, '_WALK_CELLS', walk_cells)
+    high, low, close = random_candles(seed)
+    rng = np.random.default_rng(seed + 100)
+    longs, shorts = rng.random(BARS) < 0.1, rng.random(BARS) < 0.1
+    longs[-1] = shorts[-2] = True  # Entries with no bar, or one bar, left to exit on
+    atr_values = atr(high, low, close, 14)
+    args = (high, low, close, longs, shorts, atr_values, *multipliers, max_holding_bars)
+
+    trades = resolve_exits(*args)
+    assert_same_trades(trades, naive_exits(*args))
+    assert trades.exit_index[-1] == BARS - 1 and trades.outcome[-1] == 0
+
+
+def test_bar_touching_both_levels_is_a_stop_loss():
+    close = np.array([100.0, 100.0, 100.0])
+    high = np.array([100.0, 100.5, 103.0])  # Bar 2 reaches the long's take profit...
+    low = np.array([100.0, 99.5, 98.0])  # ...and its stop loss
+    longs, shorts = np.array([True, False, False]), np.array([False, False, False])
+    atr_values = np.ones(3)
+
+    trades = resolve_exits(high, low, close, longs, shorts, atr_values, 2.0, 1.0, 10)
+    assert (trades.exit_index[0], trades.exit_price[0], trades.outcome[0]) == (2, 99.0, -1)
+    trades = resolve_exits(high, low, close, shorts, longs, atr_values, 2.0, 1.0, 10)
+    assert (trades.exit_index[0], trades.exit_price[0], trades.outcome[0]) == (2, 101.0, -1)
+
+
+def test_untouched_trades_time_out_at_market():
+    high, low, close = random_candles(4)
+    longs = np.zeros(BARS, dtype=bool)
+    longs[[20, 100, BARS - 3]] = True
+    trades = resolve_exits(high, low, close, longs, np.zeros(BARS, dtype=bool), atr(high, low, close, 14),
+                           1e6, 1e6, 50)
+    np.testing.assert_array_equal(trades.exit_index, [70, 150, BARS - 1])
+    np.testing.assert_array_equal(trades.exit_price, close[[70, 150, BARS - 1]])
+    assert (trades.outcome == 0).all()
+
+
+SERIES = [random_candles(1), random_candles(2), tuple(fake_candles('XRP/USDT')[:, [2, 3, 4]].T)]
+LOOKBACKS = [(5, 5, 5, 60), (3, 2, 2, 30), (8, 5, 5, 60)]
+
+
+@pytest.mark.parametrize('series', range(len(SERIES)))
+@pytest.mark.parametrize('lbL, lbR, rangeLower, rangeUpper', LOOKBACKS)
+def test_divergence_signals_match_streaming_detector(series, lbL, lbR, rangeLower, rangeUpper):
+    high, low, close = SERIES[series]
+    rsi = calculate_rsi(close, RSI_PERIOD)
+    detector = DivergenceDetector(lbL, lbR, rangeLower, rangeUpper, ("regular_bullish", "regular_bearish"))
+    longs, shorts = np.zeros(BARS, dtype=bool), np.zeros(BARS, dtype=bool)
+    for bar in range(BARS):
+        events = detector.update(rsi[bar], low[bar], high[bar])
+        longs[bar] = "regular_bullish" in events
+        shorts[bar] = "regular_bearish" in events
+
+    expected_longs, expected_shorts = divergence_signals(high, low, close, RSI_PERIOD, rsi, lbL, lbR,
+                                                         rangeLower, rangeUpper)
+    np.testing.assert_array_equal(longs, expected_longs)
+    np.testing.assert_array_equal(shorts, expected_shorts)
+    assert longs.any() or shorts.any()
+
+
+@pytest.mark.parametrize('strategy', STRATEGIES)
+def test_run_backtest_takes_an_array_or_named_columns(strategy):
+    candles = fake_candles('BTC/USDT')
+    columns = {name: candles[:, i].copy() for i, name in enumerate(('timestamp', 'open', 'high', 'low', 'close',
+                                                                     'volume'))}
+    result = run_backtest(candles, strategy)
+    assert result == run_backtest(columns, strategy)
+    assert result['trades'] > 0
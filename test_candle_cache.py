@@ -0,0 +1,124 @@
+from typing import Optional
+
+import numpy as np
+
+from candle_cache import CandleCache
+from fake_exchange import FakeExchange
+
+SYMBOL = 'XRP/USDT'
+STEP = 60_000  # 1m
+NOW = 1_700_000_000_000 // STEP * STEP + 30_000  # Half way through a bar
+
+
+class RecordingExchange(FakeExchange):
+    """FakeExchange that logs the (since, limit) of each fetch_ohlcv and can start trading late"""
+
+    def __init__(self, listed_ms: Optional[int] = None, **kwargs):
+        super().__init__(now_ms=NOW, **kwargs)
+        self.listed_ms = listed_ms
+        self.fetches = []
+
+    def fetch_ohlcv(self, symbol, timeframe='1m', since=None, limit=None, params=None):
+        self.fetches.append((since, limit))
+        rows = super().fetch_ohlcv(symbol, timeframe, since, limit, params)
+        if self.listed_ms is not None:
+            rows = [row for row in rows if row[0] >= self.listed_ms]
+        return rows
+
+
+class SkippingExchange(RecordingExchange):
+    """Incremental fetches come back without the candle they were asked to start from"""
+
+    def fetch_ohlcv(self, symbol, timeframe='1m', since=None, limit=None, params=None):
+        rows = super().fetch_ohlcv(symbol, timeframe, since, limit, params)
+        return rows[1:] if since is not None else rows
+
+
+def expected(exchange: FakeExchange, limit: int) -> np.ndarray:
+    return exchange.ohlcv_array(SYMBOL, '1m', limit=limit)
+
+
+def test_update_fetches_since_last_candle_and_replaces_forming():
+    exchange = RecordingExchange()
+    cache = CandleCache(exchange)
+    first = cache.get(SYMBOL, '1m', 100)
+    assert first[-1][0] == NOW // STEP * STEP
+
+    exchange.now_ms += 3 * STEP
+    rows = cache.get(SYMBOL, '1m', 100)
+    assert exchange.fetches == [(None, 100), (first[-1][0], None)]
+    np.testing.assert_array_equal(np.array(rows), expected(exchange, 100))
+
+
+def test_outage_longer_than_a_page_keeps_paging_to_the_current_bar():
+    exchange = RecordingExchange()
+    cache = CandleCache(exchange)
+    cache.get(SYMBOL, '1m', 1000)
+
+    exchange.now_ms += 700 * STEP  # FakeExchange caps a since-page at 500 candles
+    rows = cache.get(SYMBOL, '1m', 1000)
+    assert rows[-1][0] == exchange.now_ms // STEP * STEP
+    assert [limit for _, limit in exchange.fetches] == [1000, None, None]
+    np.testing.assert_array_equal(np.array(rows), expected(exchange, 1000))
+
+
+def test_outage_longer_than_the_buffer_refills():
+    exchange = RecordingExchange()
+    cache = CandleCache(exchange)
+    cache.get(SYMBOL, '1m', 100)
+
+    exchange.now_ms += 300 * STEP
+    rows = cache.get(SYMBOL, '1m', 100)
+    assert exchange.fetches == [(None, 100), (None, 100)]
+    np.testing.assert_array_equal(np.array(rows), expected(exchange, 100))
+
+
+def test_misaligned_update_refills():
+    exchange = SkippingExchange()
+    cache = CandleCache(exchange)
+    cache.get(SYMBOL, '1m', 100)
+
+    exchange.now_ms += 2 * STEP
+    rows = cache.get(SYMBOL, '1m', 100)
+    assert [limit for _, limit in exchange.fetches] == [100, None, 100]
+    np.testing.assert_array_equal(np.array(rows), expected(exchange, 100))
+
+
+def test_short_history_is_not_refilled_every_call():
+    exchange = RecordingExchange(listed_ms=NOW // STEP * STEP - 49 * STEP)
+    cache = CandleCache(exchange)
+    assert len(cache.get(SYMBOL, '1m', 200)) == 50
+
+    exchange.now_ms += STEP
+    assert len(cache.get(SYMBOL, '1m', 200)) == 51
+    assert [limit for _, limit in exchange.fetches] == [200, None]
+
+
+def test_limit_above_max_candles_is_not_refilled_every_call():
+    exchange = RecordingExchange()
+    cache = CandleCache(exchange, max_candles=1000)
+    cache.get(SYMBOL, '1m', 1500)
+    cache.get(SYMBOL, '1m', 1500)
+    cache.get(SYMBOL, '1m', 1500)
+    assert [limit for _, limit in exchange.fetches] == [1000, None, None]
+
+
+def test_gap_refill_keeps_short_history_exhausted():
+    exchange = SkippingExchange(listed_ms=NOW // STEP * STEP - 49 * STEP)
+    cache = CandleCache(exchange)
+    cache.get(SYMBOL, '1m', 200)
+
+    exchange.now_ms += STEP
+    cache.get(SYMBOL, '1m', 200)  # Misaligned: refilled to the 50 candles held
+    exchange.now_ms += STEP
+    cache.get(SYMBOL, '1m', 200)  # Still updated incrementally, not refilled to 200
+    assert [limit for _, limit in exchange.fetches] == [200, None, 50, None, 50]
+
+
+def test_invalidate_forces_a_refill():
+    exchange = RecordingExchange()
+    cache = CandleCache(exchange)
+    cache.get(SYMBOL, '1m', 100)
+    cache.invalidate(SYMBOL, '1m')
+    cache.get(SYMBOL, '1m', 100)
+    assert exchange.fetches == [(None, 100), (None, 100)]
@@ -0,0 +1,144 @@
+import os
+
+import numpy as np
+import pytest
+
+from backtest import run_backtest
+from candle_store import COLUMNS, CandleStore, backfill
+from fake_exchange import FakeExchange
+from indicators import RSIState
+from sweep import mapped_columns, price_columns, sweep
+
+SYMBOL = 'XRP/USDT'
+STEP = 60_000
+NOW = 1_700_000_000_000 // STEP * STEP + 30_000
+START = NOW // STEP * STEP - 3000 * STEP
+
+
+class CappedExchange(FakeExchange):
+    """Returns at most `cap` candles per page, whatever the limit, and can skip ahead once"""
+
+    def __init__(self, cap: int = 200, skip_after: int = None, skip_to: int = None):
+        super().__init__(now_ms=NOW)
+        self.cap = cap
+        self.skip_after = skip_after  # Cursor beyond which the next page jumps to `skip_to`
+        self.skip_to = skip_to
+        self.pages = 0
+
+    def fetch_ohlcv(self, symbol, timeframe='1m', since=None, limit=None, params=None):
+        self.pages += 1
+        if self.skip_after is not None and since is not None and since > self.skip_after:
+            since, self.skip_after = self.skip_to, None
+        return super().fetch_ohlcv(symbol, timeframe, since, min(limit or self.cap, self.cap), params)
+
+
+@pytest.fixture
+def store(tmp_path):
+    return CandleStore(str(tmp_path), 'fake')
+
+
+def closed_history(exchange: FakeExchange, since: int) -> np.ndarray:
+    bars = (NOW // STEP * STEP - since) // STEP  # Up to, not including, the forming candle
+    return exchange.ohlcv_array(SYMBOL, '1m', since=since, limit=bars)
+
+
+def stored_array(store: CandleStore) -> np.ndarray:
+    return store.read_array(SYMBOL, '1m')
+
+
+def test_append_only_adds_newer_candles(store):
+    rows = FakeExchange(now_ms=NOW).fetch_ohlcv(SYMBOL, '1m', limit=100)
+    assert store.append(SYMBOL, '1m', rows[:60]) == 60
+    assert store.append(SYMBOL, '1m', rows[50:]) == 40
+    np.testing.assert_array_equal(stored_array(store), np.array(rows))
+
+
+def test_read_range_is_a_memory_map_of_just_those_rows(store):
+    rows = FakeExchange(now_ms=NOW).fetch_ohlcv(SYMBOL, '1m', limit=100)
+    store.append(SYMBOL, '1m', rows)
+    columns = store.read(SYMBOL, '1m', start=rows[10][0], end=rows[20][0])
+
+    for position, (name, dtype) in enumerate(COLUMNS):
+        column = columns[name]
+        assert isinstance(column, np.memmap)
+        assert column.offset == 10 * np.dtype(dtype).itemsize and len(column) == 10
+        np.testing.assert_array_equal(column, np.array(rows)[10:20, position])
+    assert len(store.read(SYMBOL, '1m', start=rows[-1][0] + STEP)['close']) == 0
+
+
+def test_torn_append_is_cut_back_to_complete_rows(store):
+    rows = FakeExchange(now_ms=NOW).fetch_ohlcv(SYMBOL, '1m', limit=100)
+    store.append(SYMBOL, '1m', rows[:50])
+    # An append interrupted after the first two columns
+    directory = store.path(SYMBOL, '1m')
+    for name, dtype in COLUMNS[:2]:
+        with open(os.path.join(directory, f"{name}.bin"), 'ab') as f:
+            np.zeros(3, dtype=dtype).tofile(f)
+
+    assert store.count(SYMBOL, '1m') == 50
+    assert store.last_timestamp(SYMBOL, '1m') == rows[49][0]
+    assert store.append(SYMBOL, '1m', rows[50:]) == 50
+    np.testing.assert_array_equal(stored_array(store), np.array(rows))
+
+
+def test_backfill_keeps_paging_past_capped_pages(store):
+    exchange = CappedExchange(cap=200)
+    written = backfill(exchange, store, SYMBOL, '1m', START, page_limit=1000)
+
+    expected = closed_history(exchange, START)
+    assert written == len(expected) == 3000
+    assert exchange.pages >= 3000 // 200
+    np.testing.assert_array_equal(stored_array(store), expected)
+
+
+def test_backfill_resumes_from_the_last_stored_candle(store):
+    exchange = CappedExchange(cap=500)
+    backfill(exchange, store, SYMBOL, '1m', START)
+    exchange.now_ms += 10 * STEP
+    assert backfill(exchange, store, SYMBOL, '1m', START) == 10
+    assert store.last_timestamp(SYMBOL, '1m') == exchange.now_ms // STEP * STEP - STEP
+
+
+def test_backfill_refuses_a_page_that_skips_past_the_cursor(store):
+    exchange = CappedExchange(cap=500, skip_after=START + 900 * STEP, skip_to=START + 2500 * STEP)
+    written = backfill(exchange, store, SYMBOL, '1m', START, page_limit=500)
+
+    assert written == 1000  # Two pages, then the skipping one is refused
+    timestamps = store.read(SYMBOL, '1m')['timestamp']
+    assert np.all(np.diff(timestamps) == STEP)
+
+
+def test_backfill_accepts_a_late_first_page(store):
+    # Nothing stored yet: a first page past `since` is the listing date, not a gap
+    listed = START + 2000 * STEP
+    exchange = CappedExchange(cap=500, skip_after=START - 1, skip_to=listed)
+    written = backfill(exchange, store, SYMBOL, '1m', START, page_limit=500)
+    assert written == 1000
+    assert store.read(SYMBOL, '1m')['timestamp'][0] == listed
+
+
+def test_warm_rsi_state_replays_the_stored_closes(store):
+    exchange = CappedExchange(cap=1000)
+    backfill(exchange, store, SYMBOL, '1m', START)
+    closes = store.read(SYMBOL, '1m')['close']
+
+    state = store.warm_rsi_state(SYMBOL, '1m', 14, bars=500)
+    expected = RSIState.from_closes(closes[-500:], 14)
+    assert state.value == pytest.approx(expected.value)
+    assert state.last_timestamp == store.last_timestamp(SYMBOL, '1m')
+    assert store.warm_rsi_state('NONE/USDT', '1m').last_timestamp is None
+
+
+def test_backtest_and_sweep_use_the_mapped_columns(store):
+    exchange = CappedExchange(cap=1000)
+    backfill(exchange, store, SYMBOL, '1m', START)
+    columns, array = store.read(SYMBOL, '1m'), stored_array(store)
+
+    for strategy in ('rsi_threshold', 'divergence'):
+        assert run_backtest(columns, strategy) == run_backtest(array, strategy)
+
+    assert mapped_columns(price_columns(columns)) is not None  # Workers map the files themselves
+    grids = {'rsi_threshold': {'rsi_period': [9, 14], 'overbought': [70], 'oversold': [30]}}
+    mapped = sorted(sweep(columns, grids, processes=2), key=lambda r: r[1]['rsi_period'])
+    copied = sorted(sweep(array, grids, processes=2), key=lambda r: r[1]['rsi_period'])
+    assert mapped == copied
@@ -0,0 +1,43 @@
+import numpy as np
+import pytest
+
+from divergence import DIVERGENCE_TYPES, DivergenceDetector, detect_divergences
+from indicators import calculate_rsi
+
+BARS = 600
+RSI_PERIOD = 14
+
+
+def random_candles(seed: int):
+    rng = np.random.default_rng(seed)
+    close = 100.0 + np.cumsum(rng.normal(0.0, 1.0, BARS))
+    return close + rng.uniform(0.0, 1.0, BARS), close - rng.uniform(0.0, 1.0, BARS), close
+
+
+SERIES = [random_candles(seed) for seed in (1, 2, 3, 4)]
+LOOKBACKS = [(5, 5, 5, 60), (3, 2, 2, 30), (8, 5, 5, 60)]
+
+
+@pytest.mark.parametrize('series', range(len(SERIES)))
+@pytest.mark.parametrize('lbL, lbR, rangeLower, rangeUpper', LOOKBACKS)
+def test_detector_state_matches_detect_divergences(series, lbL, lbR, rangeLower, rangeUpper):
+    high, low, close = SERIES[series]
+    rsi = calculate_rsi(close, RSI_PERIOD)
+    detector = DivergenceDetector(lbL, lbR, rangeLower, rangeUpper)
+    seen = set()
+    for bar in range(BARS):
+        detector.update(rsi[bar], low[bar], high[bar])
+        expected = detect_divergences(rsi[:bar + 1], low[:bar + 1], high[:bar + 1], lbL, lbR, rangeLower, rangeUpper)
+        assert detector.state == expected, f"bar {bar}"
+        seen.update(div_type for div_type, hit in expected.items() if hit)
+    assert seen  # The series actually exercises the rules
+
+
+def test_disabled_types_never_fire():
+    high, low, close = SERIES[0]
+    rsi = calculate_rsi(close, RSI_PERIOD)
+    detector = DivergenceDetector(enabled=("hidden_bearish",))
+    for bar in range(BARS):
+        events = detector.update(rsi[bar], low[bar], high[bar])
+        assert set(events) <= {"hidden_bearish"}
+        assert all(not detector.state[t] for t in DIVERGENCE_TYPES if t != "hidden_bearish")
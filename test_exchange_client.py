@@ -0,0 +1,101 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import pytest
+
+from exchange_client import LatencyStats, create_client, create_session, endpoint_name
+
+
+class KeepAliveHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # Connections stay open between requests
+
+    def do_GET(self):
+        status = 404 if self.path.startswith('/missing') else 200
+        self.send_response(status)
+        self.send_header('Content-Length', '2')
+        self.end_headers()
+        self.wfile.write(b'ok')
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), KeepAliveHandler)
+    httpd.daemon_threads = True  # Kept-alive connections must not hold up shutdown
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_port}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+@pytest.mark.parametrize('url, expected', [
+    ('https://contract.mexc.com/api/v1/contract/kline/XRP_USDT?interval=Min5',
+     'contract.mexc.com/api/v1/contract/kline/{symbol}'),
+    ('https://contract.mexc.com/api/v1/contract/kline/BTC_USDT', 'contract.mexc.com/api/v1/contract/kline/{symbol}'),
+    ('https://contract.mexc.com/api/v1/contract/deals/1000PEPE_USDT/recent',
+     'contract.mexc.com/api/v1/contract/deals/{symbol}/recent'),
+    ('https://contract.mexc.com/api/v1/contract/ticker', 'contract.mexc.com/api/v1/contract/ticker'),
+    ('https://api.mexc.com/api/v3/klines?symbol=XRPUSDT&interval=1m', 'api.mexc.com/api/v3/klines'),
+])
+def test_endpoint_name_folds_market_ids_and_queries(url, expected):
+    assert endpoint_name(url) == expected
+
+
+def test_latency_percentiles_are_nearest_rank():
+    stats = LatencyStats()
+    for ms in range(100, 0, -1):
+        stats.record('api/ticker', ms / 1000)
+    row = stats.summary()['api/ticker']
+    assert (row['count'], row['p50'], row['p95'], row['p99'], row['max']) == (100, 0.050, 0.095, 0.099, 0.100)
+
+
+@pytest.mark.parametrize('count', [1, 2, 7, 19, 500])
+def test_latency_percentiles_match_numpy(count):
+    samples = np.random.default_rng(count).exponential(0.1, count)
+    stats = LatencyStats()
+    for seconds in samples:
+        stats.record('api/kline', seconds)
+    row = stats.summary()['api/kline']
+    for key, q in (('p50', 50), ('p95', 95), ('p99', 99)):
+        assert row[key] == np.percentile(samples, q, method='inverted_cdf')
+
+
+def test_latency_window_keeps_the_latest_samples():
+    stats = LatencyStats(window=10)
+    for ms in range(1, 101):
+        stats.record('api/ticker', ms / 1000)
+    row = stats.summary()['api/ticker']
+    assert (row['count'], row['p50'], row['max']) == (10, 0.095, 0.100)
+    assert stats.requests == 100
+
+
+def test_session_reuses_one_pooled_connection(server):
+    stats = LatencyStats()
+    session = create_session(pool_size=2, stats=stats)
+    adapter = session.get_adapter('https://api.mexc.com')
+    assert session.get_adapter('http://127.0.0.1') is adapter is stats.adapter
+    assert adapter._pool_maxsize == 2 and adapter.max_retries.total == 0
+    assert 'gzip' in session.headers['Accept-Encoding']
+
+    for _ in range(5):
+        assert session.get(f"{server}/ok").text == 'ok'
+    session.get(f"{server}/missing")
+    assert stats.requests == 6 and stats.errors == 1
+    assert stats.connections() == 1  # Every request after the first rode the kept-alive connection
+    assert stats.summary()[f"{server[len('http://'):]}/ok"]['count'] == 5
+    session.close()
+
+
+def test_create_client_uses_its_own_pooled_session():
+    client = create_client('mexc', 'swap', pool_size=3)
+    stats = client.http_stats
+    assert client.session.get_adapter('https://contract.mexc.com') is stats.adapter
+    assert stats.adapter._pool_maxsize == 3
+    assert client.options['defaultType'] == 'swap'
+
+    other = create_client('mexc', 'swap')
+    assert other.session is not client.session and other.http_stats is not stats  # Separate metrics per client
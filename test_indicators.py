@@ -0,0 +1,230 @@
+import numpy as np
+import pytest
+
+from indicators import (ATRState, EMAState, RSIState, SMAState, WMAState, atr, calculate_rsi, calculate_rsi_batch,
+                        ema, moving_average_state, rsi_from_averages, sma, wma)
+
+TOLERANCE = 1e-9
+BARS = 1000  # Several laps of every ring buffer, so the per-lap rebuilds are covered
+
+
+def random_walk(seed: int, bars: int = BARS) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    return 100.0 + np.cumsum(rng.normal(0.0, 1.0, bars))
+
+
+def random_candles(seed: int, bars: int = BARS):
+    """(high, low, close) around a random walk"""
+    rng = np.random.default_rng(seed)
+    close = random_walk(seed, bars)
+    high = close + rng.uniform(0.0, 2.0, bars)
+    low = close - rng.uniform(0.0, 2.0, bars)
+    return high, low, close
+
+
+def stream(state, values, *columns):
+    """update() and the peek() taken just before it, for every bar; None becomes NaN"""
+    updates, peeks = [], []
+    for row in zip(values, *columns):
+        peek = state.peek(*row)
+        update = state.update(*row)
+        peeks.append(np.nan if peek is None else peek)
+        updates.append(np.nan if update is None else update)
+    return np.array(updates), np.array(peeks)
+
+
+def assert_matches(streamed, batch):
+    """Same NaN warm-up prefix, same values after it"""
+    np.testing.assert_array_equal(np.isnan(streamed), np.isnan(batch))
+    np.testing.assert_allclose(streamed, batch, rtol=0, atol=TOLERANCE, equal_nan=True)
+
+
+def wilder_rsi(closes, period: int) -> list:
+    """Bar-by-bar reference: SMA seed of the first `period` changes, then Wilder smoothing"""
+    changes = np.diff(closes)
+    gains, losses = np.maximum(changes, 0.0), np.maximum(-changes, 0.0)
+    out = [None] * period
+    avg_gain, avg_loss = gains[:period].mean(), losses[:period].mean()
+    for i in range(period, len(closes)):
+        if i > period:
+            avg_gain = (avg_gain * (period - 1) + gains[i - 1]) / period
+            avg_loss = (avg_loss * (period - 1) + losses[i - 1]) / period
+        out.append(100.0 if avg_loss == 0 else 100.0 - 100.0 / (1.0 + avg_gain / avg_loss))
+    return out
+
+
+def test_rsi_edge_cases():
+    assert rsi_from_averages(1.0, 0.0) == 100.0  # Only gains
+    assert rsi_from_averages(0.0, 0.0) == 100.0  # Flat: ta.rsi's 100; the old pandas_ta code gave NaN
+    assert rsi_from_averages(0.0, 1.0) == 0.0  # Only losses
+    assert rsi_from_averages(1.0, 1.0) == 50.0
+    assert rsi_from_averages(3.0, 1.0) == 75.0
+
+
+@pytest.mark.parametrize('closes, expected', [
+    (np.arange(30.0), 100.0),
+    (np.ones(30), 100.0),
+    (np.arange(30.0, 0.0, -1.0), 0.0),
+], ids=['rising', 'flat', 'falling'])
+def test_rsi_state_one_way_and_flat_series(closes, expected):
+    state = RSIState(14)
+    values = [state.update(close) for close in closes]
+    assert values[14:] == [expected] * 16
+    assert state.peek(closes[-1]) == expected  # A forming candle that has not moved yet
+
+
+def test_rsi_state_warm_up():
+    closes = random_walk(7, 20)
+    state = RSIState(14)
+    values = [state.update(close) for close in closes[:15]]
+    assert values[:14] == [None] * 14  # 14 closes are only 13 changes
+    assert not RSIState.from_closes(closes[:14]).ready and state.ready
+    assert RSIState.from_closes(closes[:14]).peek(closes[14]) is None
+    assert values[14] == pytest.approx(wilder_rsi(closes[:15], 14)[14], abs=TOLERANCE)
+
+
+@pytest.mark.parametrize('seed', [1, 2, 3])
+@pytest.mark.parametrize('period', [2, 14, 30])
+def test_rsi_state_matches_wilder_reference(period, seed):
+    closes = random_walk(seed, 300)
+    updates, peeks = stream(RSIState(period), closes)
+    expected = np.array([np.nan if value is None else value for value in wilder_rsi(closes, period)])
+    assert_matches(updates, expected)
+    assert_matches(peeks[period + 1:], expected[period + 1:])  # peek() of the next close is its update()
+
+
+def test_peek_leaves_rsi_state_unchanged():
+    closes = random_walk(8, 100)
+    state = RSIState.from_closes(closes[:50])
+    before = (state.avg_gain, state.avg_loss, state.last_close, state.value)
+    for close in closes[50:]:
+        state.peek(close)
+    assert (state.avg_gain, state.avg_loss, state.last_close, state.value) == before
+
+
+def test_rsi_state_from_candles_keeps_the_last_timestamp():
+    closes = random_walk(9, 40)
+    candles = [[60_000 * i, 0.0, 0.0, 0.0, close, 0.0] for i, close in enumerate(closes)]
+    state = RSIState.from_candles(candles)
+    assert state.last_timestamp == candles[-1][0]
+    assert state.value == RSIState.from_closes(closes).value
+
+
+@pytest.mark.parametrize('seed', [1, 2, 3])
+@pytest.mark.parametrize('period', [2, 14, 30])
+def test_rsi_state_matches_batch(period, seed):
+    closes = random_walk(seed)
+    updates, peeks = stream(RSIState(period), closes)
+    expected = calculate_rsi(closes, period)
+
+    # The state has no RSI until `period` changes are seen; the batch repeats its first value there
+    assert np.isnan(updates[:period]).all()
+    np.testing.assert_allclose(expected[:period], expected[period])
+    np.testing.assert_allclose(updates[period:], expected[period:], rtol=0, atol=TOLERANCE)
+    # peek() needs a ready state, so it lags update() by one bar
+    assert np.isnan(peeks[:period + 1]).all()
+    np.testing.assert_allclose(peeks[period + 1:], expected[period + 1:], rtol=0, atol=TOLERANCE)
+
+
+def test_rsi_state_from_closes_matches_streaming():
+    closes = random_walk(6)
+    state = RSIState.from_closes(closes[:-1], 14)
+    assert state.peek(closes[-1]) == pytest.approx(calculate_rsi(closes, 14)[-1], abs=TOLERANCE)
+
+
+def rsi_state_rows(closes, period: int) -> np.ndarray:
+    """RSIState fed each row's closes; None becomes NaN"""
+    out = np.full(closes.shape, np.nan)
+    for row, values in enumerate(closes):
+        state = RSIState(period)
+        for bar, close in enumerate(values):
+            value = state.update(close)
+            out[row, bar] = np.nan if value is None else value
+    return out
+
+
+@pytest.mark.parametrize('period', [2, 14, 30])
+def test_batch_rows_match_rsi_state(period):
+    closes = np.array([random_walk(seed, 400) for seed in range(6)])
+    closes[1, :50] = closes[1, 50]  # Flat prefix
+    closes[2, :] = closes[2, 0]  # Flat throughout
+    closes[3, :100] = np.arange(100.0)  # Only gains, then a random walk
+    batch = calculate_rsi_batch(closes, period)
+    expected = rsi_state_rows(closes, period)
+
+    assert batch.shape == closes.shape
+    np.testing.assert_allclose(batch[:, period:], expected[:, period:], rtol=0, atol=TOLERANCE)
+    # Warm-up bars repeat the first value, like calculate_rsi
+    np.testing.assert_array_equal(batch[:, :period], np.repeat(batch[:, period:period + 1], period, axis=1))
+    assert (batch[2] == 100.0).all()
+
+
+@pytest.mark.parametrize('period', [2, 14])
+def test_nan_padded_rows_start_from_their_first_close(period):
+    closes = np.array([random_walk(seed, 300) for seed in range(5)])
+    starts = [0, 1, 120, 300 - period, 300]  # The last two are too short for a value
+    for row, start in enumerate(starts):
+        closes[row, :start] = np.nan
+    batch = calculate_rsi_batch(closes, period)
+
+    for row, start in enumerate(starts):
+        assert np.isnan(batch[row, :start]).all()
+        np.testing.assert_array_equal(batch[row, start:], calculate_rsi_batch(closes[row, start:], period))
+        expected = rsi_state_rows(closes[row:row + 1, start:], period)[0]
+        np.testing.assert_allclose(batch[row, start + period:], expected[period:], rtol=0, atol=TOLERANCE)
+    assert (batch[3, starts[3]:] == 0.0).all()
+
+
+def test_batch_rows_match_calculate_rsi():
+    closes = np.array([random_walk(seed, 300) for seed in range(4)])
+    batch = calculate_rsi_batch(closes, 14)
+    for row in range(len(closes)):
+        np.testing.assert_allclose(batch[row], calculate_rsi(closes[row], 14), rtol=0, atol=TOLERANCE)
+    assert calculate_rsi_batch(closes[0], 14).shape == (300,)  # 1-D in, 1-D out
+
+
+def test_batch_too_short_for_a_value_is_zero():
+    closes = np.array([random_walk(seed, 14) for seed in range(3)])
+    np.testing.assert_array_equal(calculate_rsi_batch(closes, 14), np.zeros((3, 14)))
+
+
+@pytest.mark.parametrize('seed', [1, 2, 3])
+@pytest.mark.parametrize('period', [1, 2, 14, 50])
+@pytest.mark.parametrize('state_class, batch', [(SMAState, sma), (EMAState, ema), (WMAState, wma)],
+                         ids=['SMA', 'EMA', 'WMA'])
+def test_moving_average_states_match_batch(state_class, batch, period, seed):
+    values = random_walk(seed)
+    updates, peeks = stream(state_class(period), values)
+    expected = batch(values, period)
+    assert_matches(updates, expected)
+    assert_matches(peeks, expected)  # peek() of the next value is its update() result
+
+
+@pytest.mark.parametrize('ma_type', ['SMA', 'EMA', 'WMA'])
+def test_peek_leaves_state_unchanged(ma_type):
+    values = random_walk(4, 100)
+    state = moving_average_state(ma_type, 14)
+    for value in values[:50]:
+        state.update(value)
+    before = state.value
+    for value in values[50:]:
+        state.peek(value)
+    assert state.value == before
+
+
+def test_short_series_stays_warming_up():
+    values = random_walk(5, 10)
+    for state_class, batch in ((SMAState, sma), (WMAState, wma)):
+        updates, _ = stream(state_class(14), values)
+        assert np.isnan(updates).all() and np.isnan(batch(values, 14)).all()
+
+
+@pytest.mark.parametrize('seed', [1, 2, 3])
+@pytest.mark.parametrize('period', [1, 14, 30])
+@pytest.mark.parametrize('smoothing', ['sma', 'wilder'])
+def test_atr_state_matches_batch(smoothing, period, seed):
+    high, low, close = random_candles(seed)
+    updates, peeks = stream(ATRState(period, smoothing), high, low, close)
+    expected = atr(high, low, close, period, smoothing)
+    assert_matches(updates, expected)
+    assert_matches(peeks, expected)
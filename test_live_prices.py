@@ -0,0 +1,123 @@
+import threading
+
+from fake_exchange import FakeExchange
+from live_prices import LivePriceService
+from resilience import CircuitOpenError
+
+SYMBOLS = [f"SYM{i}/USDT" for i in range(50)]
+
+
+class CountingExchange(FakeExchange):
+    """FakeExchange counting bulk and per-symbol ticker calls; can fail the next bulk call"""
+
+    def __init__(self, symbols):
+        super().__init__(symbols, now_ms=1_700_000_000_000)
+        self.bulk_calls = []
+        self.single_calls = 0
+        self.error = None
+
+    def fetch_tickers(self, symbols=None, params=None):
+        self.bulk_calls.append(list(symbols))
+        if self.error is not None:
+            error, self.error = self.error, None
+            raise error
+        return super().fetch_tickers(symbols, params)
+
+    def fetch_ticker(self, symbol, params=None):
+        self.single_calls += 1
+        return super().fetch_ticker(symbol, params)
+
+
+class StopAfter:
+    """Stand-in for the service's stop event: records each wait and stops after `waits` of them"""
+
+    def __init__(self, waits: int):
+        self.waits = []
+        self.limit = waits
+
+    def is_set(self) -> bool:
+        return len(self.waits) >= self.limit
+
+    def wait(self, seconds):
+        self.waits.append(seconds)
+
+    def clear(self):
+        pass
+
+    def set(self):
+        self.limit = 0
+
+
+def test_one_bulk_request_per_refresh():
+    exchange = CountingExchange(SYMBOLS)
+    service = LivePriceService(exchange, SYMBOLS)
+    prices = service.refresh()
+    service.refresh()
+    assert exchange.bulk_calls == [SYMBOLS, SYMBOLS]
+    assert exchange.single_calls == 0
+    assert prices == {symbol: exchange.fetch_ticker(symbol)['last'] for symbol in SYMBOLS}
+
+
+def test_watch_adds_symbols_to_the_same_request():
+    exchange = CountingExchange(SYMBOLS)
+    service = LivePriceService(exchange, SYMBOLS[:2])
+    service.watch([SYMBOLS[1], SYMBOLS[2]])
+    service.refresh()
+    assert exchange.bulk_calls == [SYMBOLS[:3]]
+    assert service.get(SYMBOLS[2]) is not None
+    assert service.get('MISSING/USDT', 0.0) == 0.0
+
+
+def test_refresh_swaps_in_a_new_snapshot():
+    exchange = CountingExchange(SYMBOLS[:3])
+    service = LivePriceService(exchange, SYMBOLS[:3])
+    service.refresh()
+    before = service.snapshot()
+    copy = dict(before)
+
+    exchange.now_ms += 3_600_000
+    service.refresh()
+    after = service.snapshot()
+    assert after is not before
+    assert before == copy  # Readers holding the old snapshot never see it change
+    assert after != before
+
+
+def test_symbols_without_a_price_keep_their_last_one():
+    exchange = CountingExchange(SYMBOLS[:2])
+    service = LivePriceService(exchange, SYMBOLS[:2])
+    service.refresh()
+    last = service.get(SYMBOLS[1])
+
+    exchange.fetch_tickers = lambda symbols=None, params=None: {SYMBOLS[0]: {'last': 2.5}, SYMBOLS[1]: {'last': None}}
+    service.refresh()
+    assert service.snapshot() == {SYMBOLS[0]: 2.5, SYMBOLS[1]: last}
+
+
+def test_failed_refresh_keeps_prices_and_backs_off_by_retry_in():
+    exchange = CountingExchange(SYMBOLS[:2])
+    service = LivePriceService(exchange, SYMBOLS[:2], refresh_seconds=1.0)
+    service.refresh()
+    prices = service.snapshot()
+
+    exchange.error = CircuitOpenError('fetch_tickers', 30.0)
+    service._stop = StopAfter(3)
+    service.run()
+    assert service._stop.waits == [30.0, 1.0, 1.0]  # The open circuit's wait, then the normal interval
+    assert len(exchange.bulk_calls) == 4
+    assert service.snapshot() == prices
+
+
+def test_start_runs_in_a_background_thread():
+    exchange = CountingExchange(SYMBOLS[:2])
+    service = LivePriceService(exchange, SYMBOLS[:2], refresh_seconds=60.0)
+    refreshed = threading.Event()
+    exchange.fetch_tickers = lambda symbols=None, params=None: refreshed.set() or {}
+    service.start()
+    try:
+        assert refreshed.wait(2.0)
+        assert service._thread.daemon
+    finally:
+        service.stop()
+        service._thread.join(2.0)
+    assert not service._thread.is_alive()
@@ -0,0 +1,63 @@
+import numpy as np
+import pytest
+
+from fake_exchange import FakeExchange
+from ohlcv import OHLCV, CandleBuffer
+
+ROWS = FakeExchange(now_ms=1_700_000_000_000).fetch_ohlcv('XRP/USDT', '1m', limit=500)
+
+
+def as_array(buffer: CandleBuffer, limit=None) -> np.ndarray:
+    return buffer.view(limit).data.T
+
+
+def test_merge_replaces_the_forming_candle():
+    buffer = CandleBuffer(10)
+    assert buffer.merge(ROWS[:5]) == 5
+    updated = list(ROWS[4])
+    updated[4] += 1.0  # Forming candle moved on
+    assert buffer.merge([updated]) == 0
+    assert len(buffer) == 5
+    np.testing.assert_array_equal(as_array(buffer), np.array(ROWS[:4] + [updated]))
+
+
+def test_merge_appends_newer_and_ignores_older_rows():
+    buffer = CandleBuffer(10)
+    buffer.merge(ROWS[2:5])
+    assert buffer.merge(ROWS[:8]) == 3  # Rows before the last stored one are skipped
+    np.testing.assert_array_equal(as_array(buffer), np.array(ROWS[2:8]))
+    assert buffer.last_timestamp == ROWS[7][0]
+
+
+def test_merge_compacts_at_capacity():
+    buffer = CandleBuffer(10)
+    for start in range(0, 100, 3):  # Several passes past the end of the 2x block
+        buffer.merge(ROWS[start:start + 4])  # Overlaps one row: replace plus three appends
+        end = start + 4
+        assert len(buffer) == min(10, end)
+        np.testing.assert_array_equal(as_array(buffer), np.array(ROWS[max(0, end - 10):end]))
+
+
+def test_merge_longer_than_capacity_keeps_the_newest():
+    buffer = CandleBuffer(10)
+    assert buffer.merge(ROWS[:25]) == 10
+    np.testing.assert_array_equal(as_array(buffer), np.array(ROWS[15:25]))
+
+
+def test_view_is_a_copy():
+    buffer = CandleBuffer(10)
+    buffer.merge(ROWS[:10])
+    view = buffer.view(5)
+    np.testing.assert_array_equal(view.to_rows(), ROWS[5:10])
+    buffer.merge(ROWS[10:30])
+    np.testing.assert_array_equal(view.to_rows(), ROWS[5:10])
+
+
+def test_ohlcv_columns_and_rows():
+    candles = OHLCV.from_rows(ROWS[:20])
+    assert len(candles) == 20
+    np.testing.assert_array_equal(candles.close, [row[4] for row in ROWS[:20]])
+    assert candles.close.flags['C_CONTIGUOUS']
+    assert candles[5:].to_rows() == ROWS[5:20]
+    with pytest.raises(TypeError):
+        candles[0]
@@ -0,0 +1,66 @@
+import numpy as np
+import pytest
+
+from pivots import find_peaks, find_pivot_highs, find_pivot_lows, find_troughs, rolling_max, rolling_min
+
+LOOKBACKS = [(5, 5), (1, 1), (3, 7), (7, 2), (0, 4), (4, 0)]
+
+
+def naive_pivot_highs(data, lbL, lbR):
+    """The window-slice loop pivots.py replaced"""
+    return [i for i in range(lbL, len(data) - lbR) if data[i] == max(data[i - lbL:i + lbR + 1])]
+
+
+def naive_pivot_lows(data, lbL, lbR):
+    return [i for i in range(lbL, len(data) - lbR) if data[i] == min(data[i - lbL:i + lbR + 1])]
+
+
+def series(kind: str, seed: int, n: int = 300) -> list:
+    rng = np.random.default_rng(seed)
+    if kind == 'walk':
+        return list(100.0 + np.cumsum(rng.normal(0.0, 1.0, n)))
+    if kind == 'ties':
+        return list(rng.integers(0, 4, n).astype(float))  # Plateaus and repeated extremes
+    if kind == 'nan_prefix':
+        values = list(50.0 + 20.0 * np.sin(np.arange(n) / 7.0) + rng.normal(0.0, 2.0, n))
+        warm_up = min(14, n // 2)  # RSI warm-up
+        return [np.nan] * warm_up + values[warm_up:]
+    if kind == 'flat':
+        return [1.0] * n
+    raise ValueError(kind)
+
+
+@pytest.mark.parametrize('seed', [1, 2, 3])
+@pytest.mark.parametrize('kind', ['walk', 'ties', 'nan_prefix', 'flat'])
+@pytest.mark.parametrize('lbL, lbR', LOOKBACKS)
+def test_pivots_match_window_slices(kind, seed, lbL, lbR):
+    data = series(kind, seed)
+    assert find_pivot_highs(data, lbL, lbR).tolist() == naive_pivot_highs(data, lbL, lbR)
+    assert find_pivot_lows(data, lbL, lbR).tolist() == naive_pivot_lows(data, lbL, lbR)
+
+
+@pytest.mark.parametrize('n', range(0, 14))
+@pytest.mark.parametrize('lbL, lbR', [(5, 5), (3, 7)])
+def test_short_series(n, lbL, lbR):
+    data = series('walk', n, n)
+    assert find_pivot_highs(data, lbL, lbR).tolist() == naive_pivot_highs(data, lbL, lbR)
+    assert find_pivot_lows(data, lbL, lbR).tolist() == naive_pivot_lows(data, lbL, lbR)
+
+
+@pytest.mark.parametrize('kind', ['walk', 'ties', 'nan_prefix'])
+@pytest.mark.parametrize('n', [1, 7, 10, 11, 12, 50])
+@pytest.mark.parametrize('window', [1, 2, 5, 11, 60])
+def test_rolling_extremes_match_slices(kind, n, window):
+    data = np.array(series(kind, n, n))
+    expected_max = [np.max(data[i:i + window]) for i in range(n - window + 1)]
+    expected_min = [np.min(data[i:i + window]) for i in range(n - window + 1)]
+    np.testing.assert_array_equal(rolling_max(data, window), expected_max)
+    np.testing.assert_array_equal(rolling_min(data, window), expected_min)
+
+
+@pytest.mark.parametrize('kind', ['walk', 'ties'])
+def test_peaks_and_troughs_match_the_scanners_old_helpers(kind):
+    data = series(kind, 4)
+    assert find_peaks(data, 5).tolist() == naive_pivot_highs(data, 5, 5)
+    # The scanners found troughs as peaks of the negated series
+    assert find_troughs(data, 5).tolist() == naive_pivot_highs([-x for x in data], 5, 5)
@@ -0,0 +1,122 @@
+import multiprocessing
+import threading
+import time
+
+import ccxt
+import pytest
+
+from rate_limit import (PRIORITY_RESERVE, RATE_LIMIT_PAUSE_SECONDS, FileTokenBucket, RateLimitedExchange,
+                        RateLimiter, TokenBucket)
+
+
+class ManualBucket(TokenBucket):
+    """Bucket that only holds the tokens the test hands it"""
+
+    def __init__(self, capacity: float = 10):
+        super().__init__(capacity, 1.0)
+        self.tokens = 0.0
+
+    def take(self, weight: float, reserve: float = 0.0) -> float:
+        with self._lock:
+            if self.tokens - weight >= reserve:
+                self.tokens -= weight
+                return 0.0
+            return 0.01
+
+    def add(self, tokens: float):
+        with self._lock:
+            self.tokens += tokens
+
+
+def wait_until(condition, timeout: float = 2.0):
+    deadline = time.time() + timeout
+    while not condition():
+        assert time.time() < deadline, "timed out"
+        time.sleep(0.001)
+
+
+def start_acquire(limiter: RateLimiter, priority: str, granted: list) -> threading.Thread:
+    thread = threading.Thread(target=lambda: (limiter.acquire(1, priority), granted.append(priority)), daemon=True)
+    thread.start()
+    return thread
+
+
+def test_high_priority_waiter_overtakes_queued_low_priority(monkeypatch):
+    monkeypatch.setattr('rate_limit.PRIORITY_RESERVE', dict.fromkeys(PRIORITY_RESERVE, 0.0))  # Only the queue counts
+    bucket = ManualBucket()
+    limiter = RateLimiter(bucket)
+    granted = []
+    low = start_acquire(limiter, 'ticker', granted)
+    wait_until(lambda: len(limiter._waiting) == 1)
+    high = start_acquire(limiter, 'candles', granted)
+    wait_until(lambda: len(limiter._waiting) == 2)
+
+    bucket.add(1)
+    high.join(2)
+    assert granted == ['candles']
+    assert low.is_alive()
+
+    bucket.add(1)
+    low.join(2)
+    assert granted == ['candles', 'ticker']
+
+
+def test_low_priority_cannot_take_the_reserve():
+    bucket = TokenBucket(10, 1000.0)  # Refill is negligible over the test
+    limiter = RateLimiter(bucket)
+    assert bucket.take(10 * (1 - PRIORITY_RESERVE['ticker'])) == 0  # Leave exactly the ticker reserve
+
+    assert not limiter.try_acquire(1, 'ticker')
+    assert bucket.take(1, PRIORITY_RESERVE['ticker'] * 10) > 0
+    assert limiter.try_acquire(1, 'default')  # 'default' only keeps 2 of the 5 back
+    assert limiter.try_acquire(1, 'candles')
+
+
+class RateLimitedFake:
+    id = 'fake'
+
+    def fetch_ohlcv(self, symbol, timeframe='1m', since=None, limit=None):
+        raise ccxt.RateLimitExceeded('429 Too Many Requests')
+
+
+def test_rate_limit_error_pauses_every_caller(tmp_path):
+    path = str(tmp_path / 'bucket.bin')
+    exchange = RateLimitedExchange(RateLimitedFake(), RateLimiter(FileTokenBucket(20, 2.0, path)), {'fetch_ohlcv': 1})
+    other_process = RateLimiter(FileTokenBucket(20, 2.0, path))
+
+    with pytest.raises(ccxt.RateLimitExceeded):
+        exchange.fetch_ohlcv('XRP/USDT')
+
+    for limiter in (exchange.limiter, other_process):
+        assert not limiter.try_acquire(1, 'candles')
+        assert limiter.bucket.take(1) == pytest.approx(RATE_LIMIT_PAUSE_SECONDS, abs=0.5)
+
+
+def _draw(path: str, capacity: float, window: float, count: int, times):
+    limiter = RateLimiter(FileTokenBucket(capacity, window, path))
+    for _ in range(count):
+        limiter.acquire(1, 'candles')
+        times.append(time.time())
+
+
+def test_processes_sharing_a_bucket_file_stay_under_the_rate(tmp_path):
+    path = str(tmp_path / 'bucket.bin')
+    capacity, window, per_process = 5, 0.25, 15
+    rate = capacity / window
+    with multiprocessing.Manager() as manager:
+        times = manager.list()
+        FileTokenBucket(capacity, window, path).take(0)  # Create the file full before the clock starts
+        started = time.time()
+        workers = [multiprocessing.Process(target=_draw, args=(path, capacity, window, per_process, times))
+                   for _ in range(2)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join(10)
+        times = sorted(times)
+
+    assert len(times) == 2 * per_process
+    for granted, at in enumerate(times, start=1):
+        # At most the full bucket plus what refilled since the start
+        assert granted <= capacity + rate * (at - started) + 1e-6
+    assert times[-1] - started >= (2 * per_process - capacity) / rate
@@ -0,0 +1,92 @@
+import numpy as np
+import pytest
+
+from candle_cache import CandleCache
+from fake_exchange import FakeExchange
+from resampler import ResampledFeed, Resampler, resample
+from timeframes import timeframe_ms
+
+SYMBOL = 'XRP/USDT'
+MINUTE = 60_000
+HOUR = 3_600_000
+START = 1_700_000_000_000 // HOUR * HOUR  # On an hour boundary
+
+
+def minutes(start: int, count: int) -> np.ndarray:
+    """`count` closed FakeExchange 1m candles from `start`"""
+    return FakeExchange(now_ms=start + (count + 1) * MINUTE).ohlcv_array(SYMBOL, '1m', since=start, limit=count)
+
+
+def stream(resampler: Resampler, candles) -> dict:
+    """Feed candles in order; closed buckets per timeframe with the index of the candle that closed them"""
+    closed = {timeframe: [] for timeframe in resampler.timeframes}
+    for index, candle in enumerate(candles):
+        for timeframe, bucket in resampler.add(list(candle)):
+            closed[timeframe].append((index, bucket))
+    return closed
+
+
+def buckets(closed) -> np.ndarray:
+    return np.array([bucket for _, bucket in closed]).reshape(-1, 6)
+
+
+@pytest.mark.parametrize('timeframe', ['5m', '1h'])
+def test_streamed_buckets_match_batch_resample(timeframe):
+    candles = minutes(START, 3 * 60)
+    closed = stream(Resampler([timeframe]), candles)[timeframe]
+
+    np.testing.assert_allclose(buckets(closed), resample(candles, timeframe))
+    # Each bucket closes on its own last minute, not one bar late
+    per_bucket = timeframe_ms(timeframe) // MINUTE
+    assert [index for index, _ in closed] == [per_bucket * (k + 1) - 1 for k in range(len(closed))]
+
+
+@pytest.mark.parametrize('timeframe', ['5m', '1h'])
+def test_bucket_missing_its_last_minute_closes_on_the_next_bucket(timeframe):
+    candles = minutes(START, 3 * 60)
+    per_bucket = timeframe_ms(timeframe) // MINUTE
+    missing = per_bucket - 1  # Last minute of the first bucket
+    candles = np.delete(candles, missing, axis=0)
+    closed = stream(Resampler([timeframe]), candles)[timeframe]
+
+    np.testing.assert_allclose(buckets(closed), resample(candles, timeframe))
+    assert closed[0][0] == missing  # Emitted by the first candle of the second bucket
+
+
+@pytest.mark.parametrize('timeframe', ['5m', '1h'])
+def test_unseeded_partial_first_bucket_is_dropped(timeframe):
+    candles = minutes(START + 2 * MINUTE, 3 * 60)  # Start-up two minutes into a bucket
+    closed = stream(Resampler([timeframe]), candles)[timeframe]
+
+    expected = resample(candles, timeframe)[1:]
+    np.testing.assert_allclose(buckets(closed), expected[:len(closed)])
+    assert buckets(closed)[0, 0] == START + timeframe_ms(timeframe)
+
+
+def test_seeded_buckets_are_skipped():
+    candles = minutes(START, 60)
+    resampler = Resampler(['5m'])
+    resampler.seed('5m', START + 20 * MINUTE)  # Buckets up to 00:20 came over REST
+    closed = buckets(stream(resampler, candles)['5m'])
+    np.testing.assert_allclose(closed, resample(candles, '5m')[5:])
+
+
+@pytest.mark.parametrize('timeframe', ['5m', '1h'])
+def test_resampled_feed_matches_batch_resample_of_the_1m_feed(timeframe):
+    exchange = FakeExchange(now_ms=START + 7 * MINUTE + 30_000)
+    feed = ResampledFeed(CandleCache(exchange), ['5m', '1h'], history=300)
+    feed.update(SYMBOL, exchange.now_ms)
+    seeded = feed.candles(SYMBOL, timeframe)[-1, 0]  # Last bar fetched over REST
+
+    for _ in range(3 * 60):
+        exchange.now_ms += MINUTE
+        feed.update(SYMBOL, exchange.now_ms)
+
+    series = feed.candles(SYMBOL, timeframe)
+    new = series[series[:, 0] > seeded]
+    assert len(new) >= 2
+    base = exchange.ohlcv_array(SYMBOL, '1m', since=int(new[0, 0]), limit=500)
+    expected = resample(base, timeframe)
+    np.testing.assert_allclose(new, expected[:len(new)])
+    # Only closed buckets come out
+    assert new[-1, 0] + timeframe_ms(timeframe) <= exchange.now_ms
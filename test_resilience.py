@@ -0,0 +1,175 @@
+import threading
+import time
+
+import ccxt
+import pytest
+
+import resilience
+from rate_limit import RateLimitedExchange, RateLimiter, TokenBucket
+from resilience import CircuitBreaker, CircuitOpenError, ResilientExchange, is_bar_close_fetch
+from timeframes import timeframe_ms
+
+MINUTE = 60_000
+BAR = 1_700_000_000_000 // MINUTE * MINUTE
+NOW_MS = BAR + 30_000  # Half way through the bar opened at BAR
+
+
+def bar_open(timeframe: str, bars_back: int = 0) -> int:
+    """Open time of the current `timeframe` bar, or of one `bars_back` before it"""
+    step = timeframe_ms(timeframe)
+    return int(time.time() * 1000) // step * step - bars_back * step
+
+
+class ScriptedClient:
+    """Raises the queued errors in turn, then answers; the first answer can be slow"""
+
+    id = 'fake'
+
+    def __init__(self, errors=(), first_delay: float = 0.0):
+        self.errors = list(errors)
+        self.first_delay = first_delay
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def _answer(self, value):
+        with self._lock:
+            self.calls += 1
+            call = self.calls
+            error = self.errors.pop(0) if self.errors else None
+        if error is not None:
+            raise error
+        if call == 1 and self.first_delay:
+            time.sleep(self.first_delay)
+        return value
+
+    def fetch_ohlcv(self, symbol, timeframe='1m', since=None, limit=None, params=None):
+        return self._answer([[since or 0, 1.0, 1.0, 1.0, 1.0, 1.0]])
+
+    def fetch_ticker(self, symbol, params=None):
+        return self._answer({'symbol': symbol, 'last': 1.0})
+
+
+@pytest.fixture(autouse=True)
+def fast_backoff(monkeypatch):
+    monkeypatch.setattr(resilience, 'BASE_DELAY_SECONDS', 0.001)
+    monkeypatch.setattr(resilience, 'RATE_LIMIT_DELAY_SECONDS', 0.001)
+    monkeypatch.setattr(resilience, 'HEDGE_AFTER_SECONDS', 0.05)
+
+
+def test_network_errors_are_retried_and_counted():
+    client = ScriptedClient([ccxt.NetworkError('reset'), ccxt.RequestTimeout('timeout')])
+    exchange = ResilientExchange(client)
+    assert exchange.fetch_ticker('XRP/USDT')['last'] == 1.0
+    assert client.calls == 3
+    assert exchange.breakers['fetch_ticker'].state == 'closed'
+
+
+def test_rate_limit_errors_are_retried_without_tripping_the_breaker():
+    client = ScriptedClient([ccxt.RateLimitExceeded('429')] * (resilience.BREAKER_FAILURES + 1))
+    exchange = ResilientExchange(client)
+    assert exchange.fetch_ticker('XRP/USDT')['last'] == 1.0
+    assert exchange.breakers['fetch_ticker'].failures == 0
+
+
+@pytest.mark.parametrize('error', [ccxt.BadSymbol('no market'), ccxt.ExchangeError('rejected'), ValueError('bug')])
+def test_exchange_and_other_errors_are_raised_at_once(error):
+    client = ScriptedClient([error])
+    exchange = ResilientExchange(client)
+    with pytest.raises(type(error)):
+        exchange.fetch_ticker('XRP/USDT')
+    assert client.calls == 1
+
+
+def test_breaker_opens_then_fails_fast_without_calling():
+    client = ScriptedClient([ccxt.NetworkError('down')] * 10)
+    exchange = ResilientExchange(client)
+    exchange.breakers['fetch_ticker'].max_failures = 3
+
+    with pytest.raises(ccxt.NetworkError):
+        exchange.fetch_ticker('XRP/USDT')
+    assert client.calls == 3
+    with pytest.raises(CircuitOpenError):
+        exchange.fetch_ticker('XRP/USDT')
+    assert client.calls == 3
+
+
+def test_breaker_open_half_open_closed_cycle():
+    breaker = CircuitBreaker('fetch_ohlcv', failures=2, reset_seconds=0.05)
+    breaker.failure()
+    breaker.before_call()
+    breaker.failure()
+    assert breaker.state == 'open'
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+    time.sleep(0.06)
+    breaker.before_call()
+    assert breaker.state == 'half_open'
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()  # Only one trial call at a time
+    breaker.failure()
+    assert breaker.state == 'open'  # A failed trial reopens at once
+
+    time.sleep(0.06)
+    breaker.before_call()
+    breaker.success()
+    assert breaker.state == 'closed'
+    breaker.before_call()
+
+
+def test_is_bar_close_fetch():
+    just_closed = BAR - MINUTE
+    assert is_bar_close_fetch('fetch_ohlcv', ('XRP/USDT', '1m'), {'since': just_closed}, NOW_MS)
+    assert is_bar_close_fetch('fetch_ohlcv', ('XRP/USDT', '1m', just_closed), {}, NOW_MS)
+    assert is_bar_close_fetch('fetch_ohlcv', ('XRP/USDT', '1m', just_closed), {}, BAR)  # Right at the close
+    assert not is_bar_close_fetch('fetch_ohlcv', ('XRP/USDT', '1m'), {'limit': 100}, NOW_MS)
+    assert not is_bar_close_fetch('fetch_ohlcv', ('XRP/USDT', '1m', just_closed, 100), {}, NOW_MS)
+    assert not is_bar_close_fetch('fetch_ticker', ('XRP/USDT',), {}, NOW_MS)
+
+
+def test_mid_bar_and_catch_up_polls_are_not_bar_close_fetches():
+    # rsi_alert.py's once-a-second poll asks from the forming bar, which has not closed yet
+    assert not is_bar_close_fetch('fetch_ohlcv', ('XRP/USDT', '1m', BAR), {}, NOW_MS)
+    # After an outage the poll starts several bars back
+    assert not is_bar_close_fetch('fetch_ohlcv', ('XRP/USDT', '1m', BAR - 10 * MINUTE), {}, NOW_MS)
+
+
+def test_bar_close_fetch_follows_the_timeframe():
+    five = 300_000
+    bar = NOW_MS // five * five
+    assert is_bar_close_fetch('fetch_ohlcv', ('XRP/USDT',), {'timeframe': '5m', 'since': bar - five}, NOW_MS)
+    assert not is_bar_close_fetch('fetch_ohlcv', ('XRP/USDT',), {'timeframe': '5m', 'since': bar}, NOW_MS)
+    assert not is_bar_close_fetch('fetch_ohlcv', ('XRP/USDT', '7m', bar), {}, NOW_MS)
+
+
+def test_slow_bar_close_fetch_is_hedged():
+    client = ScriptedClient(first_delay=0.5)
+    exchange = ResilientExchange(client)
+    since = bar_open('1h', 1)
+    started = time.time()
+    assert exchange.fetch_ohlcv('XRP/USDT', '1h', since=since)[0][0] == since
+    assert time.time() - started < 0.4
+    assert (exchange.hedges, exchange.hedge_wins) == (1, 1)
+
+
+@pytest.mark.parametrize('call', [
+    lambda exchange: exchange.fetch_ohlcv('XRP/USDT', '1m', limit=100),
+    lambda exchange: exchange.fetch_ohlcv('XRP/USDT', '1h', bar_open('1h', 1), 100),
+    lambda exchange: exchange.fetch_ohlcv('XRP/USDT', '1h', bar_open('1h')),
+    lambda exchange: exchange.fetch_ticker('XRP/USDT'),
+], ids=['refill', 'backfill page', 'mid-bar poll', 'ticker'])
+def test_other_calls_are_not_hedged(call):
+    client = ScriptedClient(first_delay=0.1)
+    exchange = ResilientExchange(client)
+    call(exchange)
+    assert exchange.hedges == 0
+    assert client.calls == 1
+
+
+def test_no_hedge_without_spare_rate_limit_tokens():
+    client = ScriptedClient(first_delay=0.2)
+    bucket = TokenBucket(1, 1000.0)  # One token, no meaningful refill
+    exchange = ResilientExchange(RateLimitedExchange(client, RateLimiter(bucket), {'fetch_ohlcv': 1}))
+    exchange.fetch_ohlcv('XRP/USDT', '1h', since=bar_open('1h', 1))
+    assert exchange.hedges == 0
+    assert client.calls == 1
@@ -0,0 +1,28 @@
+from divergence import DivergenceDetector
+from fake_exchange import FakeExchange
+from indicators import RSIState
+from scanner import BarContext, PivotDivergenceStrategy
+
+WINDOW = 300  # Closed candles handed over per cycle, like Scanner.history
+
+
+def test_pivot_divergence_matches_one_continuous_rsi_stream():
+    candles = FakeExchange(now_ms=1_700_000_000_000).ohlcv_array('XRP/USDT', '5m', limit=2000)
+    enabled = ("regular_bullish", "regular_bearish", "hidden_bullish", "hidden_bearish")
+    strategy = PivotDivergenceStrategy('5m', enabled=enabled)
+
+    emitted = []
+    for end in range(WINDOW, len(candles) + 1):  # A sliding window, one new bar per cycle
+        context = BarContext(None, 'XRP/USDT', '5m', candles[end - WINDOW:end])
+        emitted += [(end - 1, signal.kind) for signal in strategy.on_bar(context)]
+
+    state, detector = RSIState(14), DivergenceDetector(enabled=enabled)
+    expected = []
+    for bar, candle in enumerate(candles):
+        rsi = state.update(candle[4])
+        events = detector.update(rsi, candle[3], candle[2]) if rsi is not None else []
+        if bar >= WINDOW:
+            expected += [(bar, kind) for kind in events]
+
+    assert emitted == expected
+    assert emitted
@@ -0,0 +1,118 @@
+import asyncio
+
+import pytest
+
+import scheduler as scheduler_module
+from scheduler import IDLE_SECONDS, BarScheduler, seconds_until_next_bar
+
+HOUR = 1_700_002_800  # A 1h close that is not a 4h close
+
+
+class Stop(BaseException):
+    """Ends a run loop; not an Exception, so the loops' error handling lets it through"""
+
+
+class Recorder:
+    def __init__(self, error: Exception = None):
+        self.calls = []
+        self.error = error
+
+    def __call__(self, batch, boundary):
+        self.calls.append((batch, boundary))
+        if self.error is not None:
+            raise self.error
+
+
+def test_jobs_closing_together_are_coalesced_per_callback():
+    scan, ticker = Recorder(), Recorder()
+    scheduler = BarScheduler()
+    scheduler.add('5m', ['XRP/USDT', 'BTC/USDT'], scan)
+    scheduler.add('15m', ['BTC/USDT', 'ETH/USDT'], scan)
+    scheduler.add('1h', ['XRP/USDT'], scan)
+    scheduler.add('4h', ['XRP/USDT'], scan)
+    scheduler.add('5m', ['ETH/USDT', 'XRP/USDT'], scan)  # Merged into the first 5m job, without repeats
+    scheduler.add('1m', ['XRP/USDT'], ticker)
+
+    assert scheduler.due_batches(HOUR) == {
+        scan: {'5m': ['XRP/USDT', 'BTC/USDT', 'ETH/USDT'], '15m': ['BTC/USDT', 'ETH/USDT'], '1h': ['XRP/USDT']},
+        ticker: {'1m': ['XRP/USDT']},
+    }
+    assert scheduler.due_batches(HOUR + 300) == {
+        scan: {'5m': ['XRP/USDT', 'BTC/USDT', 'ETH/USDT']},
+        ticker: {'1m': ['XRP/USDT']},
+    }
+    assert scheduler.due_batches(HOUR + 60) == {ticker: {'1m': ['XRP/USDT']}}
+
+
+def test_next_boundary_is_the_earliest_close():
+    scheduler = BarScheduler()
+    scheduler.add('1h', ['XRP/USDT'], Recorder())
+    scheduler.add('5m', ['XRP/USDT'], Recorder())
+    assert scheduler.next_boundary(HOUR + 1) == HOUR + 300
+    assert scheduler.next_boundary(HOUR) == HOUR + 300  # A close at `now` has already happened
+
+
+def test_run_due_calls_each_callback_once_and_survives_errors():
+    failing, working = Recorder(RuntimeError('boom')), Recorder()
+    scheduler = BarScheduler()
+    scheduler.add('5m', ['XRP/USDT'], failing)
+    scheduler.add('1h', ['BTC/USDT'], failing)
+    scheduler.add('5m', ['XRP/USDT'], working)
+    scheduler.run_due(HOUR)
+    assert failing.calls == [({'5m': ['XRP/USDT'], '1h': ['BTC/USDT']}, HOUR)]
+    assert working.calls == [({'5m': ['XRP/USDT']}, HOUR)]
+
+
+@pytest.mark.parametrize('timeframe, step', [('1m', 60), ('5m', 300), ('1h', 3600)])
+def test_seconds_until_next_bar(timeframe, step):
+    assert seconds_until_next_bar(timeframe, 2.0, now=HOUR) == step + 2.0  # Exactly on a boundary: a full bar
+    assert seconds_until_next_bar(timeframe, 2.0, now=HOUR - 0.5) == pytest.approx(2.5)
+    assert seconds_until_next_bar(timeframe, 0.0, now=HOUR + 10) == step - 10
+
+
+def test_unknown_timeframe_is_rejected_on_add():
+    with pytest.raises(ValueError):
+        BarScheduler().add('7m', ['XRP/USDT'], Recorder())
+
+
+def test_next_boundary_without_jobs_is_none():
+    assert BarScheduler().next_boundary(HOUR) is None
+
+
+def test_run_forever_waits_for_the_first_job():
+    clock = [HOUR - 10.0]
+    sleeps = []
+    scan = Recorder(Stop())
+
+    def sleep(seconds):
+        sleeps.append(seconds)
+        clock[0] += seconds
+        if not scheduler.jobs:
+            scheduler.add('1m', ['XRP/USDT'], scan)  # As another thread would, after the loop started
+
+    scheduler = BarScheduler(settle_seconds=2.0, clock=lambda: clock[0], sleep=sleep)
+    with pytest.raises(Stop):
+        scheduler.run_forever()
+    assert sleeps == [IDLE_SECONDS, 11.0]
+    assert scan.calls == [({'1m': ['XRP/USDT']}, HOUR)]
+
+
+def test_async_loop_waits_for_the_first_job_and_uses_the_clock(monkeypatch):
+    monkeypatch.setattr(scheduler_module, 'IDLE_SECONDS', 0.01)
+    calls = []
+
+    async def scan(batch, boundary):
+        calls.append((batch, boundary))
+        raise Stop()
+
+    scheduler = BarScheduler(settle_seconds=0.0, clock=lambda: HOUR - 0.01)
+
+    async def main():
+        async def add_later():
+            await asyncio.sleep(0.05)
+            scheduler.add('1m', ['XRP/USDT'], scan)
+        await asyncio.gather(scheduler.run_forever_async(), add_later())
+
+    with pytest.raises(Stop):
+        asyncio.run(main())
+    assert calls == [({'1m': ['XRP/USDT']}, HOUR)]  # The boundary comes from the injected clock
@@ -0,0 +1,69 @@
+import multiprocessing
+import time
+
+import pytest
+
+from shared_snapshot import SharedSnapshot, divergence_bits, divergence_types, slot_map, stale_rows
+
+SYMBOLS = ['XRP/USDT', 'BTC/USDT', 'ETH/USDT']
+
+
+@pytest.fixture
+def snapshot():
+    snapshot = SharedSnapshot.create(SYMBOLS)
+    yield snapshot
+    snapshot.close()
+
+
+def test_write_and_read(snapshot):
+    snapshot.write(1, price=2.5, rsi=40.0, state=divergence_bits(['regular_bullish']))
+    rows = snapshot.read()
+    assert slot_map(rows) == {symbol: i for i, symbol in enumerate(SYMBOLS)}
+    assert rows['price'][1] == 2.5 and rows['rsi'][1] == 40.0
+    assert divergence_types(int(rows['state'][1])) == ['regular_bullish']
+    assert rows['seq'][1] == 2 and not stale_rows(rows).any()
+
+
+def test_row_held_mid_write_is_flagged_stale(snapshot):
+    snapshot.write(0, price=1.0, rsi=50.0)
+    # A writer stopped half way: seq odd, only one of its two fields written
+    snapshot.rows['seq'][0] += 1
+    snapshot.rows['price'][0] = 2.0
+
+    rows = snapshot.read(max_retries=10)
+    assert stale_rows(rows).tolist() == [True, False, False]
+
+    snapshot.rows['rsi'][0] = 60.0
+    snapshot.rows['seq'][0] += 1  # Writer finishes
+    rows = snapshot.read()
+    assert not stale_rows(rows).any()
+    assert (rows['price'][0], rows['rsi'][0]) == (2.0, 60.0)
+
+
+def _hammer(name: str, slots: int, seconds: float):
+    """Keep price and rsi equal in every write to row 0"""
+    snapshot = SharedSnapshot.attach(name, slots)
+    value, deadline = 0.0, time.time() + seconds
+    while time.time() < deadline:
+        value += 1
+        snapshot.write(0, price=value, rsi=value)
+    snapshot.rows = None
+    snapshot.shm.close()
+
+
+def test_reader_never_returns_a_torn_row(snapshot):
+    snapshot.write(0, price=0.0, rsi=0.0)
+    writer = multiprocessing.Process(target=_hammer, args=(snapshot.name, len(snapshot), 0.5))
+    writer.start()
+    reads = stale = 0
+    try:
+        while writer.is_alive():
+            rows = snapshot.read(max_retries=3)
+            reads += 1
+            if stale_rows(rows)[0]:
+                stale += 1
+                continue
+            assert rows['price'][0] == rows['rsi'][0]
+    finally:
+        writer.join(5)
+    assert reads > stale
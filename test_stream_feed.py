@@ -0,0 +1,73 @@
+import numpy as np
+
+from candle_store import CandleStore, backfill
+from fake_exchange import FakeExchange
+from stream_feed import BarPipeline, CandleBuilder, closed_history
+
+SYMBOL = 'XRP/USDT'
+STEP = 60_000
+NOW = 1_700_000_000_000 // STEP * STEP + 30_000
+
+
+def candles(count: int = 800) -> list:
+    return FakeExchange(now_ms=NOW).fetch_ohlcv(SYMBOL, '1m', limit=count)
+
+
+def test_seeded_pipeline_streams_like_one_that_saw_every_bar():
+    rows = candles()
+    seeded, continuous = BarPipeline(SYMBOL), BarPipeline(SYMBOL)
+    history, live = rows[:300], rows[300:]
+
+    assert all(continuous.on_closed(candle) is not None for candle in history)
+    seeded.seed(history)
+    assert seeded.rsi.value == continuous.rsi.value
+    assert seeded.on_forming(live[0]) is not None  # RSI from the first streamed bar
+
+    seeded_events = [seeded.on_closed(candle) for candle in live]
+    continuous_events = [continuous.on_closed(candle) for candle in live]
+    assert seeded_events == continuous_events
+    assert any(seeded_events)
+
+
+def test_bars_already_seeded_are_skipped():
+    rows = candles(100)
+    pipeline = BarPipeline(SYMBOL)
+    pipeline.seed(rows)
+    value = pipeline.rsi.value
+    assert pipeline.on_closed(rows[-1]) == []
+    assert pipeline.rsi.value == value
+
+
+def test_closed_history_prefers_an_up_to_date_store(tmp_path):
+    exchange = FakeExchange(now_ms=NOW)
+    store = CandleStore(str(tmp_path), 'fake')
+    backfill(exchange, store, SYMBOL, '1m', NOW - 1000 * STEP)
+    calls = exchange.calls
+
+    history = closed_history(SYMBOL, '1m', NOW, store, exchange, bars=300)
+    assert exchange.calls == calls
+    assert history == exchange.fetch_ohlcv(SYMBOL, '1m', limit=301)[:-1]
+
+
+def test_closed_history_falls_back_to_rest_when_the_store_is_stale(tmp_path):
+    exchange = FakeExchange(now_ms=NOW)
+    store = CandleStore(str(tmp_path), 'fake')
+    backfill(exchange, store, SYMBOL, '1m', NOW - 1000 * STEP)
+    later = NOW + 10 * STEP
+    exchange.now_ms = later
+
+    history = closed_history(SYMBOL, '1m', later, store, exchange, bars=300)
+    assert len(history) == 300
+    assert history[-1][0] == later // STEP * STEP - STEP
+    assert closed_history(SYMBOL, '1m', later, store) == []
+
+
+def test_candle_builder_closes_on_the_next_bar():
+    rows = candles(3)
+    builder = CandleBuilder('1m')
+    assert builder.add_candle(rows[0]) is None
+    update = list(rows[0])
+    update[4] += 1
+    assert builder.add_candle(update) is None
+    np.testing.assert_array_equal(builder.add_candle(rows[1]), update)
+    assert builder.add_candle(rows[0]) is None  # Stale
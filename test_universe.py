@@ -0,0 +1,113 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+from fake_exchange import FakeExchange
+from universe import MARKETS_TTL_SECONDS, VOLUMES_TTL_SECONDS, HashRing, Universe, shard, worker_names
+
+SYMBOLS = [f"SYM{i}/USDT" for i in range(2000)]
+
+
+class FakeClock:
+    def __init__(self, now: float = 1_700_000_000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class ListingExchange(FakeExchange):
+    """FakeExchange with a delisted market and one quoted in BTC"""
+
+    def load_markets(self, reload=False):
+        markets = super().load_markets(reload)
+        markets['OLD/USDT:USDT']['active'] = False
+        return markets
+
+
+def test_shard_is_deterministic_across_processes():
+    code = "from universe import shard; print(shard([f'SYM{i}/USDT' for i in range(200)], 4))"
+    outputs = {
+        subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True,
+                       env={**os.environ, 'PYTHONHASHSEED': seed}, cwd=os.path.dirname(__file__) or '.').stdout
+        for seed in ('1', '2')
+    }
+    assert outputs == {f"{shard([f'SYM{i}/USDT' for i in range(200)], 4)}\n"}
+
+
+def test_shards_cover_every_symbol_once_in_input_order():
+    shards = shard(SYMBOLS, 4)
+    assert sorted(s for part in shards for s in part) == sorted(SYMBOLS)
+    for part in shards:
+        assert part == sorted(part, key=SYMBOLS.index)
+        assert 0.15 < len(part) / len(SYMBOLS) < 0.35  # Roughly even
+
+
+@pytest.mark.parametrize('workers', [2, 4, 8])
+def test_adding_a_worker_moves_only_its_share(workers):
+    ring = HashRing(worker_names(workers))
+    before = {symbol: ring.worker_for(symbol) for symbol in SYMBOLS}
+    ring.add('worker-new')
+    moved = [symbol for symbol in SYMBOLS if ring.worker_for(symbol) != before[symbol]]
+
+    assert all(ring.worker_for(symbol) == 'worker-new' for symbol in moved)  # Nothing moves between old workers
+    assert abs(len(moved) / len(SYMBOLS) - 1 / (workers + 1)) < 0.05
+
+    ring.remove('worker-new')
+    assert {symbol: ring.worker_for(symbol) for symbol in SYMBOLS} == before
+
+
+def test_empty_ring_raises():
+    with pytest.raises(ValueError):
+        HashRing().worker_for('XRP/USDT')
+
+
+def test_symbols_are_filtered_and_ranked_by_volume(tmp_path):
+    listed = [f"SYM{i}/USDT:USDT" for i in range(50)] + ['SYM0/USDT', 'ETH/BTC:BTC', 'OLD/USDT:USDT']
+    exchange = ListingExchange(listed)
+    universe = Universe(exchange, cache_dir=str(tmp_path))
+    volumes = universe.volumes()
+
+    swaps = universe.symbols('swap', 'USDT')
+    assert set(swaps) == {f"SYM{i}/USDT:USDT" for i in range(50)}  # No spot, BTC-quoted or inactive market
+    assert [volumes[s] for s in swaps] == sorted((volumes[s] for s in swaps), reverse=True)
+
+    cut_off = volumes[swaps[20]]
+    assert universe.symbols('swap', 'USDT', min_volume=cut_off) == swaps[:21]
+    assert universe.symbols('swap', 'USDT', limit=5) == swaps[:5]
+    assert universe.symbols('spot', 'USDT') == ['SYM0/USDT']
+
+
+def test_cache_is_reused_within_its_ttl_and_refetched_after(tmp_path):
+    clock = FakeClock()
+    exchange = FakeExchange([f"SYM{i}/USDT:USDT" for i in range(10)])
+    universe = Universe(exchange, cache_dir=str(tmp_path), clock=clock)
+    symbols = universe.symbols()
+    assert exchange.calls == 2  # load_markets and fetch_tickers
+
+    # Another process starting on the same cache directory
+    restarted = Universe(exchange, cache_dir=str(tmp_path), clock=clock)
+    clock.now += VOLUMES_TTL_SECONDS - 1
+    assert restarted.symbols() == symbols
+    assert exchange.calls == 2
+
+    clock.now += 2  # Volumes expired, markets still fresh
+    restarted.symbols()
+    assert exchange.calls == 3
+    clock.now += MARKETS_TTL_SECONDS
+    restarted.symbols()
+    assert exchange.calls == 5
+    restarted.symbols(reload=True)
+    assert exchange.calls == 7
+
+
+def test_unreadable_cache_is_refetched(tmp_path):
+    exchange = FakeExchange()
+    universe = Universe(exchange, cache_dir=str(tmp_path))
+    universe.markets()
+    with open(universe._cache_path('markets'), 'w') as f:
+        f.write('{not json')
+    assert universe.markets() == exchange.load_markets()
+    assert exchange.calls == 3
@@ -0,0 +1,36 @@
+TIMEFRAME_SECONDS = {
+    '1m': 60,
+    '3m': 180,
+    '5m': 300,
+    '15m': 900,
+    '30m': 1800,
+    '1h': 3600,
+    '2h': 7200,
+    '4h': 14400,
+    '1d': 86400,
+}
+
+
+def timeframe_seconds(timeframe: str) -> int:
+    """Length of one bar in seconds"""
+    try:
+        return TIMEFRAME_SECONDS[timeframe]
+    except KeyError:
+        raise ValueError(f"Unsupported timeframe: {timeframe}") from None
+
+
+def timeframe_ms(timeframe: str) -> int:
+    """Length of one bar in milliseconds"""
+    return timeframe_seconds(timeframe) * 1000
+
+
+def bar_open_ms(timestamp_ms: int, timeframe: str) -> int:
+    """Open time of the bar containing `timestamp_ms`"""
+    step = timeframe_ms(timeframe)
+    return timestamp_ms // step * step
+
+
+def next_bar_close(timeframe: str, now: float) -> float:
+    """Epoch seconds at which the bar open at `now` closes"""
+    step = timeframe_seconds(timeframe)
+    return (now // step + 1) * step
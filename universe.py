@@ -0,0 +1,184 @@
+import argparse
+import bisect
+import hashlib
+import json
+import os
+import time
+from typing import Callable, Dict, Iterable, List, Optional
+
+from exchange_client import create_client
+
+DEFAULT_CACHE_DIR = os.path.join('data', 'markets')
+MARKETS_TTL_SECONDS = 6 * 3600  # Listings change rarely; load_markets is a heavy call
+VOLUMES_TTL_SECONDS = 15 * 60  # 24h volumes only decide ranking and cut-off
+RING_REPLICAS = 400  # Virtual nodes per worker; more points even out shard sizes
+
+
+def _stable_hash(key: str) -> int:
+    """64-bit hash that is the same in every process (unlike hash())"""
+    return int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), 'big')
+
+
+class HashRing:
+    """
+    Consistent hashing of symbols onto workers.
+
+    Every worker owns RING_REPLICAS points on a 64-bit ring and a symbol
+    belongs to the first point at or after its hash. Adding or removing a
+    worker only moves the symbols next to that worker's points, about 1/N of
+    them, instead of reshuffling the whole universe like `hash % N` would.
+    """
+
+    def __init__(self, workers: Iterable[str] = (), replicas: int = RING_REPLICAS):
+        self.replicas = replicas
+        self._points: List[int] = []
+        self._owners: List[str] = []
+        for worker in workers:
+            self.add(worker)
+
+    @property
+    def workers(self) -> List[str]:
+        return sorted(set(self._owners))
+
+    def add(self, worker: str):
+        for replica in range(self.replicas):
+            point = _stable_hash(f"{worker}#{replica}")
+            index = bisect.bisect(self._points, point)
+            self._points.insert(index, point)
+            self._owners.insert(index, worker)
+
+    def remove(self, worker: str):
+        kept = [(p, w) for p, w in zip(self._points, self._owners) if w != worker]
+        self._points = [p for p, _ in kept]
+        self._owners = [w for _, w in kept]
+
+    def worker_for(self, symbol: str) -> str:
+        if not self._points:
+            raise ValueError("Hash ring has no workers")
+        index = bisect.bisect_left(self._points, _stable_hash(symbol)) % len(self._points)
+        return self._owners[index]
+
+
+def worker_names(count: int) -> List[str]:
+    return [f"worker-{i}" for i in range(count)]
+
+
+def shard(symbols: Iterable[str], workers: int, replicas: int = RING_REPLICAS) -> List[List[str]]:
+    """Split `symbols` over `workers` workers; each shard keeps the input order (e.g. by volume)"""
+    names = worker_names(workers)
+    ring = HashRing(names, replicas)
+    shards: Dict[str, List[str]] = {name: [] for name in names}
+    for symbol in symbols:
+        shards[ring.worker_for(symbol)].append(symbol)
+    return [shards[name] for name in names]
+
+
+class Universe:
+    """
+    Every market of one exchange, filtered and ranked by 24h quote volume.
+
+    load_markets and fetch_tickers results are cached as JSON under
+    `cache_dir` with their own TTLs, so restarting the scanners (or starting
+    one per worker) does not pull the full market list again each time. A
+    ccxt client is handed the cached markets, so its own lazy load is skipped.
+    """
+
+    def __init__(self, exchange, cache_dir: str = DEFAULT_CACHE_DIR, markets_ttl: float = MARKETS_TTL_SECONDS,
+                 volumes_ttl: float = VOLUMES_TTL_SECONDS, clock=time.time):
+        self.exchange = exchange
+        self.cache_dir = cache_dir
+        self.markets_ttl = markets_ttl
+        self.volumes_ttl = volumes_ttl
+        self.clock = clock
+
+    def _cache_path(self, name: str) -> str:
+        return os.path.join(self.cache_dir, f"{self.exchange.id}-{name}.json")
+
+    def _cached(self, name: str, ttl: float, fetch: Callable[[], Dict], reload: bool) -> Dict:
+        """Cached JSON document `name`, refetched when older than `ttl` seconds"""
+        path = self._cache_path(name)
+        if not reload and os.path.exists(path):
+            try:
+                with open(path) as f:
+                    cached = json.load(f)
+                if self.clock() - cached['fetched'] < ttl:
+                    return cached['data']
+            except (OSError, ValueError, KeyError) as e:
+                print(f"Warning: ignoring unreadable cache {path} ({e})")
+
+        data = fetch()
+        os.makedirs(self.cache_dir, exist_ok=True)
+        temporary = f"{path}.tmp"
+        with open(temporary, 'w') as f:
+            json.dump({'fetched': self.clock(), 'data': data}, f)
+        os.replace(temporary, path)  # Readers in other processes never see a half-written file
+        return data
+
+    def markets(self, reload: bool = False) -> Dict[str, Dict]:
+        """Market metadata by symbol, as returned by load_markets"""
+        markets = self._cached('markets', self.markets_ttl, lambda: self.exchange.load_markets(), reload)
+        if hasattr(self.exchange, 'set_markets') and not getattr(self.exchange, 'markets', None):
+            self.exchange.set_markets(markets)
+        return markets
+
+    def volumes(self, reload: bool = False) -> Dict[str, float]:
+        """24h quote volume by symbol, from one fetch_tickers call"""
+        def fetch():
+            volumes = {}
+            for symbol, ticker in self.exchange.fetch_tickers().items():
+                volume = ticker.get('quoteVolume')
+                if volume is None and ticker.get('baseVolume') is not None and ticker.get('last') is not None:
+                    volume = ticker['baseVolume'] * ticker['last']
+                volumes[symbol] = float(volume or 0.0)
+            return volumes
+        return self._cached('volumes', self.volumes_ttl, fetch, reload)
+
+    def symbols(self, market_type: str = 'swap', quote: str = 'USDT', min_volume: float = 0.0,
+                limit: Optional[int] = None, reload: bool = False) -> List[str]:
+        """Active `market_type` markets quoted in `quote`, most liquid first"""
+        markets = self.markets(reload)
+        volumes = self.volumes(reload)
+        selected = [
+            symbol for symbol, market in markets.items()
+            if market.get('type') == market_type and market.get('quote') == quote
+            and market.get('active') is not False and volumes.get(symbol, 0.0) >= min_volume
+        ]
+        selected.sort(key=lambda symbol: (-volumes.get(symbol, 0.0), symbol))
+        return selected[:limit] if limit is not None else selected
+
+    def shards(self, workers: int, **filters) -> List[List[str]]:
+        """symbols(**filters) split over `workers` workers by consistent hashing"""
+        return shard(self.symbols(**filters), workers)
+
+
+def create_exchange(fake: bool = False, market_type: str = 'swap'):
+    if fake:
+        from fake_exchange import FakeExchange
+        return FakeExchange([f"SYM{i}/USDT{suffix}" for suffix in (':USDT', '') for i in range(800)])
+    return create_client('mexc', market_type)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="List and shard the tradable symbol universe")
+    parser.add_argument('--type', default='swap', choices=('swap', 'spot'))
+    parser.add_argument('--quote', default='USDT')
+    parser.add_argument('--min-volume', type=float, default=0.0, help="Minimum 24h quote volume")
+    parser.add_argument('--top', type=int, help="Keep only the most liquid N symbols")
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--reload', action='store_true', help="Ignore the cache")
+    parser.add_argument('--fake', action='store_true', help="Use the offline FakeExchange")
+    args = parser.parse_args()
+
+    universe = Universe(create_exchange(args.fake, args.type))
+    started = time.time()
+    symbols = universe.symbols(args.type, args.quote, args.min_volume, args.top, args.reload)
+    volumes = universe.volumes()
+    print(f"--- {len(symbols)} {args.quote} {args.type} markets in {time.time() - started:.2f}s ---")
+    for name, symbols_ in zip(worker_names(args.workers), shard(symbols, args.workers)):
+        total = sum(volumes.get(symbol, 0.0) for symbol in symbols_)
+        print(f"{name}: {len(symbols_)} symbols, 24h volume {total:,.0f} | {', '.join(symbols_[:5])}"
+              f"{' ...' if len(symbols_) > 5 else ''}")
+
+
+if __name__ == "__main__":
+    main()